@@ -0,0 +1,106 @@
+import time
+from typing import Dict, List
+
+from app.core.config import OLLAMA_KEEP_ALIVE
+from app.core.llm import LLMConfig, LLMService
+from app.core.routing import LLMUnavailableError
+from app.core.tokens import token_estimator, compact
+
+QUESTION_TOKENS = 300  # Room kept for the new question
+
+
+class ChatSession:
+    """
+    Multi-turn "Ask an Expert" conversation over one contract.
+
+    The instructions and contract text form a stable prefix that is sent
+    byte-for-byte identically on every turn, followed by the conversation
+    history (trimmed to a token budget) and the new question. That lets the
+    backend reuse work across turns:
+      * Gemini: the prefix is uploaded once as cached content.
+      * Ollama: the same conversation is resent with keep_alive, so the
+        loaded model's KV cache covers the prefix and earlier turns.
+    The contract is compacted once, to what the model's context window
+    leaves after the instructions, history budget, question and reply.
+    """
+
+    INSTRUCTIONS = (
+        "You are an expert Indian Corporate Lawyer. precise, professional, and helpful.\n"
+        "Instructions: Input may be in Hindi or English. Always answer in English.\n"
+        "Answer questions based strictly on the contract below.\n"
+        "If the information is not in the contract, say so. Cite specific clauses if possible.\n\n"
+    )
+
+    def __init__(self, service: LLMService, document_text: str, config: LLMConfig,
+                 history_tokens: int = 2000, keep_alive: str = OLLAMA_KEEP_ALIVE, cache_ttl: int = 1800):
+        self.service = service
+        self.config = config
+        self.history_tokens = history_tokens
+        self.keep_alive = keep_alive
+        self.cache_ttl = cache_ttl
+        budget = service.prompt_budget(config, "chat", self.INSTRUCTIONS) - history_tokens - QUESTION_TOKENS
+        if config.chat_tokens is not None:
+            budget = min(budget, config.chat_tokens)
+        contract, self.compaction = compact(document_text, max(budget, 256), token_estimator,
+                                            config.provider, config.model)
+        self.system_prompt = f"{self.INSTRUCTIONS}Contract:\n{contract}"
+        self.history: List[Dict[str, str]] = []
+        self.turn_latencies: List[float] = []
+        self._gemini_cache = None
+        self._gemini_cache_created = 0.0
+        self._gemini_cache_failed = False
+
+    def _estimate_tokens(self, text: str) -> int:
+        return token_estimator.count(text, self.config.provider, self.config.model)
+
+    def _trimmed_history(self) -> List[Dict[str, str]]:
+        """Most recent question/answer pairs that fit in history_tokens."""
+        kept, used = [], 0
+        for i in range(len(self.history) - 2, -1, -2):
+            pair = self.history[i:i + 2]
+            cost = sum(self._estimate_tokens(m["content"]) for m in pair)
+            if used + cost > self.history_tokens:
+                break
+            kept = pair + kept
+            used += cost
+        return kept
+
+    def _cache_handle(self):
+        """Gemini cached content for the prefix, created lazily and refreshed before expiry."""
+        if self._gemini_cache_failed or self.config.provider != "gemini":
+            return None
+        if self._gemini_cache is None or time.monotonic() - self._gemini_cache_created > self.cache_ttl * 0.9:
+            self._gemini_cache = self.service.providers["gemini"].create_context_cache(
+                self.config.model, self.system_prompt, self.cache_ttl)
+            self._gemini_cache_created = time.monotonic()
+            self._gemini_cache_failed = self._gemini_cache is None
+        return self._gemini_cache
+
+    def ask(self, question: str) -> str:
+        if self.config.is_offline:
+            return "AI Offline: Enable Cloud API or local Ollama."
+
+        messages = [{"role": "system", "content": self.system_prompt}]
+        messages += self._trimmed_history()
+        messages.append({"role": "user", "content": question})
+
+        prompt = "\n\n".join(m["content"] for m in messages)
+        candidates = self.service.candidates(self.config, prompt, "chat")
+        options = self.service.request_options(self.config, candidates, "chat", keep_alive=self.keep_alive)
+        cache = self._cache_handle()
+        if cache is not None:
+            # The cache holds the prefix for config.model; other Gemini models get the plain request
+            options[("gemini", self.config.model)] = {"cached_content": cache}
+
+        start = time.perf_counter()
+        try:
+            answer, _ = self.service.router.call(candidates, messages, hedge=self.config.hedge,
+                                                 options=options, stage="chat")
+        except LLMUnavailableError as e:
+            print(f"Chat Session: request failed - {e}")
+            return "The AI service is not responding right now. Please try again in a moment."
+        self.turn_latencies.append(time.perf_counter() - start)
+
+        self.history.append({"role": "user", "content": question})
+        self.history.append({"role": "assistant", "content": answer})
+        return answer
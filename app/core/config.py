@@ -14,6 +14,18 @@ PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 # Application Settings
 APP_NAME = "GenAI Legal Intelligence"
 VERSION = "1.0.0"
+PIPELINE_VERSION = 6 # Bump when analysis output changes, so stored results are recomputed
+
+# Uploads
+UPLOAD_SPOOL_BYTES = 8 * 1024 * 1024 # In-memory uploads larger than this are spooled to UPLOAD_DIR and read from disk
+UPLOAD_CHUNK_BYTES = 1024 * 1024 # Copy, hash and decode uploads in chunks of this size
+
+# PDF Extraction
+PDF_ENGINE = "auto" # "auto" (per-page choice), "pymupdf", "pdfplumber" or "ocr"
+PDF_QUALITY_THRESHOLD = 0.9 # Page text scoring below this is re-read with the next engine
+PDF_RULED_LINES = 12 # Line segments on a page that mark it as a ruled table (read with pdfplumber)
+OCR_MIN_CHARS = 20 # Pages with less text than this and an image are OCRed
+FITZ_STORE_PAGES = 8 # Empty PyMuPDF's resource cache every this many pages, bounding memory on scanned PDFs
 
 # NLP Settings
 SPACY_MODEL = "en_core_web_sm"
@@ -22,6 +34,47 @@ SPACY_MODEL = "en_core_web_sm"
 LOCAL_MODEL = "mistral" # or qwen2.5:14b
 API_MODEL = "gpt-4"
 
+# Context Windows (discovered from model metadata; these apply when it is unavailable)
+DEFAULT_CONTEXT_TOKENS = {"gemini": 32768, "ollama": 4096, "stub": 32768}
+OLLAMA_DEFAULT_NUM_CTX = 4096 # Ollama's num_ctx when neither the Modelfile nor the request sets one
+OLLAMA_NUM_CTX = 8192 # num_ctx sent with every Ollama request (capped by the model's trained length); None = server's
+OLLAMA_KEEP_ALIVE = "30m" # How long Ollama keeps a model loaded after its last request; -1 pins it until restart
+OLLAMA_WARMUP = True # Load the selected Ollama model in the background as soon as it is chosen
+REASONING_OUTPUT_FACTOR = 4 # Reasoning models think before they answer: their output limits are this much larger
+CONTEXT_MARGIN = 0.1 # Share of the window left unused to absorb token estimation error
+USAGE_LEDGER_ENTRIES = 10000 # Recent LLM calls kept for per-stage usage reports
+
+# AI Enrichment Limits (per analysis)
+AI_DEADLINE_SECONDS = 90.0 # Wall-clock budget before remaining clauses are skipped
+AI_TOKEN_BUDGET = 60000 # Estimated prompt + completion tokens
+
+# Dashboard Settings
+CLAUSES_PER_PAGE = 20 # Clause cards rendered per page, regardless of document size
+RESULTS_MEMORY_BUDGET_MB = 256 # Analyses kept in memory across all sessions; older ones spill to disk
+ENRICHMENT_CLAIM_SECONDS = 120 # A session enriching shared results that stops reporting progress this long loses its claim
+
+# Precedent Matching
+PRECEDENT_EMBEDDER = "hashing" # "hashing" (offline n-grams) or "sentence" (needs sentence-transformers)
+PRECEDENT_DIM = 1024 # Hashed feature buckets
+PRECEDENT_MIN_SCORE = 0.30 # Cosine similarity below which no precedent is reported
+PRECEDENT_RISK_SCORE = 0.40 # Similarity at which a risky precedent raises the clause's risk...
+PRECEDENT_RISK_MARGIN = 0.15 # ...if it also beats the closest standard (Low) precedent by this much
+PRECEDENT_LSH_THRESHOLD = 50000 # Library size above which matching goes through the LSH index
+
+# Near-Duplicate Clauses (AI output is generated once per cluster and reused across documents)
+DEDUP_PERMUTATIONS = 64 # MinHash signature length
+DEDUP_BANDS = 16 # LSH bands (4 rows each); pairs above ~50% similarity become candidates
+DEDUP_THRESHOLD = 0.8 # Estimated Jaccard similarity of masked clause text to count as a duplicate
+DEDUP_CACHE_ENTRIES = 20000 # Clause fingerprints whose AI output is kept for reuse across documents
+
+# Audit Log Settings
+AUDIT_BATCH_SIZE = 512 # Max entries per write
+AUDIT_FLUSH_INTERVAL = 0.25 # Seconds the writer waits for more entries before syncing an idle file
+AUDIT_FSYNC = "batch" # "batch", "interval" or "never"
+AUDIT_FSYNC_INTERVAL = 1.0 # Seconds between fsyncs under the "interval" policy
+AUDIT_MAX_BYTES = 10 * 1024 * 1024 # Rotate the trail at this size...
+AUDIT_ROTATE_SECONDS = 7 * 24 * 3600 # ...or after this long; archives are gzipped
+
 # Risk Levels
 RISK_LOW = "Low"
 RISK_MEDIUM = "Medium"
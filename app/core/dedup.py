@@ -0,0 +1,219 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import DEDUP_PERMUTATIONS, DEDUP_BANDS, DEDUP_THRESHOLD, DEDUP_CACHE_ENTRIES
+from app.core.ner import EntityExtractor
+
+# Words, plus the <money>/<date>/<org>/<num> placeholders left by masking
+TOKEN_PATTERN = re.compile(r"<[a-z]+>|[a-z0-9]+")
+
+# Words that reverse a clause; "t" is what is left of "n't" after tokenizing
+NEGATIONS = frozenset({"not", "no", "never", "neither", "nor", "none", "nothing", "cannot", "without", "t"})
+
+# Universal hashing (a * x + b) mod p over 32-bit shingle hashes; products fit in uint64
+_PRIME = np.uint64((1 << 32) + 15)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalize(text: str) -> List[str]:
+    """Lower-cased tokens of a clause with entities masked."""
+    return TOKEN_PATTERN.findall(EntityExtractor.mask(text).lower())
+
+
+def polarity(text: str) -> int:
+    """
+    Negation words in a clause. One "not" changes only a few shingles of
+    a long clause, so near-duplicates must also agree on this.
+    """
+    return sum(token in NEGATIONS for token in normalize(text))
+
+
+def variant(text: str) -> tuple:
+    """
+    What near-duplicates must also share before one's AI output is used
+    for the other: polarity, and the amounts, dates, party names and
+    numbers that masking hides, since explanations and remedies quote them.
+    """
+    return polarity(text), EntityExtractor.masked_values(text)
+
+
+def shingles(tokens: List[str], size: int = 3) -> List[str]:
+    if len(tokens) <= size:
+        return [" ".join(tokens)] if tokens else []
+    return [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+
+
+class MinHasher:
+    """
+    MinHash signatures over word 3-shingles of the masked clause text. The
+    fraction of equal signature positions estimates Jaccard similarity.
+    """
+
+    def __init__(self, permutations: int = DEDUP_PERMUTATIONS, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 32, size=permutations, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, size=permutations, dtype=np.uint64)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        grams = shingles(normalize(text))
+        if not grams:
+            return None
+        hashes = np.array([zlib.crc32(g.encode()) for g in set(grams)], dtype=np.uint64)
+        permuted = (hashes[:, None] * self.a + self.b) % _PRIME
+        return np.minimum(permuted, _MAX_HASH).min(axis=0).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+class SignatureIndex:
+    """
+    Banded LSH over MinHash signatures: signatures sharing any band are
+    candidates, confirmed by their estimated similarity.
+    """
+
+    def __init__(self, bands: int = DEDUP_BANDS):
+        self.bands = bands
+        self.buckets: Dict[bytes, List[int]] = {}
+
+    def keys(self, signature: np.ndarray) -> List[bytes]:
+        rows = len(signature) // self.bands
+        return [bytes([band]) + signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+
+    def add(self, item: int, signature: np.ndarray):
+        for key in self.keys(signature):
+            self.buckets.setdefault(key, []).append(item)
+
+    def remove(self, item: int, signature: np.ndarray):
+        for key in self.keys(signature):
+            members = self.buckets.get(key)
+            if members is not None:
+                members.remove(item)
+                if not members:
+                    del self.buckets[key]
+
+    def candidates(self, signature: np.ndarray) -> List[int]:
+        seen = {}
+        for key in self.keys(signature):
+            for item in self.buckets.get(key, ()):
+                seen[item] = None
+        return list(seen)
+
+
+minhasher = MinHasher()
+
+
+def cluster(clauses: Sequence, signatures: Optional[List[Optional[np.ndarray]]] = None,
+            threshold: float = DEDUP_THRESHOLD) -> List[List[int]]:
+    """
+    Groups clause positions whose masked text is a near-duplicate
+    (estimated Jaccard >= threshold) of a cluster's first clause and whose
+    risk level and variant() are the same. Comparing against the first
+    clause rather than any member stops chains of small edits from merging
+    unrelated clauses.
+    Clusters and their members are in document order. Pass precomputed
+    signatures to avoid hashing twice.
+    """
+    if signatures is None:
+        signatures = [minhasher.signature(c["text"]) for c in clauses]
+    leaders = SignatureIndex()
+    groups: Dict[int, List[int]] = {}
+    variants: Dict[int, tuple] = {}  # Worked out only for clauses with a near-duplicate candidate
+
+    def variant_of(k: int) -> tuple:
+        if k not in variants:
+            variants[k] = variant(clauses[k]["text"])
+        return variants[k]
+
+    for i, (clause, signature) in enumerate(zip(clauses, signatures)):
+        if signature is not None:
+            best, best_score = None, threshold
+            for j in leaders.candidates(signature):
+                score = similarity(signatures[j], signature)
+                if clauses[j]["risk"] == clause["risk"] and score >= best_score and variant_of(j) == variant_of(i):
+                    best, best_score = j, score
+            if best is not None:
+                groups[best].append(i)
+                continue
+            leaders.add(i, signature)
+        groups[i] = [i]
+    return list(groups.values())
+
+
+class EnrichmentCache:
+    """
+    AI output reused across documents: near-duplicate clauses with the same
+    risk level and variant, enriched with the same provider/model, share
+    explanations and remedies. Holds at most max_entries signatures, least recently used
+    evicted first. Thread-safe.
+    """
+
+    def __init__(self, max_entries: int = DEDUP_CACHE_ENTRIES, threshold: float = DEDUP_THRESHOLD):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # id -> (namespace, signature, outputs)
+        self._index = SignatureIndex()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def namespace(llm_config, clause) -> tuple:
+        return llm_config.provider, llm_config.model, llm_config.mode, clause["risk"], variant(clause["text"])
+
+    def get(self, namespace: tuple, signature: Optional[np.ndarray], field: str) -> Optional[str]:
+        if signature is None:
+            return None
+        with self._lock:
+            best, best_score = None, self.threshold
+            for entry_id in self._index.candidates(signature):
+                entry_ns, entry_sig, outputs = self._entries[entry_id]
+                if entry_ns != namespace or field not in outputs:
+                    continue
+                score = similarity(entry_sig, signature)
+                if score >= best_score:
+                    best, best_score = entry_id, score
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best)
+            return self._entries[best][2][field]
+
+    def put(self, namespace: tuple, signature: Optional[np.ndarray], field: str, output: str):
+        if signature is None or self.max_entries <= 0:
+            return
+        with self._lock:
+            for entry_id in self._index.candidates(signature):
+                entry_ns, entry_sig, outputs = self._entries[entry_id]
+                if entry_ns == namespace and similarity(entry_sig, signature) == 1.0:
+                    outputs[field] = output
+                    self._entries.move_to_end(entry_id)
+                    return
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (namespace, signature, {field: output})
+            self._index.add(entry_id, signature)
+            while len(self._entries) > self.max_entries:
+                old_id, (_, old_sig, _) = self._entries.popitem(last=False)
+                self._index.remove(old_id, old_sig)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._index = SignatureIndex()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+enrichment_cache = EnrichmentCache()
@@ -0,0 +1,329 @@
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Optional, Tuple
+
+CELL_SEPARATOR = " | "  # Between table cells on a row's line
+
+# Run content that stands for text, besides w:t itself
+RUN_TEXT = {"t": None, "tab": " ", "ptab": " ", "br": "\n", "cr": "\n", "noBreakHyphen": "-", "softHyphen": ""}
+# Alternate renderings and moved-away text, never read
+SKIPPED_ELEMENTS = {"Fallback", "moveFrom"}
+# Blocks removed from the tree once read
+BLOCK_ELEMENTS = {"p", "tbl", "footnote", "endnote"}
+
+_REL_OFFICE_DOCUMENT = "/officeDocument"
+_ROMAN = [(1000, "m"), (900, "cm"), (500, "d"), (400, "cd"), (100, "c"), (90, "xc"),
+          (50, "l"), (40, "xl"), (10, "x"), (9, "ix"), (5, "v"), (4, "iv"), (1, "i")]
+
+
+def _local(tag: str) -> str:
+    # Matches both transitional and strict OOXML namespaces
+    return tag.rsplit("}", 1)[-1]
+
+
+def _attr(elem, name: str) -> Optional[str]:
+    for key, value in elem.attrib.items():
+        if _local(key) == name:
+            return value
+    return None
+
+
+def _child(elem, name: str):
+    for child in elem:
+        if _local(child.tag) == name:
+            return child
+    return None
+
+
+def _roman(n: int) -> str:
+    out = []
+    for value, numeral in _ROMAN:
+        while n >= value:
+            out.append(numeral)
+            n -= value
+    return "".join(out)
+
+
+def _letters(n: int) -> str:
+    # Word repeats the letter past z: a..z, aa..zz
+    return chr(ord("a") + (n - 1) % 26) * ((n - 1) // 26 + 1)
+
+
+def format_number(n: int, fmt: str) -> str:
+    if fmt == "lowerLetter":
+        return _letters(n)
+    if fmt == "upperLetter":
+        return _letters(n).upper()
+    if fmt == "lowerRoman":
+        return _roman(n)
+    if fmt == "upperRoman":
+        return _roman(n).upper()
+    if fmt in ("bullet", "none"):
+        return ""
+    return str(n)  # decimal and the zero-padded/ordinal variants
+
+
+class Numbering:
+    """
+    List numbering from numbering.xml, applied paragraph by paragraph in
+    document order so "1.", "1.1", "(a)" labels come out as Word shows
+    them. Paragraphs get numbering directly or through their style.
+    """
+
+    def __init__(self, numbering_root=None, styles_root=None):
+        self.levels: Dict[str, Dict[int, dict]] = {}  # abstractNumId -> ilvl -> {fmt, text, start}
+        self.nums: Dict[str, Tuple[str, Dict[int, int]]] = {}  # numId -> (abstractNumId, start overrides)
+        self.style_numbering: Dict[str, Tuple[Optional[str], Optional[int]]] = {}
+        self.counters: Dict[str, Dict[int, int]] = {}  # list -> ilvl -> current value
+        if numbering_root is not None:
+            self._load_numbering(numbering_root)
+        if styles_root is not None:
+            self._load_styles(styles_root)
+
+    def _load_numbering(self, root):
+        for elem in root:
+            kind = _local(elem.tag)
+            if kind == "abstractNum":
+                levels = {}
+                for lvl in elem:
+                    if _local(lvl.tag) != "lvl":
+                        continue
+                    spec = {"fmt": "decimal", "text": "", "start": 1}
+                    for prop in lvl:
+                        name = _local(prop.tag)
+                        if name == "numFmt":
+                            spec["fmt"] = _attr(prop, "val") or "decimal"
+                        elif name == "lvlText":
+                            spec["text"] = _attr(prop, "val") or ""
+                        elif name == "start":
+                            spec["start"] = int(_attr(prop, "val") or 1)
+                    levels[int(_attr(lvl, "ilvl") or 0)] = spec
+                self.levels[_attr(elem, "abstractNumId")] = levels
+            elif kind == "num":
+                abstract = _child(elem, "abstractNumId")
+                overrides = {}
+                for override in elem:
+                    start = _child(override, "startOverride") if _local(override.tag) == "lvlOverride" else None
+                    if start is not None:
+                        overrides[int(_attr(override, "ilvl") or 0)] = int(_attr(start, "val") or 1)
+                if abstract is not None:
+                    self.nums[_attr(elem, "numId")] = (_attr(abstract, "val"), overrides)
+
+    def _load_styles(self, root):
+        based_on, direct = {}, {}
+        for style in root:
+            if _local(style.tag) != "style" or _attr(style, "type") not in (None, "paragraph"):
+                continue
+            style_id = _attr(style, "styleId")
+            parent = _child(style, "basedOn")
+            if parent is not None:
+                based_on[style_id] = _attr(parent, "val")
+            ppr = _child(style, "pPr")
+            num_pr = _child(ppr, "numPr") if ppr is not None else None
+            if num_pr is not None:
+                num_id, ilvl = _child(num_pr, "numId"), _child(num_pr, "ilvl")
+                direct[style_id] = (_attr(num_id, "val") if num_id is not None else None,
+                                    int(_attr(ilvl, "val")) if ilvl is not None else None)
+        for style_id in set(based_on) | set(direct):
+            seen, current = set(), style_id
+            while current is not None and current not in direct and current not in seen:
+                seen.add(current)
+                current = based_on.get(current)
+            if current in direct:
+                self.style_numbering[style_id] = direct[current]
+
+    def label(self, num_id: Optional[str], ilvl: Optional[int], style: Optional[str]) -> str:
+        """Advances the list counters for one paragraph and returns its label ("" if unnumbered)."""
+        if style in self.style_numbering:
+            style_num, style_lvl = self.style_numbering[style]
+            num_id = num_id if num_id is not None else style_num
+            ilvl = ilvl if ilvl is not None else style_lvl
+        if num_id is None or num_id == "0" or num_id not in self.nums:
+            return ""
+        ilvl = ilvl or 0
+        abstract, overrides = self.nums[num_id]
+        levels = self.levels.get(abstract, {})
+        if ilvl not in levels:
+            return ""
+
+        def start(level):
+            return overrides.get(level, levels.get(level, {}).get("start", 1))
+
+        # Instances of one abstract list continue its numbering unless they restart it
+        counters = self.counters.setdefault(num_id if overrides else abstract, {})
+        counters[ilvl] = counters.get(ilvl, start(ilvl) - 1) + 1
+        for deeper in [level for level in counters if level > ilvl]:
+            del counters[deeper]
+
+        label = levels[ilvl]["text"]
+        if levels[ilvl]["fmt"] in ("bullet", "none"):
+            return ""
+        for level in range(ilvl, -1, -1):
+            value = counters.get(level, start(level))
+            label = label.replace(f"%{level + 1}", format_number(value, levels.get(level, {}).get("fmt", "decimal")))
+        return label.strip()
+
+
+class DocxReader:
+    """
+    Streams text out of a .docx without loading it into a document model.
+
+    Each XML part is read from the zip with iterparse and every paragraph
+    or table is discarded once its text is out, so memory stays bounded by
+    the largest single paragraph or table rather than the file. Emits, in
+    order: headers, the body (paragraphs with their list numbers, table
+    rows as cells joined by CELL_SEPARATOR), footnotes, endnotes, footers.
+    Repeated header and footer lines are emitted once.
+    """
+
+    def __init__(self, file_obj):
+        self.zip = zipfile.ZipFile(file_obj)
+        self.names = set(self.zip.namelist())
+        self.main = self._main_part()
+        self.parts = self._related_parts(self.main)
+        self.numbering = Numbering(self._parse_small("numbering"), self._parse_small("styles"))
+
+    def _main_part(self) -> str:
+        if "_rels/.rels" in self.names:
+            for rel in ET.parse(self.zip.open("_rels/.rels")).getroot():
+                if (_attr(rel, "Type") or "").endswith(_REL_OFFICE_DOCUMENT):
+                    return _attr(rel, "Target").lstrip("/")
+        return "word/document.xml"
+
+    def _related_parts(self, part: str) -> Dict[str, List[str]]:
+        folder, name = posixpath.split(part)
+        rels_name = posixpath.join(folder, "_rels", name + ".rels")
+        related: Dict[str, List[str]] = {}
+        if rels_name not in self.names:
+            return related
+        for rel in ET.parse(self.zip.open(rels_name)).getroot():
+            if _attr(rel, "TargetMode") == "External":
+                continue
+            kind = (_attr(rel, "Type") or "").rsplit("/", 1)[-1]
+            target = posixpath.normpath(posixpath.join(folder, _attr(rel, "Target")))
+            if target in self.names:
+                related.setdefault(kind, []).append(target)
+        for targets in related.values():
+            targets.sort()
+        return related
+
+    def _parse_small(self, kind: str):
+        """numbering.xml and styles.xml are small and needed up front."""
+        for target in self.parts.get(kind, []):
+            return ET.parse(self.zip.open(target)).getroot()
+        return None
+
+    def lines(self) -> Iterator[str]:
+        seen = set()
+        for part in self.parts.get("header", []):
+            for line in self._part_lines(part):
+                if line not in seen:
+                    seen.add(line)
+                    yield line
+        yield from self._part_lines(self.main)
+        for kind in ("footnotes", "endnotes"):
+            for part in self.parts.get(kind, []):
+                yield from self._part_lines(part, notes=True)
+        for part in self.parts.get("footer", []):
+            for line in self._part_lines(part):
+                if line not in seen:
+                    seen.add(line)
+                    yield line
+
+    def _part_lines(self, part: str, notes: bool = False) -> Iterator[str]:
+        """
+        Paragraph and table-row lines of one part, in order. Containers
+        nest: a paragraph inside a table cell adds to the cell, a table
+        inside a cell adds its rows to the cell, and a text-box paragraph
+        inside a paragraph becomes a line of its own.
+        """
+        elements = []  # Open XML elements, for removing finished blocks from their parent
+        containers = []  # Open paragraphs, table cells and rows, innermost last
+        skip = 0  # Depth inside content that is not current text (mc:Fallback repeats mc:Choice)
+        note_id = None
+
+        for event, elem in ET.iterparse(self.zip.open(part), events=("start", "end")):
+            name = _local(elem.tag)
+            if event == "start":
+                elements.append(elem)
+                if name in SKIPPED_ELEMENTS:
+                    skip += 1
+                elif skip:
+                    continue
+                elif name == "p":
+                    containers.append({"kind": "p", "parts": [], "num": (None, None), "style": None})
+                elif name in ("tc", "tr"):
+                    containers.append({"kind": name, "parts": []})
+                elif name in ("footnote", "endnote"):
+                    # Separator notes carry a type; real notes don't
+                    note_id = None if _attr(elem, "type") else _attr(elem, "id")
+                continue
+
+            elements.pop()
+            if name in SKIPPED_ELEMENTS:
+                skip -= 1
+                continue
+            if skip:
+                continue
+
+            line = None
+            current = containers[-1] if containers else None
+            paragraph = current if current is not None and current["kind"] == "p" else None
+            if paragraph is not None and name in RUN_TEXT:
+                paragraph["parts"].append((elem.text or "") if name == "t" else RUN_TEXT[name])
+            elif paragraph is not None and name in ("footnoteReference", "endnoteReference"):
+                paragraph["parts"].append(f"[{_attr(elem, 'id')}]")
+            elif paragraph is not None and name == "numPr":
+                num_id, ilvl = _child(elem, "numId"), _child(elem, "ilvl")
+                paragraph["num"] = (_attr(num_id, "val") if num_id is not None else None,
+                                    int(_attr(ilvl, "val")) if ilvl is not None else None)
+            elif paragraph is not None and name == "pStyle":
+                paragraph["style"] = _attr(elem, "val")
+            elif paragraph is not None and name == "p":
+                containers.pop()
+                text = "\n".join(" ".join(piece.split()) for piece in "".join(paragraph["parts"]).split("\n"))
+                text = text.strip()
+                if not notes:
+                    label = self.numbering.label(*paragraph["num"], paragraph["style"])
+                    if label and text:
+                        text = f"{label} {text}"
+                elif note_id is not None and text:
+                    text, note_id = f"[{note_id}] {text}", None
+                if text:
+                    if containers and containers[-1]["kind"] == "tc":
+                        containers[-1]["parts"].append(text.replace("\n", " "))
+                    else:
+                        line = text
+            elif current is not None and name == "tc" and current["kind"] == "tc":
+                containers.pop()
+                if containers and containers[-1]["kind"] == "tr":
+                    containers[-1]["parts"].append(" ".join(current["parts"]))
+            elif current is not None and name == "tr" and current["kind"] == "tr":
+                containers.pop()
+                if any(current["parts"]):
+                    if containers and containers[-1]["kind"] == "tc":
+                        # Nested table: its rows stay inside the outer cell
+                        containers[-1]["parts"].append(", ".join(cell for cell in current["parts"] if cell) + ";")
+                    else:
+                        line = CELL_SEPARATOR.join(current["parts"])
+
+            if name in BLOCK_ELEMENTS and not containers and elements:
+                # Finished top-level block: drop it so the tree never grows with the document
+                elements[-1].remove(elem)
+            if line is not None:
+                yield line
+
+    def text(self) -> str:
+        return "\n".join(self.lines())
+
+    def close(self):
+        self.zip.close()
+
+
+def read_docx(file_obj) -> str:
+    reader = DocxReader(file_obj)
+    try:
+        return reader.text()
+    finally:
+        reader.close()
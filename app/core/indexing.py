@@ -0,0 +1,85 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+SECTION_PATTERN = re.compile(r"^(?:(\d+)|(Article\s+[IVX]+)|(Section\s+\d+))", re.IGNORECASE)
+
+
+class ClauseIndex:
+    """
+    Precomputed lookups over an analysis' clauses, stored with the results
+    so the dashboard can filter and paginate without rescanning every clause
+    on each rerun. All lists hold clause positions in ascending order.
+    """
+
+    @staticmethod
+    def section_of(clause_id: str, current: str) -> str:
+        """
+        Top-level section a clause belongs to: "4.2" -> "4", "Article II"
+        -> "Article II". Lettered sub-clauses inherit the current section.
+        """
+        match = SECTION_PATTERN.match(clause_id)
+        if not match:
+            return current
+        return next(g for g in match.groups() if g)
+
+    @staticmethod
+    def build(clauses: List[dict]) -> Dict[str, object]:
+        by_risk: Dict[str, List[int]] = {"High": [], "Medium": [], "Low": []}
+        by_type: Dict[str, List[int]] = {}
+        by_section: Dict[str, List[int]] = {}
+        walkthrough: List[int] = []  # Clauses worth showing by default
+
+        section = "Intro"
+        for i, clause in enumerate(clauses):
+            by_risk.setdefault(clause["risk"], []).append(i)
+            by_type.setdefault(clause["type"], []).append(i)
+            section = ClauseIndex.section_of(clause["id"], section)
+            by_section.setdefault(section, []).append(i)
+            if clause["type"] != "Definition/Neutral" or clause["risk"] != "Low":
+                walkthrough.append(i)
+
+        return {
+            "by_risk": by_risk,
+            "by_type": by_type,
+            "by_section": by_section,
+            "walkthrough": walkthrough,
+        }
+
+    @staticmethod
+    def ensure(results: dict) -> Dict[str, object]:
+        """Returns results["index"], building it for results saved without one."""
+        if "index" not in results:
+            results["index"] = ClauseIndex.build(results["clauses"])
+        return results["index"]
+
+    @staticmethod
+    def _union(index_map: Dict[str, List[int]], keys: Iterable[str]) -> set:
+        positions = set()
+        for key in keys:
+            positions.update(index_map.get(key, []))
+        return positions
+
+    @staticmethod
+    def select(index: dict, risks: Optional[Iterable[str]] = None, types: Optional[Iterable[str]] = None,
+               sections: Optional[Iterable[str]] = None, base: Optional[List[int]] = None) -> List[int]:
+        """
+        Clause positions matching every given filter (None/empty = no filter),
+        optionally restricted to a base list such as index["walkthrough"].
+        """
+        selected = None
+        for index_map, keys in ((index["by_risk"], risks), (index["by_type"], types), (index["by_section"], sections)):
+            if not keys:
+                continue
+            positions = ClauseIndex._union(index_map, keys)
+            selected = positions if selected is None else selected & positions
+        if selected is None:
+            return list(base) if base is not None else list(range(sum(len(v) for v in index["by_risk"].values())))
+        if base is not None:
+            selected &= set(base)
+        return sorted(selected)
+
+    @staticmethod
+    def page(positions: List[int], page: int, page_size: int) -> List[int]:
+        """1-based page slice."""
+        start = (max(page, 1) - 1) * page_size
+        return positions[start:start + page_size]
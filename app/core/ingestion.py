@@ -1,119 +1,306 @@
 import pdfplumber
-import docx
-import io
 import logging
-from typing import Optional, Dict
+import re
+from collections import Counter
+from typing import Optional, Dict, List, Tuple
 
-# Try importing OCR libraries gracefully
+from app.core.config import PDF_ENGINE, PDF_QUALITY_THRESHOLD, PDF_RULED_LINES, OCR_MIN_CHARS, FITZ_STORE_PAGES
+from app.core.docx_reader import read_docx
+from app.core.uploads import Upload, spooled, decode_text
+
+# PyMuPDF is the fast text-layer engine and also renders pages for OCR
 try:
     import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+    print("PyMuPDF missing; PDFs will be read with pdfplumber. Install 'pymupdf' for faster extraction.")
+
+# Try importing OCR libraries gracefully; OCR needs PyMuPDF too, to render the pages
+try:
     from rapidocr_onnxruntime import RapidOCR
-    OCR_AVAILABLE = True
+    OCR_AVAILABLE = PYMUPDF_AVAILABLE
+    if not OCR_AVAILABLE:
+        print("OCR disabled: 'rapidocr_onnxruntime' needs 'pymupdf' to render scanned pages.")
 except ImportError:
     OCR_AVAILABLE = False
-    print("OCR dependencies missing. Install 'pymupdf' and 'rapidocr_onnxruntime'.")
+    print("OCR engine missing; scanned pages without a text layer cannot be read. Install 'rapidocr_onnxruntime'.")
+
+# Characters that signal a broken text layer: replacement char, private-use glyphs, control codes
+GARBLED_PATTERN = re.compile("[\ufffd\ue000-\uf8ff\x00-\x08\x0b\x0c\x0e-\x1f]|\\(cid:\\d+\\)")
+
+
+def page_quality(text: str) -> Tuple[float, str]:
+    """
+    Cheap score in [0, 1] for an extracted page, and the main problem
+    found. Penalises garbled characters, words run together (missing
+    spaces), letters spaced apart ("T e r m i n a t i o n") and lines
+    broken into one or two words, which split clauses apart when parsed.
+    """
+    stripped = text.strip()
+    if not stripped:
+        return 0.0, "empty"
+    garbled = sum(len(m.group(0)) for m in GARBLED_PATTERN.finditer(stripped)) / len(stripped)
+
+    words = stripped.split()
+    alpha = [w for w in words if w.isalpha()]
+    run_together = sum(len(w) for w in words if len(w) > 30 and w.isalpha()) / len(stripped)
+    spaced = 0.0
+    if len(alpha) >= 20:
+        # Ordinary text has well under a fifth single-letter words
+        spaced = max(0.0, sum(1 for w in alpha if len(w) == 1) / len(alpha) - 0.2)
+
+    fragmented = 0.0
+    lines = [line for line in stripped.splitlines() if line.strip()]
+    if len(lines) >= 10:
+        # Headings and list labels aside, contract lines hold several words
+        fragmented = max(0.0, sum(1 for line in lines if len(line.split()) <= 2) / len(lines) - 0.3)
+
+    penalties = {"garbled characters": garbled, "missing spaces": run_together, "spaced-out letters": spaced,
+                 "fragmented lines": fragmented}
+    reason, worst = max(penalties.items(), key=lambda item: item[1])
+    return max(0.0, 1.0 - sum(penalties.values())), (reason if worst > 0 else "ok")
+
+
+class PdfEngine:
+    """
+    One way of reading text from PDF pages. Opened once per document,
+    from the spooled file when there is one; pages are read on demand.
+    """
+    name = "base"
+
+    def __init__(self, upload: Upload):
+        self.upload = upload
+
+    def page_count(self) -> int:
+        raise NotImplementedError
+
+    def page_text(self, index: int) -> str:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PyMuPDFEngine(PdfEngine):
+    """Text layer via PyMuPDF text blocks in reading order. Fast."""
+    name = "pymupdf"
+
+    def __init__(self, upload: Upload):
+        super().__init__(upload)
+        self.doc = _open_fitz(upload)
+
+    def page_count(self):
+        return len(self.doc)
+
+    def page_text(self, index):
+        _trim_fitz_store(index)
+        blocks = self.doc[index].get_text("blocks", sort=True)
+        # (x0, y0, x1, y1, text, block_no, block_type); type 0 is text
+        return "\n".join(b[4].strip() for b in blocks if b[6] == 0 and b[4].strip())
+
+    def is_layout_sensitive(self, index) -> bool:
+        """Ruled tables: blocks split their cells, pdfplumber keeps each row on one line."""
+        try:
+            drawings = self.doc[index].get_drawings()
+        except Exception:
+            return False
+        segments = sum(1 for path in drawings for item in path["items"] if item[0] in ("l", "re"))
+        return segments >= PDF_RULED_LINES
+
+    def has_images(self, index) -> bool:
+        return bool(self.doc[index].get_images())
+
+    def close(self):
+        self.doc.close()
+
+
+class PdfPlumberEngine(PdfEngine):
+    """Text layer via pdfplumber's character layout. Slower, keeps table rows together."""
+    name = "pdfplumber"
+
+    def __init__(self, upload: Upload):
+        super().__init__(upload)
+        # pdfminer reads the file lazily; a path keeps the whole PDF out of memory
+        self.pdf = pdfplumber.open(upload.path or upload.stream())
+
+    def page_count(self):
+        return len(self.pdf.pages)
+
+    def page_text(self, index):
+        page = self.pdf.pages[index]
+        # extract_text(x_tolerance=1) helps keep words together
+        text = page.extract_text(x_tolerance=1) or ""
+        page.close()  # Drop cached layout objects; long documents otherwise hold every page
+        return text
+
+    def close(self):
+        self.pdf.close()
+
+
+class OCREngine(PdfEngine):
+    """Renders pages with PyMuPDF and reads them with RapidOCR. For scans."""
+    name = "ocr"
+    _reader = None
+
+    def __init__(self, upload: Upload):
+        super().__init__(upload)
+        self.doc = _open_fitz(upload)
+        if OCREngine._reader is None:
+            # Use det_use_cuda=False just in case, straightforward inference
+            OCREngine._reader = RapidOCR()
+
+    def page_count(self):
+        return len(self.doc)
+
+    def page_text(self, index):
+        _trim_fitz_store(index)
+        # Render page to image (zoom=2 for better quality)
+        pix = self.doc[index].get_pixmap(matrix=fitz.Matrix(2, 2))
+        # result is a list of [coords, text, score]
+        result, _ = OCREngine._reader(pix.tobytes("png"))
+        return "\n".join(line[1] for line in result) if result else ""
+
+    def close(self):
+        self.doc.close()
+
+
+def _open_fitz(upload: Upload):
+    # From a path PyMuPDF loads objects as pages need them, instead of holding its own copy of the file
+    if upload.path:
+        return fitz.open(upload.path, filetype="pdf")
+    return fitz.open(stream=upload.view(), filetype="pdf")
+
+
+def _trim_fitz_store(index: int):
+    # MuPDF caches each page's images and fonts up to a large global limit; on scans that is the whole file
+    if index and index % FITZ_STORE_PAGES == 0:
+        fitz.TOOLS.store_shrink(100)
+
+
+PDF_ENGINES = {"pymupdf": PyMuPDFEngine, "pdfplumber": PdfPlumberEngine, "ocr": OCREngine}
+
+
+def available_pdf_engines() -> List[str]:
+    available = {"pymupdf": PYMUPDF_AVAILABLE, "pdfplumber": True, "ocr": OCR_AVAILABLE}
+    return [name for name in PDF_ENGINES if available[name]]
+
 
 class DocumentIngestor:
     """
     Handles extracting raw text options from uploaded files.
-    Includes OCR fallback for scanned PDFs.
+    DOCX files are streamed (see DocxReader); PDFs are read page by page with the fastest engine whose output passes
+    a quality check, falling back to pdfplumber and then OCR for scans.
     """
-    
+
     @staticmethod
     def extract(file_obj, file_type: str) -> str:
         """
         Main entry point for extraction.
         """
-        if file_type == "pdf":
-            return DocumentIngestor._extract_pdf(file_obj)
-        elif file_type == "docx":
-            return DocumentIngestor._extract_docx(file_obj)
-        elif file_type == "txt":
-            return DocumentIngestor._extract_txt(file_obj)
-        else:
+        return DocumentIngestor.extract_with_report(file_obj, file_type)[0]
+
+    @staticmethod
+    def extract_with_report(file_obj, file_type: str, pdf_engine: str = PDF_ENGINE) -> Tuple[str, Optional[Dict]]:
+        """
+        Returns (text, report). For PDFs the report gives the page count,
+        pages per engine and each fallback taken; other formats have none.
+        pdf_engine is "auto" or the name of one engine to use for every page.
+        file_obj may be an upload, a path or an already spooled Upload.
+        """
+        if file_type not in ("pdf", "docx", "txt"):
             raise ValueError(f"Unsupported file type: {file_type}")
+        with spooled(file_obj) as upload:
+            if file_type == "pdf":
+                return DocumentIngestor._extract_pdf(upload, pdf_engine)
+            elif file_type == "docx":
+                return DocumentIngestor._extract_docx(upload), None
+            return DocumentIngestor._extract_txt(upload), None
 
     @staticmethod
-    def _extract_pdf(file_obj) -> str:
-        text_content = []
+    def _extract_pdf(upload: Upload, pdf_engine: str = PDF_ENGINE) -> Tuple[str, Dict]:
+        engines: Dict[str, PdfEngine] = {}
+
+        def engine(name) -> PdfEngine:
+            if name not in engines:
+                engines[name] = PDF_ENGINES[name](upload)
+            return engines[name]
+
         try:
-            with pdfplumber.open(file_obj) as pdf:
-                for page in pdf.pages:
-                    # extract_text(x_tolerance=1) helps keep words together
-                    page_text = page.extract_text(x_tolerance=1) 
-                    if page_text:
-                        text_content.append(page_text)
-            
-            full_text = "\n".join(text_content)
-            
-            # Heuristic: If text is extremely short relative to page count (scanned doc), try OCR
-            # < 50 chars per page average?
-            is_sparse = len(full_text.strip()) < 100
-            
-            if is_sparse and OCR_AVAILABLE:
-                print("Text sparse, attempting OCR...")
-                ocr_text = DocumentIngestor._extract_scanned_pdf(file_obj)
-                if len(ocr_text) > len(full_text):
-                    return ocr_text
-            
-            return full_text
-            
+            if pdf_engine != "auto":
+                if pdf_engine not in available_pdf_engines():
+                    raise RuntimeError(f"PDF engine '{pdf_engine}' is not available")
+                fixed = engine(pdf_engine)
+                pages = [fixed.page_text(i) for i in range(fixed.page_count())]
+                report = {"pages": len(pages), "engines": {pdf_engine: len(pages)}, "fallbacks": []}
+            else:
+                pages, report = DocumentIngestor._extract_pdf_pages(engine)
+            return "\n".join(text for text in pages if text), report
         except Exception as e:
-            # Fallback to OCR if pdfplumber fails entirely
-            if OCR_AVAILABLE:
+            # Fallback to OCR if the text-layer engines fail entirely
+            if OCR_AVAILABLE and pdf_engine != "ocr":
                 try:
-                    return DocumentIngestor._extract_scanned_pdf(file_obj)
+                    ocr = engine("ocr")
+                    pages = [ocr.page_text(i) for i in range(ocr.page_count())]
+                    return "\n".join(pages), {"pages": len(pages), "engines": {"ocr": len(pages)},
+                                              "fallbacks": [(None, "text layer", "ocr", str(e))]}
                 except Exception as ocr_e:
                     raise RuntimeError(f"Error reading PDF (OCR failed too): {str(e)} | {str(ocr_e)}")
             raise RuntimeError(f"Error reading PDF: {str(e)}")
+        finally:
+            for opened in engines.values():
+                opened.close()
 
     @staticmethod
-    def _extract_scanned_pdf(file_obj) -> str:
+    def _extract_pdf_pages(engine) -> Tuple[List[str], Dict]:
         """
-        Extracts text from scanned PDFs using RapidOCR and PyMuPDF.
+        Per page: PyMuPDF first; pdfplumber, the previous default, when the
+        page has ruled tables or PyMuPDF's text fails the quality check, so
+        suspect pages read no worse than before; OCR when the page is an
+        image with (almost) no text layer or the text layer is garbled and
+        OCR scores better.
         """
-        extracted_text = []
-        try:
-            # Initialize OCR Engine
-            # Use det_use_cuda=False just in case, straightforward inference
-            engine = RapidOCR()
-            
-            # Reset file pointer to read bytes
-            file_obj.seek(0)
-            file_bytes = file_obj.read()
-            
-            # Open with PyMuPDF
-            doc = fitz.open(stream=file_bytes, filetype="pdf")
-            
-            for page in doc:
-                # Render page to image (zoom=2 for better quality)
-                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                img_bytes = pix.tobytes("png")
-                
-                # Run OCR
-                # result is a list of [coords, text, score]
-                result, _ = engine(img_bytes)
-                
-                if result:
-                    page_text = "\n".join([line[1] for line in result])
-                    extracted_text.append(page_text)
-            
-            return "\n".join(extracted_text)
-            
-        except Exception as e:
-            raise RuntimeError(f"OCR Extraction Failed: {str(e)}")
+        primary = engine("pymupdf") if PYMUPDF_AVAILABLE else engine("pdfplumber")
+        used, fallbacks, pages = Counter(), [], []
+        for i in range(primary.page_count()):
+            text = primary.page_text(i)
+            score, reason = page_quality(text)
+            best = (score, primary.name, text)
+
+            if primary.name == "pymupdf":
+                layout = primary.is_layout_sensitive(i)
+                if layout or score < PDF_QUALITY_THRESHOLD:
+                    alt = engine("pdfplumber").page_text(i)
+                    # Unless pdfplumber finds no text at all where PyMuPDF did
+                    if alt.strip() or not text.strip():
+                        best = (page_quality(alt)[0], "pdfplumber", alt)
+                        fallbacks.append((i + 1, "pymupdf", "pdfplumber", "ruled table" if layout else reason))
+
+            sparse = len(best[2].strip()) < OCR_MIN_CHARS
+            if OCR_AVAILABLE and (best[0] < PDF_QUALITY_THRESHOLD or sparse) and \
+                    (not sparse or engine("pymupdf").has_images(i)):
+                ocr_text = engine("ocr").page_text(i)
+                ocr_score, _ = page_quality(ocr_text)
+                if ocr_score > best[0] or (sparse and len(ocr_text.strip()) > len(best[2].strip())):
+                    fallbacks.append((i + 1, best[1], "ocr", "no text layer" if sparse else page_quality(best[2])[1]))
+                    best = (ocr_score, "ocr", ocr_text)
+
+            used[best[1]] += 1
+            pages.append(best[2])
+        return pages, {"pages": len(pages), "engines": dict(used), "fallbacks": fallbacks}
 
     @staticmethod
-    def _extract_docx(file_obj) -> str:
+    def _extract_docx(upload: Upload) -> str:
+        # Streamed from the zip: body with list numbers, tables, headers, footers and notes
         try:
-            doc = docx.Document(file_obj)
-            return "\n".join([para.text for para in doc.paragraphs])
+            return read_docx(upload.path or upload.stream())
         except Exception as e:
             raise RuntimeError(f"Error reading DOCX: {str(e)}")
 
     @staticmethod
-    def _extract_txt(file_obj) -> str:
+    def _extract_txt(upload: Upload) -> str:
+        # Decoded chunk by chunk; non-UTF-8 files get their encoding detected
         try:
-            return file_obj.getvalue().decode("utf-8")
+            return decode_text(upload)
         except Exception as e:
             raise RuntimeError(f"Error reading TXT: {str(e)}")
@@ -1,18 +1,68 @@
 import os
-import ollama
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from app.core.config import AI_DEADLINE_SECONDS, AI_TOKEN_BUDGET, DEFAULT_CONTEXT_TOKENS, CONTEXT_MARGIN, \
+    OLLAMA_KEEP_ALIVE, OLLAMA_WARMUP, REASONING_OUTPUT_FACTOR
+from app.core.providers import ClientPool, LLMProvider, GeminiProvider, OllamaProvider, StubProvider, \
+    keep_alive_seconds
+from app.core.routing import LLMRouter, LLMUnavailableError
+from app.core.tokens import token_estimator, usage_ledger, compact, EXPECTED_OUTPUT_TOKENS, MAX_OUTPUT_TOKENS
+
 load_dotenv()
 
+
+@dataclass(frozen=True)
+class LLMConfig:
+    """
+    Immutable per-request LLM settings.
+    Built once per session and passed down the pipeline, so one user's
+    provider/model choice never leaks into another user's analysis.
+    """
+    provider: Optional[str] = None  # 'gemini', 'ollama', 'stub' or None (offline)
+    model: Optional[str] = None
+    mode: str = "standard"  # 'standard' or 'reasoning'
+    summary_tokens: Optional[int] = 8000  # Most contract tokens per document summary (the model's window may allow fewer)
+    chat_tokens: Optional[int] = 8000  # Most contract tokens in the Q&A context (likewise)
+    concurrency: int = 4  # Parallel LLM calls per analysis
+    hedge: bool = True  # Allow hedged/fail-over calls to other backends
+    deadline_s: Optional[float] = AI_DEADLINE_SECONDS  # Enrichment wall-clock limit (None = unbounded)
+    token_budget: Optional[int] = AI_TOKEN_BUDGET  # Enrichment token limit (None = unbounded)
+
+    @property
+    def is_offline(self) -> bool:
+        return self.provider is None
+
+
 class LLMService:
+    """
+    Discovers the available LLM backends once per process and serves
+    requests for any LLMConfig. Holds no per-user state.
+    """
+
     def __init__(self):
+        self.clients = ClientPool()
+        self.providers: Dict[str, LLMProvider] = {}
+        self.default_models: Dict[str, str] = {}
+        self._context_windows: Dict[tuple, int] = {}
+        self._windows_lock = threading.Lock()
+        self._warmed: Dict[tuple, float] = {}  # (model, keep_alive) -> when its warm-up started
+        self._warm_lock = threading.Lock()
+        self.router = LLMRouter(self.providers)
+        # Backends that may serve hedged/fail-over requests for one another
+        self.hedge_targets = ["gemini", "ollama"]
         self.local_model = "mistral" 
         self.reasoning_model = "deepseek-r1" # Default thinking model
+        # Process-wide defaults; sessions override them via LLMConfig
         self.active_model = None
         self.is_offline = False
         self.provider = "ollama" # 'ollama' or 'gemini'
-        self.gemini_model = None
         self.available_models = []
 
         # 1. Check for Google Gemini
@@ -60,7 +110,7 @@ class LLMService:
                     chosen_model = 'gemini-1.5-flash' # Hard fallback
 
                 print(f"LLM Service: Gemini Available - {chosen_model}")
-                self.gemini_model = genai.GenerativeModel(chosen_model)
+                self.register_provider(GeminiProvider(self.clients, self.router.timeout_for("gemini")), chosen_model)
                 self.gemini_model_name = chosen_model
                 self.gemini_available = True
             except Exception as e:
@@ -84,31 +134,9 @@ class LLMService:
             if ollama_base_url:
                 print(f"LLM Service: Using remote Ollama from .env: {ollama_base_url}")
         
-        if ollama_base_url:
-            self.ollama_client = ollama.Client(host=ollama_base_url)
-        else:
-            self.ollama_client = ollama
-        
+        ollama_provider = OllamaProvider(self.clients, ollama_base_url, self.router.timeout_for("ollama"))
         try:
-            models_response = self.ollama_client.list()
-            
-            # Handle response structure (dict vs object)
-            if hasattr(models_response, 'models'):
-                # Newer ollama library returns an object with .models
-                model_list = models_response.models
-            else:
-                # Older library or raw dict
-                model_list = models_response.get('models', [])
-
-            # Extract model names safely
-            self.available_models = []
-            for m in model_list:
-                if hasattr(m, 'model'):
-                    self.available_models.append(m.model)
-                elif hasattr(m, 'name'):
-                    self.available_models.append(m.name)
-                elif isinstance(m, dict):
-                    self.available_models.append(m.get('model') or m.get('name'))
+            self.available_models = ollama_provider.list_models()
             
             if self.available_models:
                 # Set defaults based on what's available
@@ -118,14 +146,26 @@ class LLMService:
                 # 2. Standard
                 self.local_model = next((m for m in self.available_models if 'mistral' in m or 'llama3' in m or 'llama' in m), self.available_models[0])
                 
+                self.register_provider(ollama_provider, self.local_model)
                 print(f"LLM Service: Ollama Available - {len(self.available_models)} models")
             else:
                 print("LLM Service: No Ollama models found.")
         except Exception as e:
             print(f"Ollama Error: {e}")
         
-        # 3. Set default provider based on what's available
-        if self.gemini_available:
+        # 3. Deterministic stub backend for tests/benchmarks (LLM_STUB="latency_ms=50,...")
+        stub_spec = os.getenv("LLM_STUB")
+        if stub_spec is not None:
+            self.register_provider(StubProvider.from_spec(stub_spec), "stub")
+            print("LLM Service: Stub provider registered")
+        
+        # 4. Set default provider based on what's available
+        if stub_spec is not None:
+            self.provider = "stub"
+            self.active_model = "stub"
+            self.is_offline = False
+            print("LLM Service: Using Stub by default")
+        elif self.gemini_available:
             self.provider = "gemini"
             self.active_model = self.gemini_model_name
             self.is_offline = False
@@ -141,71 +181,217 @@ class LLMService:
             self.is_offline = True
             print("LLM Service: No LLM available.")
 
-    def switch_provider(self, provider="gemini"):
-        """Switch between gemini and ollama providers"""
+    def register_provider(self, provider: LLMProvider, default_model: Optional[str] = None):
+        """
+        Adds (or replaces) a backend under provider.name.
+        """
+        self.providers[provider.name] = provider
+        if default_model:
+            self.default_models[provider.name] = default_model
+
+    def make_config(self, provider=None, mode="standard") -> LLMConfig:
+        """
+        Builds an immutable LLMConfig for a provider ('gemini', 'ollama', 'stub')
+        and mode ('standard' or 'reasoning'). Falls back to the process
+        default provider when none is given, and to an offline config when
+        the requested provider is unavailable.
+        """
+        provider = provider or self.provider
         if provider == "gemini" and self.gemini_available:
-            self.provider = "gemini"
-            self.active_model = self.gemini_model_name
-            self.is_offline = False
-        elif provider == "ollama" and hasattr(self, 'available_models') and self.available_models:
-            self.provider = "ollama"
-            self.active_model = self.local_model
-            self.is_offline = False
-        else:
-            print(f"Cannot switch to {provider} - not available")
-    
-    def set_mode(self, mode="standard"):
-        """Switches between Standard and Reasoning models (Ollama only)"""
-        if self.provider == "gemini":
-            return # Gemini handles everything for now
-            
-        if mode == "reasoning":
-            self.active_model = self.reasoning_model
-        else:
-            self.active_model = self.local_model
+            return LLMConfig(
+                provider="gemini",
+                model=self.gemini_model_name,
+                mode="standard", # Gemini handles everything for now
+            )
+        if provider == "ollama" and self.available_models:
+            model = self.reasoning_model if mode == "reasoning" else self.local_model
+            return LLMConfig(provider="ollama", model=model, mode=mode)
+        if provider in self.providers and provider not in ("gemini", "ollama"):
+            return LLMConfig(provider=provider, model=self.default_models.get(provider, provider), mode=mode)
+        return LLMConfig(provider=None, model="No LLM Available")
 
-    def _call_llm(self, prompt):
-        """Unified method to call the active LLM provider."""
-        if self.is_offline:
-            raise Exception("AI is offline.")
+    def default_config(self) -> LLMConfig:
+        return self.make_config(self.provider)
 
-        if self.provider == "gemini":
-            try:
-                response = self.gemini_model.generate_content(prompt)
-                return response.text
-            except Exception as e:
-                return f"Gemini Error: {str(e)}"
+    def candidates(self, config: LLMConfig, prompt: Optional[str] = None, stage: Optional[str] = None):
+        """
+        Primary (provider, model) from the config, then hedge/fail-over
+        targets. Given the prompt, targets whose context window cannot hold
+        it (plus the stage's expected reply) are left out.
+        """
+        candidates = [(config.provider, config.model)]
+        if config.hedge and config.provider in self.hedge_targets:
+            for name in self.hedge_targets:
+                if name != config.provider and name in self.providers:
+                    model = self.default_models.get(name, name)
+                    if prompt is not None:
+                        needed = token_estimator.count(prompt, name, model) + EXPECTED_OUTPUT_TOKENS.get(stage, 300)
+                        if needed > self.context_window(name, model):
+                            continue
+                    candidates.append((name, model))
+        return candidates
+
+    def context_window(self, provider: str, model: str) -> int:
+        """
+        Input tokens the model accepts, read from its metadata once per
+        process, or the provider's default when that lookup fails.
+        """
+        key = (provider, model)
+        with self._windows_lock:
+            if key in self._context_windows:
+                return self._context_windows[key]
+        window = None
+        try:
+            window = self.providers[provider].context_window(model)
+        except Exception as e:
+            print(f"LLM Service: no context window for {provider}/{model} ({e})")
+        window = window or DEFAULT_CONTEXT_TOKENS.get(provider, 8192)
+        with self._windows_lock:
+            self._context_windows[key] = window
+        return window
+
+    def prompt_budget(self, config: LLMConfig, stage: str, template: str = "", cap: Optional[int] = None) -> int:
+        """
+        Tokens left for variable text (contract, clause) in a prompt for this
+        stage: the config model's window less a safety margin, the template
+        and the expected reply (Ollama: the reply limit), capped at cap.
+        """
+        if config.provider in self.providers:
+            window = self.context_window(config.provider, config.model)
         else:
-            # Ollama
-            try:
-                response = self.ollama_client.chat(model=self.active_model, messages=[
-                    {'role': 'user', 'content': prompt},
-                ])
-                return response['message']['content']
-            except Exception as e:
-                return f"Ollama Error: {str(e)}"
+            window = DEFAULT_CONTEXT_TOKENS.get(config.provider, 8192)
+        reply = EXPECTED_OUTPUT_TOKENS.get(stage, 300)
+        if config.provider == "ollama":
+            # Ollama's num_ctx holds prompt and reply alike: reserve num_predict, up to half the window
+            reply = min(self.output_limit(stage, config.mode == "reasoning") or reply, window // 2)
+        budget = int(window * (1 - CONTEXT_MARGIN)) - token_estimator.count(template, config.provider, config.model) \
+            - reply
+        if cap is not None:
+            budget = min(budget, cap)
+        return max(budget, 256)
+
+    def fit(self, text: str, config: LLMConfig, stage: str, template: str = "", cap: Optional[int] = None,
+            clauses: Optional[Sequence[dict]] = None):
+        """Compacts text to the stage's prompt budget; returns (text, stats)."""
+        budget = self.prompt_budget(config, stage, template, cap)
+        return compact(text, budget, token_estimator, config.provider, config.model, clauses=clauses)
+
+    @staticmethod
+    def output_limit(stage: Optional[str], reasoning: bool = False) -> Optional[int]:
+        """
+        Reply token limit (Ollama num_predict) for a stage, or None when the
+        stage has none. Reasoning models think before they answer, so they
+        get REASONING_OUTPUT_FACTOR times more.
+        """
+        if stage not in MAX_OUTPUT_TOKENS:
+            return None
+        return MAX_OUTPUT_TOKENS[stage] * (REASONING_OUTPUT_FACTOR if reasoning else 1)
+
+    def request_options(self, config: LLMConfig, candidates, stage: Optional[str] = None,
+                        keep_alive=OLLAMA_KEEP_ALIVE) -> Dict[str, dict]:
+        """
+        Per-backend chat() options for these candidates. Ollama requests
+        carry keep_alive, the model's num_ctx and the stage's num_predict.
+        num_ctx stays the same for every request to a model, since a
+        request with another num_ctx makes Ollama reload the model.
+        """
+        options = {}
+        for name, model in candidates:
+            if name == "ollama":
+                reasoning = config.mode == "reasoning" and model == config.model
+                model_options = {"num_ctx": self.context_window(name, model)}
+                if self.output_limit(stage, reasoning):
+                    model_options["num_predict"] = self.output_limit(stage, reasoning)
+                options[name] = {"keep_alive": keep_alive, "options": model_options}
+        return options
 
-    def explain_clause(self, text, context="business"):
+    def warm_up(self, config: LLMConfig, keep_alive=OLLAMA_KEEP_ALIVE) -> Optional[threading.Thread]:
+        """
+        Loads the config's Ollama model in a background thread when the
+        provider or mode is chosen, so the first analysis does not wait for
+        it, and pins it for keep_alive. Skipped while an earlier warm-up
+        should still hold (Streamlit calls this on every rerun). Returns the
+        thread, or None when there was nothing to do.
+        """
+        if not OLLAMA_WARMUP or config.provider != "ollama" or "ollama" not in self.providers:
+            return None
+        key = (config.model, keep_alive)
+        ttl = keep_alive_seconds(keep_alive)
+        with self._warm_lock:
+            started = self._warmed.get(key)
+            if started is not None and (ttl is None or time.monotonic() - started < ttl / 2):
+                return None
+            self._warmed[key] = time.monotonic()
+        thread = threading.Thread(target=self._warm, args=(config.model, keep_alive), name="ollama-warm-up",
+                                  daemon=True)
+        thread.start()
+        return thread
+
+    def _warm(self, model: str, keep_alive):
+        start = time.monotonic()
+        timings, ok = None, False
+        try:
+            timings = self.providers["ollama"].warm(model, keep_alive=keep_alive,
+                                                    options={"num_ctx": self.context_window("ollama", model)})
+            ok = True
+            print(f"LLM Service: {model} warmed up in {time.monotonic() - start:.1f}s")
+        except Exception as e:
+            print(f"LLM Service: warm-up of {model} failed ({e})")
+            with self._warm_lock:
+                self._warmed.pop((model, keep_alive), None)
+        finally:
+            usage_ledger.record(provider="ollama", model=model, stage="warm-up", prompt_tokens=0,
+                                evaluated_tokens=None, completion_tokens=0, estimated=False,
+                                latency=time.monotonic() - start, ok=ok, **(timings or {}))
+
+    def _call_llm(self, prompt, config: Optional[LLMConfig] = None, stage: Optional[str] = None):
+        """
+        Routes a prompt to the config's provider (hedging to other backends
+        when it is slow or failing). Raises LLMUnavailableError if no backend
+        answered in time. stage labels the call in the usage ledger.
+        """
+        config = config or self.default_config()
+        if config.is_offline:
+            raise LLMUnavailableError("AI is offline.")
+
+        candidates = self.candidates(config, prompt, stage)
+        text, _ = self.router.call(candidates, [{'role': 'user', 'content': prompt}], hedge=config.hedge,
+                                   options=self.request_options(config, candidates, stage), stage=stage)
+        return text
+
+    def _try_llm(self, prompt, config: LLMConfig, stage: Optional[str] = None) -> Optional[str]:
+        """_call_llm for enrichment: failures yield None instead of an error string."""
+        try:
+            return self._call_llm(prompt, config, stage)
+        except LLMUnavailableError as e:
+            print(f"LLM Service: request failed - {e}")
+            return None
+
+    def explain_clause(self, text, context="business", config: Optional[LLMConfig] = None):
         """
         Explains a legal clause.
         """
-        if self.is_offline:
+        config = config or self.default_config()
+        if config.is_offline:
             return "AI Offline: Enable Cloud API or local Ollama."
 
-        prompt = f"Explain this legal clause in simple {context} terms for a non-lawyer. If the text is in Hindi, translate and explain in English. Max 2 sentences. Clause: {text}"
+        instructions = f"Explain this legal clause in simple {context} terms for a non-lawyer. If the text is in Hindi, translate and explain in English. Max 2 sentences. Clause: "
+        text, _ = self.fit(text, config, "explanation", instructions)
+        prompt = instructions + text
         
-        return self._call_llm(prompt)
+        return self._try_llm(prompt, config, "explanation")
 
-    def analyze_risk_depth(self, clause_text, risk_type):
+    def analyze_risk_depth(self, clause_text, risk_type, config: Optional[LLMConfig] = None):
         """
         Deep dive into risk with actionable advice.
         """
-        if self.is_offline:
+        config = config or self.default_config()
+        if config.is_offline:
             return "AI Offline: Enable Cloud API or local Ollama."
 
-        prompt = (
+        template = (
             f"You are a legal expert for Indian SMEs. Analyze this '{risk_type}' clause.\n"
-            f"Clause: {clause_text}\n"
+            "Clause: {clause}\n"
             "Note: If the clause is in Hindi, analyze it and provide the response in English.\n\n"
             "Provide a valid response with exactly these three sections:\n"
             "1. **Implication**: What this means for the business owner.\n"
@@ -213,24 +399,25 @@ class LLMService:
             "3. **Alternative Clause**: A fairer version of this clause that protects the SME.\n"
             "Keep it concise and business-focused."
         )
+        clause_text, _ = self.fit(clause_text, config, "remedy", template)
+        prompt = template.format(clause=clause_text)
         
-        return self._call_llm(prompt)
+        return self._try_llm(prompt, config, "remedy")
             
-    def generate_document_summary(self, full_text):
+    def generate_document_summary(self, full_text, config: Optional[LLMConfig] = None,
+                                  clauses: Optional[Sequence[dict]] = None):
         """
         Generates a comprehensive yet simple summary of the entire document.
+        Long documents are compacted to the model's window, keeping the
+        riskiest clauses (clauses: the analysed records, if available).
         """
-        if self.is_offline:
+        config = config or self.default_config()
+        if config.is_offline:
             return "AI Summary Unavailable."
             
-        # Truncate to avoid context limit issues 
-        # Gemini 1.5 has large context window, but good to be safe. Ollama depends on model.
-        MAX_CHARS = 30000 if self.provider == "gemini" else 12000
-        safe_text = full_text[:MAX_CHARS]
-        
-        prompt = (
-            f"Read this contract and explain it to me in plain English, like you are explaining it to a friend.\n"
-            f"Text (truncated): {safe_text}\n"
+        template = (
+            "Read this contract and explain it to me in plain English, like you are explaining it to a friend.\n"
+            "{label}: {text}\n"
             "Important: If the document is in Hindi, translate the insights and purely output in English.\n\n"
             "Focus on:\n"
             "1. What is this deal actually about?\n"
@@ -242,42 +429,31 @@ class LLMService:
             "- Do not use legal jargon (e.g., instead of 'indemnification', say 'protection against lawsuits').\n"
             "- Write in a natural, conversational flow."
         )
-        return self._call_llm(prompt)
+        safe_text, stats = self.fit(full_text, config, "comprehensive_summary", template,
+                                    config.summary_tokens, clauses)
+        label = "Text (excerpts, [...] marks omitted clauses)" if stats["method"] != "normalized" else "Text"
+        prompt = template.format(label=label, text=safe_text)
+        return self._try_llm(prompt, config, "comprehensive_summary")
 
-    def generate_summary(self, high_risks):
-        if self.is_offline:
+    def generate_summary(self, high_risks, config: Optional[LLMConfig] = None):
+        config = config or self.default_config()
+        if config.is_offline:
             return "AI Summary Unavailable."
             
-        prompt = (
-            f"Generate a strategic executive summary for a business owner based on these identified risks: {high_risks}\n"
+        # One line per distinct risk, with how often it occurs
+        counts = Counter(high_risks)
+        risks = "\n".join(f"- {reason} (x{n})" if n > 1 else f"- {reason}" for reason, n in counts.most_common())
+        template = (
+            "Generate a strategic executive summary for a business owner based on these identified risks:\n{risks}\n"
             "Structure:\n"
             "- **Executive Overview**: 1 sentence overall assessment.\n"
             "- **Key Risks**: 3 bullet points highlighting critical issues.\n"
             "- **Negotiation Strategy**: 1 piece of advice for the next meeting."
         )
-        return self._call_llm(prompt)
-
-    def chat_with_document(self, query, document_text):
-        """
-        Interactive Q&A with the document context.
-        """
-        if self.is_offline:
-            return "AI Offline: Enable Cloud API or local Ollama."
-
-        # Truncate context
-        MAX_CHARS = 30000 if self.provider == "gemini" else 4000
-        safe_context = document_text[:MAX_CHARS]
-        
-        prompt = (
-            f"Context: {safe_context}\n\n"
-            f"User Question: {query}\n"
-            "Instructions: Input may be in Hindi or English. Always answer in English.\n"
-            "You are an expert Indian Corporate Lawyer. precise, professional, and helpful.\n"
-            "Answer the question based strictly on the provided contract context above.\n"
-            "If the information is not in the contract, say so. Cite specific clauses if possible."
-        )
-        
-        return self._call_llm(prompt)
+        risks = risks[:token_estimator.chars_for(risks, self.prompt_budget(config, "ai_summary", template),
+                                                 config.provider, config.model)]
+        prompt = template.format(risks=risks)
+        return self._try_llm(prompt, config, "ai_summary")
 
 # Singleton instance
 llm_service = LLMService()
@@ -1,5 +1,5 @@
 import re
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 class EntityExtractor:
     
@@ -23,6 +23,39 @@ class EntityExtractor:
         ]
     }
 
+    # Whole party names (capitalised words ending in a company suffix), for masking
+    ORG_NAME = r"(?:[A-Z][\w&'.-]*\s+){1,4}(?:Private Limited|Pvt\.?\s*Ltd\.?|Limited|Ltd\.?|Inc\.?|Corp\.?|LLP)"
+
+    @staticmethod
+    def mask(text: str) -> str:
+        """
+        Replaces amounts, dates, party names and remaining numbers with
+        placeholders, so templated clauses that differ only in those compare
+        equal.
+        """
+        return EntityExtractor._mask(text)[0]
+
+    @staticmethod
+    def masked_values(text: str) -> Tuple[str, ...]:
+        """What mask() replaces, in that order, lower-cased without punctuation ("Rs. 5,000" -> "rs5000")."""
+        return EntityExtractor._mask(text)[1]
+
+    @staticmethod
+    def _mask(text: str) -> Tuple[str, Tuple[str, ...]]:
+        values = []
+
+        def placeholder(label):
+            def replace(match):
+                values.append(re.sub(r"\W", "", match.group(0).lower()))
+                return f"<{label}>"
+            return replace
+
+        for label in ("MONEY", "DATE"):
+            for pat in EntityExtractor.PATTERNS[label]:
+                text = re.sub(pat, placeholder(label), text)
+        text = re.sub(EntityExtractor.ORG_NAME, placeholder("ORG"), text)
+        return re.sub(r"\d[\d,.]*", placeholder("NUM"), text), tuple(values)
+
     @staticmethod
     def extract_entities(text: str) -> Dict[str, List[str]]:
         entities = {
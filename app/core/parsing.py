@@ -21,61 +21,100 @@ class ClauseParser:
         Splits text into clauses.
         Returns a list of dicts: {'id': '1.1', 'text': '...'}
         """
-        lines = text.split('\n')
+        return [
+            {"id": span["id"], "text": ClauseParser.span_text(text, span["start"], span["end"]), "type": span["type"]}
+            for span in ClauseParser.parse_spans(text)
+        ]
+
+    @staticmethod
+    def span_text(text: str, start: int, end: int) -> str:
+        """
+        Clause text for a span: its non-empty lines, stripped and joined
+        with single spaces.
+        """
+        return " ".join(line.strip() for line in text[start:end].split('\n') if line.strip())
+
+    @staticmethod
+    def parse_spans(text: str) -> List[Dict[str, Any]]:
+        """
+        Same split as parse(), but returns character offsets into text
+        instead of copies: {'id': '1.1', 'start': 120, 'end': 388, 'type': 'clause'}
+        """
         clauses = []
-        current_clause = {"id": "Intro", "text": "", "type": "preamble"}
-        
-        for line in lines:
-            line = line.strip()
+        current_clause = {"id": "Intro", "start": None, "end": None, "type": "preamble"}
+        offset = 0
+
+        for raw_line in text.split('\n'):
+            line_start = offset
+            offset += len(raw_line) + 1
+            line = raw_line.strip()
             if not line:
                 continue
-                
+            line_start += len(raw_line) - len(raw_line.lstrip())
+            line_end = line_start + len(line)
+
             match = ClauseParser._match_clause_start(line)
             if match:
                 # Save previous clause if it has content
-                if current_clause['text']:
+                if current_clause["start"] is not None:
                     clauses.append(current_clause)
-                
-                # Start new clause
-                clause_id = match[0]
-                content = match[1]
+
+                # Start new clause at its content, after the identifier
+                clause_id, content_offset = match
                 current_clause = {
                     "id": clause_id,
-                    "text": content,
+                    "start": line_start + content_offset,
+                    "end": line_end,
                     "type": "clause"
                 }
             else:
-                # Append to current clause
-                current_clause["text"] += " " + line
-        
+                # Extend current clause
+                if current_clause["start"] is None:
+                    current_clause["start"] = line_start
+                current_clause["end"] = line_end
+
         # Add final clause
-        if current_clause['text']:
+        if current_clause["start"] is not None:
             clauses.append(current_clause)
-            
+
         # FALLBACK: If regex found nothing (or only intro)
         if len(clauses) <= 1:
             # Strategy 1: Double Newlines (Paragraphs)
-            raw_paragraphs = [p.strip() for p in text.split('\n\n') if len(p.strip()) > 20]
-            
+            raw_paragraphs = ClauseParser._chunk_spans(text, '\n\n', 20)
+
             # Strategy 2: Single Newlines (Lines)
             if not raw_paragraphs:
-                 raw_paragraphs = [p.strip() for p in text.split('\n') if len(p.strip()) > 10]
-            
+                raw_paragraphs = ClauseParser._chunk_spans(text, '\n', 10)
+
             # Strategy 3: Just take the text as one big chunk if it's short
             if not raw_paragraphs and len(text) > 10:
-                raw_paragraphs = [text]
+                raw_paragraphs = [(0, len(text))]
 
             if raw_paragraphs:
                 clauses = [] # Reset
-                for i, para in enumerate(raw_paragraphs, 1):
+                for i, (start, end) in enumerate(raw_paragraphs, 1):
                     clauses.append({
                         "id": f"Section {i}",
-                        "text": para,
+                        "start": start,
+                        "end": end,
                         "type": "clause"
                     })
-            
+
         return clauses
 
+    @staticmethod
+    def _chunk_spans(text: str, separator: str, min_length: int):
+        """(start, end) of each stripped chunk longer than min_length."""
+        spans = []
+        offset = 0
+        for chunk in text.split(separator):
+            stripped = chunk.strip()
+            if len(stripped) > min_length:
+                start = offset + len(chunk) - len(chunk.lstrip())
+                spans.append((start, start + len(stripped)))
+            offset += len(chunk) + len(separator)
+        return spans
+
     @staticmethod
     def _match_clause_start(line: str):
         """
@@ -84,13 +123,11 @@ class ClauseParser:
         for pattern in ClauseParser.CLAUSE_PATTERNS:
             match = re.match(pattern, line, re.IGNORECASE)
             if match:
-                # Return tuple (ID, Remaining Text)
+                # Return tuple (ID, offset of the remaining text in line)
                 # Some patterns have 1 group (Article), others 2 (1.1 Text)
-                # This logic simplifies extraction
-                groups = match.groups()
-                # Remove None groups
-                groups = [g for g in groups if g]
-                
+                # Skip groups that did not participate in the match
+                groups = [i for i, g in enumerate(match.groups(), 1) if g]
+
                 if len(groups) >= 2:
-                    return groups[0], groups[-1] # ID, Text
+                    return match.group(groups[0]), match.start(groups[-1]) # ID, Text offset
         return None
@@ -1,99 +1,283 @@
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+from typing import Iterator, Optional
+
 from app.core.ingestion import DocumentIngestor
 from app.core.parsing import ClauseParser
 from app.core.ner import EntityExtractor
 from app.core.classification import ClauseClassifier
 from app.core.risk import RiskEngine
-from app.core.llm import llm_service
+from app.core.precedents import precedent_library
+from app.core.indexing import ClauseIndex
+from app.core.dedup import cluster, minhasher, enrichment_cache
+from app.core.results import ClauseRecord
+from app.core.llm import llm_service, LLMConfig
+from app.core.scheduling import (
+    EnrichmentScheduler, EnrichmentTask, clause_priority, estimate_tokens,
+    PRIORITY_SUMMARY, DONE, SKIPPED
+)
 from app.utils.logger import log_audit
 
+
+@contextmanager
+def _stage(timings: dict, name: str):
+    """Records the wall-clock seconds spent in a pipeline stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - start
+
+
 class ContractPipeline:
-    
+
     @staticmethod
-    def run(file_obj, file_type: str, enable_ai: bool = False):
+    def run(file_obj, file_type: str, enable_ai: bool = False, llm_config: Optional[LLMConfig] = None):
         """
         Executes the full analysis pipeline.
+        llm_config pins the provider/model for this run; defaults to the
+        process-wide default when omitted.
+        """
+        results = ContractPipeline.analyze(file_obj, file_type, enable_ai=enable_ai)
+        if enable_ai and "error" not in results:
+            for _ in ContractPipeline.enrich_stream(results, llm_config):
+                pass
+        return results
+
+    @staticmethod
+    def analyze(file_obj, file_type: str, enable_ai: bool = False):
         """
+        Phase 1: the deterministic report (ingestion, parsing, entities,
+        classification, risk). Fast enough to render immediately; AI fields
+        are left empty and results["ai_pending"] says whether enrich_stream
+        should follow.
+        """
+        timings = {}
         results = {
             "metadata": {"filename": file_obj.name, "type": file_type},
             "entities": {},
             "clauses": [],
             "risk_summary": {"High": 0, "Medium": 0, "Low": 0},
             "ai_summary": "",
-            "raw_text_sneak_peek": ""
+            "timings": timings,
+            "ai_pending": enable_ai
         }
-        
+
         # 1. Ingestion
         try:
-            raw_text = DocumentIngestor.extract(file_obj, file_type)
-            results["raw_text_sneak_peek"] = raw_text[:2000] # Capture first 2000 chars
-            results["full_text"] = raw_text # Store full text for Q&A
+            with _stage(timings, "ingestion"):
+                raw_text, extraction = DocumentIngestor.extract_with_report(file_obj, file_type)
+            results["full_text"] = raw_text # Store full text for Q&A; clause texts are spans into it
+            if extraction:
+                results["metadata"]["extraction"] = extraction
         except Exception as e:
             return {"error": str(e)}
-            
+
         # 2. Parsing
-        clauses = ClauseParser.parse(raw_text)
-        
+        with _stage(timings, "parsing"):
+            clauses = ClauseParser.parse_spans(raw_text)
+
         # 3. Global Entity Extraction
-        results["entities"] = EntityExtractor.extract_entities(raw_text)
-        
+        with _stage(timings, "entities"):
+            results["entities"] = EntityExtractor.extract_entities(raw_text)
+
         # 4. Clause Analysis
-        for clause in clauses:
-            # Classification
-            clause_type = ClauseClassifier.classify(clause["text"])
-            
-            # Risk
-            risk_level, risk_reason = RiskEngine.evaluate(clause["text"])
-            
-            # Update Summary
-            results["risk_summary"][risk_level] += 1
-            
-            # Enrich Clause Data
-            clause_data = {
-                "id": clause["id"],
-                "text": clause["text"],
-                "type": clause_type,
-                "risk": risk_level,
-                "risk_reason": risk_reason,
-                "explanation": None,
-                "remedy": None
-            }
-            
-            # AI Enrichment
-            if enable_ai:
-                # STRATEGY: Explain EVERYTHING that is not a boring definition
-                # This ensures the user "understands" the contract, as requested.
-                should_explain = (
-                    risk_level in ["High", "Medium"] or 
-                    clause_type in ["Obligation", "Prohibition", "Right"] or
-                    len(clause["text"].split()) > 30 # Explain long texts too
-                )
-                
-                if should_explain:
-                    clause_data["explanation"] = llm_service.explain_clause(clause["text"])
-                
-                # Risk Analysis remains for High/Medium
-                if risk_level in ["High", "Medium"]:
-                    clause_data["remedy"] = llm_service.analyze_risk_depth(clause["text"], risk_level)
-            
-            results["clauses"].append(clause_data)
-        
-        # Generate Executive Summary if AI is on
-        if enable_ai:
-            high_risks = [c["risk_reason"] for c in results["clauses"] if c["risk"] == "High"]
-            if high_risks:
-                results["ai_summary"] = llm_service.generate_summary(high_risks)
-            else:
-                results["ai_summary"] = "No high-severity risks detected. The contract appears standard based on the configured risk criteria."
-            
-            # Generate Comprehensive Summary
-            results["comprehensive_summary"] = llm_service.generate_document_summary(raw_text)
-            
+        with _stage(timings, "analysis"):
+            records = [ClauseRecord(raw_text, span["start"], span["end"], span["id"]) for span in clauses]
+            texts = [clause.text for clause in records]
+
+            # Nearest reference clause for every clause in one batch
+            matches = precedent_library.match(texts)
+
+            for clause, text, match in zip(records, texts, matches):
+                # Classification
+                clause.type = ClauseClassifier.classify(text)
+
+                # Risk: keyword rules, raised by a close risky precedent (catches paraphrases)
+                clause.risk, clause.risk_reason = RiskEngine.evaluate(text)
+                if match is not None:
+                    clause.precedent = (match.precedent["id"], round(match.score, 3))
+                    if match.escalates():
+                        clause.risk, clause.risk_reason = RiskEngine.escalate((clause.risk, clause.risk_reason), match.signal)
+
+                # Update Summary
+                results["risk_summary"][clause.risk] += 1
+
+                results["clauses"].append(clause)
+
+        # 5. Lookup indexes for filtering/pagination in the dashboard
+        with _stage(timings, "indexing"):
+            results["index"] = ClauseIndex.build(results["clauses"])
+
         # Audit Log
         log_audit("Analysis Complete", {
-            "filename": file_obj.name, 
+            "filename": file_obj.name,
             "clause_count": len(clauses),
             "high_risks": results["risk_summary"]["High"],
             "ai_enabled": enable_ai
         })
-        
+
         return results
+
+    @staticmethod
+    def enrich_stream(results, llm_config: Optional[LLMConfig] = None) -> Iterator[dict]:
+        """
+        Phase 2: AI enrichment, prioritised and bounded by the config's
+        deadline and token budget. Updates results in place and yields one
+        event per finished or skipped task:
+            {"clause_index": int | None, "field": str, "status": str,
+             "value": str | None, "completed": int, "total": int}
+        clause_index is None for document-level fields (summaries). A task
+        shared by near-duplicate clauses yields one event per clause. Fields
+        already filled are not regenerated, so an interrupted stream can be
+        resumed by calling this again; it resumes with the config it started
+        with (see enrichment_config).
+        """
+        llm_config = ContractPipeline.enrichment_config(results, llm_config)
+        results["llm_config"] = asdict(llm_config)
+        scheduler = EnrichmentScheduler(llm_config)
+        tasks = ContractPipeline._plan(results, results.get("full_text", ""), llm_config)
+        start = time.perf_counter()
+
+        completed = 0
+        for task, status, output in scheduler.stream(tasks):
+            completed += 1
+            if task.clause_index is None:
+                if status == DONE:
+                    results[task.field] = output
+                targets = [None]
+            else:
+                # Near-duplicates of the clause share its output
+                targets = [task.clause_index, *task.duplicates]
+                for i in targets:
+                    clause_data = results["clauses"][i]
+                    if status == DONE:
+                        clause_data[task.field] = output
+                    else:
+                        clause_data["ai_skipped"][task.field] = output if status == SKIPPED else "AI request failed"
+            for clause_index in targets:
+                yield {
+                    "clause_index": clause_index,
+                    "field": task.field,
+                    "status": status,
+                    "value": output if status == DONE else None,
+                    "completed": completed,
+                    "total": len(tasks)
+                }
+
+        results["enrichment"] = scheduler.stats
+        results["timings"]["enrichment"] = time.perf_counter() - start
+        results["ai_pending"] = False
+
+    @staticmethod
+    def enrichment_config(results, llm_config: Optional[LLMConfig] = None) -> LLMConfig:
+        """
+        The config results are enriched with: the one recorded when their
+        enrichment first ran, so resumed streams and on-demand insights
+        match the output (and store key) already there; else llm_config.
+        """
+        if results.get("llm_config"):
+            return LLMConfig(**results["llm_config"])
+        return llm_config or llm_service.default_config()
+
+    @staticmethod
+    def _generate(clause_data, field, llm_config: LLMConfig, signature=None):
+        if field == "remedy":
+            output = llm_service.analyze_risk_depth(clause_data["text"], clause_data["risk"], config=llm_config)
+        else:
+            output = llm_service.explain_clause(clause_data["text"], config=llm_config)
+        if output is not None and not llm_config.is_offline:
+            enrichment_cache.put(enrichment_cache.namespace(llm_config, clause_data), signature, field, output)
+        return output
+
+    @staticmethod
+    def _plan(results, raw_text, llm_config: LLMConfig):
+        """
+        Builds the enrichment task list. Which clauses get an explanation
+        and/or remedy, and in what order, is decided by clause_priority.
+        Near-duplicate clauses (nearly the same text, with the same
+        amounts, dates, party names and negations) are enriched by one
+        task, and output cached from
+        earlier documents is reused without a call; results["dedup"]
+        records how many calls that saved.
+        """
+        clauses = results["clauses"]
+        signatures = [minhasher.signature(c["text"]) for c in clauses]
+        groups = cluster(clauses, signatures)
+        tasks = []
+        dedup = {"clauses": len(clauses), "clusters": len(groups), "requested": 0, "llm_calls": 0,
+                 "shared": 0, "cache_hits": 0}
+        for clause_data in clauses:
+            clause_data["ai_skipped"] = {}
+        for members in groups:
+            namespace = enrichment_cache.namespace(llm_config, clauses[members[0]])
+            for field in ("remedy", "explanation"):
+                priorities = {}
+                for i in members:
+                    priority = clause_priority(clauses[i], field)
+                    if priority is not None and clauses[i].get(field) is None:
+                        priorities[i] = priority
+                if not priorities:
+                    continue
+                needing = list(priorities)
+                dedup["requested"] += len(needing)
+
+                cached = None if llm_config.is_offline else enrichment_cache.get(namespace, signatures[needing[0]], field)
+                if cached is not None:
+                    for i in needing:
+                        clauses[i][field] = cached
+                    dedup["cache_hits"] += len(needing)
+                    continue
+
+                clause_data = clauses[needing[0]]
+                dedup["llm_calls"] += 1
+                dedup["shared"] += len(needing) - 1
+                tasks.append(EnrichmentTask(
+                    min(priorities.values()), len(tasks), field, needing[0],
+                    estimate_tokens(clause_data["text"], field, llm_config),
+                    lambda c=clause_data, f=field, sig=signatures[needing[0]]: ContractPipeline._generate(c, f, llm_config, sig),
+                    duplicates=tuple(needing[1:])
+                ))
+        dedup["calls_saved"] = dedup["requested"] - dedup["llm_calls"]
+        results["dedup"] = dedup
+
+        # Executive Summary
+        high_risks = [c["risk_reason"] for c in results["clauses"] if c["risk"] == "High"]
+        if not high_risks:
+            results["ai_summary"] = "No high-severity risks detected. The contract appears standard based on the configured risk criteria."
+        elif not results.get("ai_summary"):
+            tasks.append(EnrichmentTask(
+                PRIORITY_SUMMARY, len(tasks), "ai_summary", None,
+                estimate_tokens("\n".join(set(high_risks)), "ai_summary", llm_config),
+                lambda: llm_service.generate_summary(high_risks, config=llm_config)
+            ))
+
+        # Comprehensive Summary
+        if not results.get("comprehensive_summary"):
+            tasks.append(EnrichmentTask(
+                PRIORITY_SUMMARY, len(tasks), "comprehensive_summary", None,
+                estimate_tokens(raw_text, "comprehensive_summary", llm_config,
+                                llm_service.prompt_budget(llm_config, "comprehensive_summary", cap=llm_config.summary_tokens)),
+                lambda: llm_service.generate_document_summary(raw_text, config=llm_config, clauses=clauses)
+            ))
+        return tasks
+
+    @staticmethod
+    def enrich_clause(clause_data, llm_config: Optional[LLMConfig] = None):
+        """
+        Lazily generates any fields of a clause that were skipped during the
+        main run. Returns the clause (updated in place).
+        """
+        llm_config = llm_config or llm_service.default_config()
+        signature = minhasher.signature(clause_data["text"])
+        namespace = enrichment_cache.namespace(llm_config, clause_data)
+        for field in list(clause_data.get("ai_skipped", {})):
+            # A near-duplicate generated on demand earlier answers this one too
+            output = None if llm_config.is_offline else enrichment_cache.get(namespace, signature, field)
+            if output is None:
+                output = ContractPipeline._generate(clause_data, field, llm_config, signature)
+            if output is not None:
+                clause_data[field] = output
+                del clause_data["ai_skipped"][field]
+        return clause_data
@@ -0,0 +1,245 @@
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import PROCESSED_DIR
+
+PORTFOLIO_PATH = PROCESSED_DIR / "portfolio.db"
+
+TOKEN_PATTERN = re.compile(r"\w+")
+QUERY_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def _fts5_available() -> bool:
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE probe USING fts5(x)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _query_terms(query: str) -> List[List[str]]:
+    """
+    Splits a search string into terms, each a list of tokens. Quoted text
+    and hyphenated words ("non-compete") become phrases; terms are ANDed.
+    """
+    terms = []
+    for quoted, word in QUERY_PATTERN.findall(query):
+        tokens = TOKEN_PATTERN.findall((quoted or word).lower())
+        if tokens:
+            terms.append(tokens)
+    return terms
+
+
+class PortfolioIndex:
+    """
+    Persistent clause search across every analysed contract. Each document
+    is indexed once per content hash (re-indexing replaces it) with its
+    clauses, risk levels, clause types, entities and metadata as filters.
+
+    Full-text matching uses SQLite FTS5 (porter stemming, bm25 ranking)
+    when the SQLite build has it, and a plain term -> clause postings table
+    otherwise.
+    """
+
+    def __init__(self, path: Path = PORTFOLIO_PATH, use_fts: Optional[bool] = None):
+        self.path = path
+        self.use_fts = _fts5_available() if use_fts is None else use_fts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; a crash can only lose the last documents
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                filename TEXT,
+                file_type TEXT,
+                indexed_at REAL NOT NULL,
+                clause_count INTEGER NOT NULL,
+                high INTEGER NOT NULL,
+                medium INTEGER NOT NULL,
+                low INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entities (
+                doc_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entities_doc ON entities(doc_id);
+            CREATE TABLE IF NOT EXISTS clauses (
+                id INTEGER PRIMARY KEY,
+                doc_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                clause_id TEXT,
+                type TEXT,
+                risk TEXT,
+                risk_reason TEXT,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_clauses_doc ON clauses(doc_id, position);
+            CREATE INDEX IF NOT EXISTS idx_clauses_risk ON clauses(risk, type);
+        """)
+        if self.use_fts:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS clause_fts USING fts5("
+                "text, content='clauses', content_rowid='id', tokenize='porter unicode61')"
+            )
+        else:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings (term TEXT NOT NULL, clause INTEGER NOT NULL, "
+                "PRIMARY KEY (term, clause)) WITHOUT ROWID"
+            )
+        self._conn.commit()
+
+    def add_document(self, doc_id: str, results: dict):
+        """Indexes (or re-indexes) one analysis' clauses under doc_id."""
+        metadata = results.get("metadata", {})
+        risk = results.get("risk_summary", {})
+        clauses = results["clauses"]
+        with self._lock:
+            try:
+                self._delete(doc_id)
+                self._conn.execute(
+                    "INSERT INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (doc_id, metadata.get("filename"), metadata.get("type"), time.time(), len(clauses),
+                     risk.get("High", 0), risk.get("Medium", 0), risk.get("Low", 0))
+                )
+                self._conn.executemany(
+                    "INSERT INTO entities VALUES (?, ?, ?)",
+                    [(doc_id, kind, value) for kind, values in results.get("entities", {}).items() for value in values]
+                )
+                for position, clause in enumerate(clauses):
+                    text = clause["text"]
+                    cursor = self._conn.execute(
+                        "INSERT INTO clauses (doc_id, position, clause_id, type, risk, risk_reason, text) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (doc_id, position, clause["id"], clause["type"], clause["risk"], clause["risk_reason"], text)
+                    )
+                    self._index_text(cursor.lastrowid, text)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def remove_document(self, doc_id: str):
+        with self._lock:
+            self._delete(doc_id)
+            self._conn.commit()
+
+    def _index_text(self, rowid: int, text: str):
+        if self.use_fts:
+            self._conn.execute("INSERT INTO clause_fts (rowid, text) VALUES (?, ?)", (rowid, text))
+        else:
+            terms = set(TOKEN_PATTERN.findall(text.lower()))
+            self._conn.executemany("INSERT INTO postings VALUES (?, ?)", [(term, rowid) for term in terms])
+
+    def _delete(self, doc_id: str):
+        if self.use_fts:
+            # External-content FTS needs the old text to remove its entries
+            self._conn.execute(
+                "INSERT INTO clause_fts (clause_fts, rowid, text) "
+                "SELECT 'delete', id, text FROM clauses WHERE doc_id = ?", (doc_id,)
+            )
+        else:
+            # Re-tokenise the old text so each posting is deleted by its primary key
+            rows = self._conn.execute("SELECT id, text FROM clauses WHERE doc_id = ?", (doc_id,)).fetchall()
+            self._conn.executemany("DELETE FROM postings WHERE term = ? AND clause = ?", [
+                (term, rowid) for rowid, text in rows for term in set(TOKEN_PATTERN.findall(text.lower()))
+            ])
+        self._conn.execute("DELETE FROM clauses WHERE doc_id = ?", (doc_id,))
+        self._conn.execute("DELETE FROM entities WHERE doc_id = ?", (doc_id,))
+        self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+    def search(self, query: str = "", risks: Optional[Iterable[str]] = None, types: Optional[Iterable[str]] = None,
+               entity: Optional[str] = None, filename: Optional[str] = None, file_type: Optional[str] = None,
+               limit: int = 50) -> List[Dict[str, object]]:
+        """
+        Clauses matching the search text and every given filter, best match
+        first (or in document order when query is empty):
+            {"doc_id", "filename", "clause_id", "position", "type", "risk",
+             "risk_reason", "snippet"}
+        entity matches any extracted entity value containing it
+        (case-insensitive); filename accepts glob patterns.
+        """
+        terms = _query_terms(query)
+        where, params = [], []
+        for column, values in (("c.risk", risks), ("c.type", types)):
+            if values:
+                values = list(values)
+                where.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if entity:
+            where.append("c.doc_id IN (SELECT doc_id FROM entities WHERE value LIKE ?)")
+            params.append(f"%{entity}%")
+        if filename:
+            where.append("d.filename GLOB ?" if any(ch in filename for ch in "*?[") else "d.filename = ?")
+            params.append(filename)
+        if file_type:
+            where.append("d.file_type = ?")
+            params.append(file_type)
+
+        columns = "c.doc_id, d.filename, c.clause_id, c.position, c.type, c.risk, c.risk_reason"
+        if terms and self.use_fts:
+            match = " ".join('"' + " ".join(tokens) + '"' for tokens in terms)
+            sql = (f"SELECT {columns}, snippet(clause_fts, 0, '[', ']', '...', 16) FROM clause_fts "
+                   f"JOIN clauses c ON c.id = clause_fts.rowid JOIN documents d ON d.doc_id = c.doc_id "
+                   f"WHERE clause_fts MATCH ?{''.join(' AND ' + w for w in where)} "
+                   f"ORDER BY bm25(clause_fts) LIMIT ?")
+            params = [match] + params + [limit]
+        else:
+            if terms:
+                where.insert(0, self._postings_filter(terms))
+                params = [token for tokens in terms for token in tokens] + params
+            # Phrase order is checked after the query, so fetch extra candidates
+            has_phrase = any(len(tokens) > 1 for tokens in terms)
+            sql = (f"SELECT {columns}, substr(c.text, 1, 200) FROM clauses c JOIN documents d ON d.doc_id = c.doc_id"
+                   f"{' WHERE ' + ' AND '.join(where) if where else ''} ORDER BY c.doc_id, c.position LIMIT ?")
+            params = params + [limit * 20 if has_phrase else limit]
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        keys = ("doc_id", "filename", "clause_id", "position", "type", "risk", "risk_reason", "snippet")
+        hits = [dict(zip(keys, row)) for row in rows]
+        if terms and not self.use_fts:
+            hits = self._check_phrases(hits, terms)[:limit]
+        return hits
+
+    @staticmethod
+    def _postings_filter(terms: List[List[str]]) -> str:
+        # Every token of every term must occur in the clause
+        tokens = [token for tokens in terms for token in tokens]
+        return " AND ".join("c.id IN (SELECT clause FROM postings WHERE term = ?)" for _ in tokens)
+
+    def _check_phrases(self, hits, terms):
+        phrases = [" ".join(tokens) for tokens in terms if len(tokens) > 1]
+        if not phrases:
+            return hits
+        kept = []
+        with self._lock:
+            for hit in hits:
+                text = self._conn.execute("SELECT text FROM clauses WHERE doc_id = ? AND position = ?",
+                                          (hit["doc_id"], hit["position"])).fetchone()[0]
+                normalized = " ".join(TOKEN_PATTERN.findall(text.lower()))
+                if all(f" {phrase} " in f" {normalized} " for phrase in phrases):
+                    kept.append(hit)
+        return kept
+
+    def clause_text(self, doc_id: str, position: int) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM clauses WHERE doc_id = ? AND position = ?",
+                                     (doc_id, position)).fetchone()
+        return row[0] if row else None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            documents, clauses = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(clause_count), 0) FROM documents"
+            ).fetchone()
+        return {"documents": documents, "clauses": clauses, "fts5": self.use_fts}
+
+
+portfolio_index = PortfolioIndex()
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import math
+import re
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.core.config import (
+    DATA_DIR, PRECEDENT_EMBEDDER, PRECEDENT_DIM, PRECEDENT_MIN_SCORE, PRECEDENT_LSH_THRESHOLD,
+    PRECEDENT_RISK_SCORE, PRECEDENT_RISK_MARGIN
+)
+
+PRECEDENTS_PATH = DATA_DIR / "precedents.json"
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Function words carry no signal for clause similarity
+STOPWORDS = frozenset(
+    "a an and any are as at be been by for from has have in into is it its of on or such that the their "
+    "this those to under was which will with shall hereby herein thereof".split()
+)
+
+
+class HashingEmbedder:
+    """
+    Offline embedding: word unigrams, word bigrams and character 4-grams
+    hashed into a fixed number of signed buckets, sublinear term weights,
+    L2-normalised. Character n-grams let "terminate" and "termination"
+    share most of their features.
+    """
+    name = "hashing"
+
+    def __init__(self, dim: int = PRECEDENT_DIM, char_ngram: int = 4):
+        self.dim = dim
+        self.char_ngram = char_ngram
+
+    def features(self, text: str) -> Dict[str, float]:
+        words = [w for w in WORD_PATTERN.findall(text.lower()) if w not in STOPWORDS]
+        weights: Dict[str, float] = {}
+        for w in words:
+            weights[w] = weights.get(w, 0.0) + 1.0
+            padded = f"<{w}>"
+            for i in range(max(1, len(padded) - self.char_ngram + 1)):
+                gram = "#" + padded[i:i + self.char_ngram]
+                weights[gram] = weights.get(gram, 0.0) + 0.25
+        for a, b in zip(words, words[1:]):
+            bigram = a + " " + b
+            weights[bigram] = weights.get(bigram, 0.0) + 1.0
+        return weights
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        texts = list(texts)
+        rows, cols, values = [], [], []
+        for row, text in enumerate(texts):
+            for feature, weight in self.features(text).items():
+                h = zlib.crc32(feature.encode())
+                rows.append(row)
+                cols.append(h % self.dim)
+                # Sign bit keeps colliding features from only ever adding up
+                values.append((1.0 + math.log(weight)) if weight >= 1 else weight)
+                if h & 0x80000000:
+                    values[-1] = -values[-1]
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), np.array(values, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+
+class SentenceEmbedder:
+    """
+    Optional small local transformer (sentence-transformers, run on CPU).
+    Catches paraphrases with no words in common, at a higher cost.
+    """
+    name = "sentence"
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        return self.model.encode(list(texts), batch_size=64, normalize_embeddings=True).astype(np.float32)
+
+
+def make_embedder(kind: str = PRECEDENT_EMBEDDER):
+    if kind == "sentence":
+        try:
+            return SentenceEmbedder()
+        except Exception as e:
+            print(f"Sentence embedder unavailable ({e}); using hashed n-grams.")
+    return HashingEmbedder()
+
+
+class HyperplaneLSH:
+    """
+    Random-hyperplane LSH for cosine similarity: each of `tables` tables
+    buckets vectors by the signs of `bits` projections. Candidates are the
+    union of a query's buckets, which are then scored exactly.
+    """
+
+    def __init__(self, vectors: np.ndarray, bits: int = 16, tables: int = 8, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((tables, vectors.shape[1], bits)).astype(np.float32)
+        self.powers = (1 << np.arange(bits)).astype(np.int64)
+        self.buckets: List[Dict[int, np.ndarray]] = []
+        for signatures in self._signatures(vectors).T:
+            order = np.argsort(signatures, kind="stable")
+            keys, starts = np.unique(signatures[order], return_index=True)
+            groups = np.split(order, starts[1:])
+            self.buckets.append(dict(zip(keys.tolist(), groups)))
+
+    def _signatures(self, vectors: np.ndarray) -> np.ndarray:
+        # (n, tables) bucket ids
+        projections = np.einsum("nd,tdb->ntb", vectors, self.planes)
+        return (projections > 0).astype(np.int64) @ self.powers
+
+    def candidates(self, queries: np.ndarray) -> List[np.ndarray]:
+        empty = np.empty(0, dtype=np.intp)
+        result = []
+        for signatures in self._signatures(queries):
+            hits = [self.buckets[t].get(int(s), empty) for t, s in enumerate(signatures)]
+            result.append(np.unique(np.concatenate(hits)) if hits else empty)
+        return result
+
+
+@dataclass
+class PrecedentMatch:
+    precedent: dict
+    score: float
+    standard_score: float = 0.0  # Similarity to the closest standard (Low) precedent
+
+    def escalates(self, min_score: float = PRECEDENT_RISK_SCORE, margin: float = PRECEDENT_RISK_MARGIN) -> bool:
+        """
+        Whether this match should raise the clause's risk: a risky precedent
+        close enough, and clearly closer than any approved standard wording.
+        Boilerplate (notices, counterparts) shares words with risky clauses
+        too, but sits at least as close to the standard clauses.
+        """
+        return self.precedent["level"] != "Low" and self.score >= min_score \
+            and self.score - self.standard_score >= margin
+
+    @property
+    def signal(self) -> tuple:
+        """(level, reason) this match suggests for the clause."""
+        return self.precedent["level"], f"{self.precedent['reason']} (resembles precedent {self.precedent['id']})"
+
+
+class PrecedentLibrary:
+    """
+    Reference clauses (risky patterns and approved standard language) with
+    their embeddings in one matrix. match() scores a batch of clauses
+    against the whole library with a single matrix product, or through an
+    LSH index once the library has more than lsh_threshold entries.
+    """
+
+    def __init__(self, precedents: List[dict], embedder=None, lsh_threshold: int = PRECEDENT_LSH_THRESHOLD):
+        self.precedents = precedents
+        self.embedder = embedder or make_embedder()
+        self.matrix = self.embedder.embed(p["text"] for p in precedents) if precedents else \
+            np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self.lsh = HyperplaneLSH(self.matrix) if len(precedents) > lsh_threshold else None
+        self.standard = np.array([i for i, p in enumerate(precedents) if p.get("level") == "Low"], dtype=np.intp)
+        digest = hashlib.sha256(self.embedder.name.encode())
+        for p in precedents:
+            digest.update(json.dumps(p, sort_keys=True).encode())
+        self.version = digest.hexdigest()[:12]
+
+    @classmethod
+    def load(cls, path: Path = PRECEDENTS_PATH, **kwargs) -> "PrecedentLibrary":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                precedents = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Precedent library not loaded ({e}); precedent matching disabled.")
+            precedents = []
+        return cls(precedents, **kwargs)
+
+    def match(self, texts: List[str], min_score: float = PRECEDENT_MIN_SCORE, exact: bool = False,
+              batch_size: int = 512) -> List[Optional[PrecedentMatch]]:
+        """Nearest precedent per text, or None below min_score."""
+        results: List[Optional[PrecedentMatch]] = []
+        if not self.precedents:
+            return [None] * len(texts)
+        for start in range(0, len(texts), batch_size):
+            queries = self.embedder.embed(texts[start:start + batch_size])
+            standard = (queries @ self.matrix[self.standard].T).max(axis=1) if len(self.standard) else \
+                np.zeros(len(queries), dtype=np.float32)
+            if self.lsh is None or exact:
+                scores = queries @ self.matrix.T
+                best = scores.argmax(axis=1)
+                pairs = zip(best.tolist(), scores[np.arange(len(best)), best].tolist())
+            else:
+                pairs = []
+                for query, candidates in zip(queries, self.lsh.candidates(queries)):
+                    if len(candidates) == 0:
+                        pairs.append((None, 0.0))
+                        continue
+                    scores = self.matrix[candidates] @ query
+                    i = int(scores.argmax())
+                    pairs.append((int(candidates[i]), float(scores[i])))
+            for (index, score), standard_score in zip(pairs, standard.tolist()):
+                results.append(PrecedentMatch(self.precedents[index], score, standard_score)
+                               if index is not None and score >= min_score else None)
+        return results
+
+
+precedent_library = PrecedentLibrary.load()
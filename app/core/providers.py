@@ -0,0 +1,399 @@
+import datetime
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import ollama
+import google.generativeai as genai
+
+from app.core.config import OLLAMA_DEFAULT_NUM_CTX, OLLAMA_NUM_CTX
+
+
+def _response_field(response, name: str):
+    """Reads a field from an SDK response object or a plain dict."""
+    if isinstance(response, dict):
+        return response.get(name)
+    return getattr(response, name, None)
+
+
+def keep_alive_seconds(keep_alive) -> Optional[float]:
+    """Ollama keep_alive ("30m", "1h", "45s", seconds, -1) in seconds; None when negative (kept loaded)."""
+    if isinstance(keep_alive, str):
+        value = keep_alive.strip()
+        units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        unit = next((u for u in ("ms", "s", "m", "h") if value.endswith(u)), None)
+        seconds = float(value[:-len(unit)]) * units[unit] if unit else float(value)
+    else:
+        seconds = float(keep_alive)
+    return None if seconds < 0 else seconds
+
+
+class ClientPool:
+    """
+    Thread-safe cache of expensive LLM clients shared by all sessions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[Hashable, Any] = {}
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = factory()
+                self._clients[key] = client
+            return client
+
+
+class LLMProvider:
+    """
+    Interface implemented by every LLM backend.
+    Providers are shared by all sessions, so implementations must be thread-safe.
+    """
+    name = "base"
+    label = "LLM"
+
+    def chat(self, model: str, messages: List[Dict[str, str]], **options) -> str:
+        """
+        Sends a list of {'role', 'content'} messages and returns the reply text.
+        Provider-specific options (e.g. keep_alive) are passed through.
+        Raises on failure.
+        """
+        raise NotImplementedError
+
+    def chat_with_usage(self, model: str, messages: List[Dict[str, str]], **options) -> Tuple[str, Optional[dict]]:
+        """
+        chat() plus the token usage the backend reported, as
+        {"prompt_tokens", "completion_tokens"}, or None if it reports none.
+        "partial_prompt": True marks a prompt count that leaves out cached
+        prefix tokens.
+        """
+        return self.chat(model, messages, **options), None
+
+    def context_window(self, model: str) -> Optional[int]:
+        """Input tokens the backend will accept for this model, from its metadata. None if unknown."""
+        return None
+
+    def warm(self, model: str, **options) -> Optional[dict]:
+        """
+        Loads the model ahead of the first request, with the same options
+        requests will use. Returns the backend's timings, or None where
+        there is nothing to load.
+        """
+        return None
+
+    def list_models(self) -> List[str]:
+        return []
+
+    def create_context_cache(self, model: str, system_prompt: str, ttl_seconds: int) -> Optional[Any]:
+        """
+        Uploads a stable prompt prefix to provider-side storage and returns a
+        handle for chat(..., cached_content=handle). None if unsupported.
+        """
+        return None
+
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini via google-generativeai. Expects genai.configure() to have run.
+    """
+    name = "gemini"
+    label = "Gemini"
+
+    def __init__(self, pool: ClientPool, timeout: Optional[float] = None):
+        self.pool = pool
+        self.timeout = timeout
+
+    def client(self, model: str):
+        return self.pool.get(("gemini", model), lambda: genai.GenerativeModel(model))
+
+    def chat(self, model, messages, **options):
+        return self.chat_with_usage(model, messages, **options)[0]
+
+    def chat_with_usage(self, model, messages, cached_content=None, **options):
+        response = self._generate(model, messages, cached_content)
+        metadata = getattr(response, "usage_metadata", None)
+        usage = None
+        if metadata is not None and getattr(metadata, "prompt_token_count", None):
+            usage = {"prompt_tokens": metadata.prompt_token_count,
+                     "completion_tokens": getattr(metadata, "candidates_token_count", 0) or 0}
+        return response.text, usage
+
+    def context_window(self, model):
+        return genai.get_model(model).input_token_limit
+
+    def _generate(self, model, messages, cached_content):
+        request_options = {"timeout": self.timeout} if self.timeout else None
+        if cached_content is None:
+            prompt = "\n\n".join(m["content"] for m in messages)
+            return self.client(model).generate_content(prompt, request_options=request_options)
+
+        # System prefix already lives in the cache; send only the turns. Caches are replaced as they
+        # expire, so their clients (cheap local wrappers) are not pooled
+        client = genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+        contents = [
+            {"role": "model" if m["role"] == "assistant" else "user", "parts": [m["content"]]}
+            for m in messages if m["role"] != "system"
+        ]
+        return client.generate_content(contents, request_options=request_options)
+
+    def create_context_cache(self, model, system_prompt, ttl_seconds):
+        try:
+            from google.generativeai import caching
+            return caching.CachedContent.create(
+                model=model,
+                system_instruction=system_prompt,
+                ttl=datetime.timedelta(seconds=ttl_seconds),
+            )
+        except Exception as e:
+            # Too few tokens to cache, or model without caching support
+            print(f"Gemini context cache unavailable: {e}")
+            return None
+
+
+class OllamaProvider(LLMProvider):
+    """
+    Local or tunnelled Ollama server. host=None uses the library default.
+    """
+    name = "ollama"
+    label = "Ollama"
+
+    def __init__(self, pool: ClientPool, host: Optional[str] = None, timeout: Optional[float] = None,
+                 num_ctx: Optional[int] = OLLAMA_NUM_CTX):
+        self.pool = pool
+        self.host = host
+        self.timeout = timeout
+        self.num_ctx = num_ctx
+
+    @property
+    def client(self):
+        host, timeout = self.host, self.timeout
+        return self.pool.get(("ollama", host), lambda: ollama.Client(host=host, timeout=timeout))
+
+    def list_models(self):
+        models_response = self.client.list()
+
+        # Handle response structure (dict vs object)
+        if hasattr(models_response, 'models'):
+            # Newer ollama library returns an object with .models
+            model_list = models_response.models
+        else:
+            # Older library or raw dict
+            model_list = models_response.get('models', [])
+
+        # Extract model names safely
+        names = []
+        for m in model_list:
+            if hasattr(m, 'model'):
+                names.append(m.model)
+            elif hasattr(m, 'name'):
+                names.append(m.name)
+            elif isinstance(m, dict):
+                names.append(m.get('model') or m.get('name'))
+        return names
+
+    def chat(self, model, messages, **options):
+        return self.chat_with_usage(model, messages, **options)[0]
+
+    def chat_with_usage(self, model, messages, **options):
+        response = self.client.chat(model=model, messages=messages, **options)
+        usage = None
+        if _response_field(response, "prompt_eval_count") or _response_field(response, "eval_count"):
+            # Excludes prompt tokens reused from the KV cache
+            usage = {"prompt_tokens": _response_field(response, "prompt_eval_count"),
+                     "completion_tokens": _response_field(response, "eval_count") or 0,
+                     "partial_prompt": True}
+            usage.update(self._timings(response))
+        return response['message']['content'], usage
+
+    def warm(self, model, **options):
+        # An empty prompt only loads the model (and pins it for keep_alive)
+        return self._timings(self.client.generate(model=model, prompt="", **options))
+
+    @staticmethod
+    def _timings(response) -> dict:
+        """Ollama's durations (nanoseconds) in seconds: model load, prompt evaluation, generation."""
+        fields = {"load_seconds": "load_duration", "prompt_eval_seconds": "prompt_eval_duration",
+                  "eval_seconds": "eval_duration"}
+        return {key: (_response_field(response, field) or 0) / 1e9 for key, field in fields.items()}
+
+    def context_window(self, model):
+        """
+        The num_ctx this model runs with: num_ctx when set (it is sent with
+        every request), else the Modelfile's num_ctx parameter, else the
+        server default; capped by the model's trained context length.
+        """
+        info = self.client.show(model)
+        limit = None
+        for key, value in (_response_field(info, "modelinfo") or {}).items():
+            if key.endswith(".context_length"):
+                limit = int(value)
+        num_ctx = OLLAMA_DEFAULT_NUM_CTX
+        for line in (_response_field(info, "parameters") or "").splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[0] == "num_ctx":
+                num_ctx = int(parts[1])
+        num_ctx = self.num_ctx or num_ctx
+        return min(num_ctx, limit) if limit else num_ctx
+
+
+class StubError(RuntimeError):
+    """Injected failure raised by StubProvider."""
+
+
+class StubProvider(LLMProvider):
+    """
+    Deterministic in-process backend for tests and benchmarks.
+
+    Latency, failures and reply text are derived from a hash of
+    (seed, model, prompt), so the same request always behaves the same way
+    regardless of thread scheduling.
+
+    distribution: 'fixed' (latency_ms), 'uniform' (latency_ms +/- spread_ms)
+                  or 'lognormal' (median latency_ms, sigma)
+    prefill_ms_per_1k: extra latency per 1,000 prompt tokens not covered by
+                  a recently seen prompt prefix, mimicking a KV cache.
+    load_ms:      model load time, paid by the first request once a model has
+                  been idle past its keep_alive (or by warm()), like Ollama.
+                  With it set, replies report Ollama-style timings.
+    context_tokens: context window to report, e.g. Ollama's num_ctx; None
+                  leaves it to the provider default.
+    """
+    name = "stub"
+    label = "Stub"
+
+    FILLER = (
+        "This clause sets out what each party must do, what happens if they do not, "
+        "and how disputes are handled. Review the notice period and liability cap carefully. "
+    )
+
+    def __init__(self, distribution: str = "fixed", latency_ms: float = 50.0, spread_ms: float = 0.0,
+                 sigma: float = 0.5, error_rate: float = 0.0, response_chars: int = 240, seed: int = 0,
+                 prefill_ms_per_1k: float = 0.0, load_ms: float = 0.0,
+                 context_tokens: Optional[int] = None, name: str = "stub"):
+        if distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unsupported latency distribution: {distribution}")
+        self.distribution = distribution
+        self.latency_ms = latency_ms
+        self.spread_ms = spread_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.response_chars = response_chars
+        self.seed = seed
+        self.prefill_ms_per_1k = prefill_ms_per_1k
+        self.load_ms = load_ms
+        self.context_tokens = context_tokens
+        self.name = name
+        self._lock = threading.Lock()
+        self._recent_prompts = deque(maxlen=8)
+        self._ready_at: Dict[str, float] = {}  # model -> when its load finishes
+        self._expires_at: Dict[str, float] = {}  # model -> when keep_alive unloads it
+        self._clock_offset = 0.0
+        self.calls = 0
+        self.errors = 0
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "StubProvider":
+        """
+        Builds a stub from 'key=value,key=value', e.g. 'distribution=lognormal,latency_ms=80'.
+        """
+        kwargs = {}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            key, _, value = item.partition("=")
+            if key in ("distribution", "name"):
+                kwargs[key] = value
+            elif key in ("response_chars", "seed", "context_tokens"):
+                kwargs[key] = int(value)
+            else:
+                kwargs[key] = float(value)
+        return cls(**kwargs)
+
+    def _rng(self, model, messages) -> random.Random:
+        digest = hashlib.sha256(f"{self.seed}|{model}|".encode("utf-8"))
+        for m in messages:
+            digest.update(m["content"].encode("utf-8"))
+        return random.Random(digest.digest())
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Returns a latency in seconds."""
+        if self.distribution == "uniform":
+            ms = rng.uniform(self.latency_ms - self.spread_ms, self.latency_ms + self.spread_ms)
+        elif self.distribution == "lognormal":
+            ms = rng.lognormvariate(0.0, self.sigma) * self.latency_ms
+        else:
+            ms = self.latency_ms
+        return max(ms, 0.0) / 1000.0
+
+    def _prefill_seconds(self, messages) -> float:
+        if not self.prefill_ms_per_1k:
+            return 0.0
+        prompt = "\x00".join(m["content"] for m in messages)
+        with self._lock:
+            cached = max((len(os.path.commonprefix([prompt, seen])) for seen in self._recent_prompts), default=0)
+            self._recent_prompts.append(prompt)
+        uncached_tokens = (len(prompt) - cached) / 4
+        return uncached_tokens / 1000 * self.prefill_ms_per_1k / 1000.0
+
+    def advance(self, seconds: float):
+        """Moves the stub's clock forward, e.g. to simulate a user idle past a keep_alive."""
+        with self._lock:
+            self._clock_offset += seconds
+
+    def _load_seconds(self, model, keep_alive) -> float:
+        """Time this request waits for the model to load; also renews its keep_alive."""
+        if not self.load_ms:
+            return 0.0
+        now = time.monotonic() + self._clock_offset
+        ttl = keep_alive_seconds(keep_alive if keep_alive is not None else "5m")
+        with self._lock:
+            if model not in self._ready_at or self._expires_at[model] < now:
+                self._ready_at[model] = now + self.load_ms / 1000.0
+            wait = max(0.0, self._ready_at[model] - now)
+            self._expires_at[model] = float("inf") if ttl is None else now + wait + ttl
+        return wait
+
+    def warm(self, model, keep_alive=None, **options):
+        load = self._load_seconds(model, keep_alive)
+        time.sleep(load)
+        return {"load_seconds": load, "prompt_eval_seconds": 0.0, "eval_seconds": 0.0}
+
+    def chat_with_usage(self, model, messages, keep_alive=None, options=None, **rest):
+        load = self._load_seconds(model, keep_alive)
+        time.sleep(load)
+        start = time.monotonic()
+        text = self.chat(model, messages, **rest)
+        num_predict = (options or {}).get("num_predict")
+        if num_predict:
+            text = text[:num_predict * 4]
+        if not self.load_ms:
+            return text, None
+        return text, {"prompt_tokens": None, "completion_tokens": len(text) // 4, "load_seconds": load,
+                      "prompt_eval_seconds": 0.0, "eval_seconds": time.monotonic() - start}
+
+    def chat(self, model, messages, **options):
+        rng = self._rng(model, messages)
+        time.sleep(self.sample_latency(rng) + self._prefill_seconds(messages))
+
+        failed = rng.random() < self.error_rate
+        with self._lock:
+            self.calls += 1
+            if failed:
+                self.errors += 1
+        if failed:
+            raise StubError("injected stub failure")
+
+        text = f"[{model}] "
+        while len(text) < self.response_chars:
+            text += self.FILLER
+        return text[:self.response_chars]
+
+    def context_window(self, model):
+        return self.context_tokens
+
+    def list_models(self):
+        return [self.name]
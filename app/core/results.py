@@ -0,0 +1,83 @@
+import sys
+from typing import Any, Dict
+
+from app.core.parsing import ClauseParser
+
+
+class ClauseRecord:
+    """
+    One analysed clause. The text is not copied: it is a (start, end) span
+    into the document's full text, which every clause of an analysis
+    shares. Supports the dict-style access (clause["risk"], .get) the
+    pipeline and dashboard were written against.
+    """
+    __slots__ = ("_doc", "start", "end", "id", "type", "risk", "risk_reason", "precedent",
+                 "explanation", "remedy", "ai_skipped")
+
+    FIELDS = ("id", "text", "type", "risk", "risk_reason", "precedent", "explanation", "remedy", "ai_skipped")
+
+    def __init__(self, doc: str, start: int, end: int, clause_id: str, clause_type: str = "",
+                 risk: str = "", risk_reason: str = ""):
+        self._doc = doc
+        self.start = start
+        self.end = end
+        self.id = clause_id
+        self.type = clause_type
+        self.risk = risk
+        self.risk_reason = risk_reason
+        self.precedent = None  # (precedent id, similarity) of the nearest reference clause
+        self.explanation = None
+        self.remedy = None
+        self.ai_skipped = None
+
+    @property
+    def text(self) -> str:
+        return ClauseParser.span_text(self._doc, self.start, self.end)
+
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        if key == "ai_skipped" and self.ai_skipped is None:
+            self.ai_skipped = {}
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value):
+        if key == "text" or key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS
+
+    def get(self, key: str, default=None):
+        if key not in self.FIELDS:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def keys(self):
+        return self.FIELDS
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self.FIELDS}
+
+    def nbytes(self) -> int:
+        """Memory held by this record alone (the shared text is not counted)."""
+        size = sys.getsizeof(self)
+        for value in (self.explanation, self.remedy, self.risk_reason):
+            if value:
+                size += sys.getsizeof(value)
+        if self.ai_skipped:
+            size += sys.getsizeof(self.ai_skipped)
+        return size
+
+
+def estimate_bytes(results: dict) -> int:
+    """Approximate memory held by one analysis."""
+    clauses = results.get("clauses", [])
+    size = sys.getsizeof(results.get("full_text", ""))
+    size += sum(clause.nbytes() if isinstance(clause, ClauseRecord) else sys.getsizeof(str(clause)) for clause in clauses)
+    size += 8 * 4 * len(clauses)  # Index position lists (risk, type, section, walkthrough)
+    for key in ("ai_summary", "comprehensive_summary"):
+        size += sys.getsizeof(results.get(key) or "")
+    return size
@@ -1,5 +1,7 @@
 from typing import Tuple
 
+RISK_ORDER = {"Low": 0, "Medium": 1, "High": 2}
+
 class RiskEngine:
     
     # Generic simplistic rules for demo
@@ -33,3 +35,13 @@ class RiskEngine:
                     risk_reason = rule["reason"]
         
         return highest_risk, risk_reason
+
+    @staticmethod
+    def escalate(current: Tuple[str, str], signal: Tuple[str, str]) -> Tuple[str, str]:
+        """
+        Combines the keyword result with another (level, reason) signal.
+        Signals can only raise the risk level, never lower it.
+        """
+        if RISK_ORDER.get(signal[0], 0) > RISK_ORDER.get(current[0], 0):
+            return signal
+        return current
@@ -0,0 +1,277 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Tuple, Union
+
+from app.core.providers import LLMProvider
+from app.core.tokens import token_estimator, usage_ledger
+
+# Default per-backend timeouts in seconds (reasoning models on Ollama are slow)
+DEFAULT_TIMEOUTS = {"gemini": 30.0, "ollama": 120.0, "stub": 10.0}
+FALLBACK_TIMEOUT = 60.0
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when no backend produced an answer in time."""
+
+
+class BackendStats:
+    """
+    Rolling window of call latencies and outcomes for one backend.
+    """
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)  # successful calls only
+        self._outcomes = deque(maxlen=window)  # True = success
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self._outcomes.append(ok)
+            if ok:
+                self._latencies.append(latency)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            values = sorted(self._latencies)
+        if not values:
+            return None
+        index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+        return values[index]
+
+    @property
+    def samples(self) -> int:
+        return len(self._latencies)
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            outcomes = list(self._outcomes)
+        if not outcomes:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures; after `cooldown` seconds a
+    single trial call is let through (half-open) and its outcome decides
+    whether the circuit closes again.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release(self):
+        """Frees the trial slot of a call that was cancelled before it ran, without counting an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record(self, ok: bool):
+        with self._lock:
+            self._trial_in_flight = False
+            if ok:
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.threshold:
+                # Failed trial re-opens; too many failures opens
+                self._opened_at = time.monotonic()
+
+
+class LLMRouter:
+    """
+    Routes a request over an ordered list of (provider, model) candidates.
+
+    * The first candidate whose circuit allows it is called.
+    * If it is still running after its rolling p95 latency (or half its
+      timeout before enough samples exist), one hedged duplicate is sent to
+      the next candidate and whichever answers first wins.
+    * Failures fail over to the next candidate immediately.
+    * Every backend call is bounded by that backend's timeout, counted
+      from when a worker starts it. Abandoned calls still waiting for a
+      worker are cancelled, so they never reach the backend.
+    """
+
+    def __init__(self, providers: Dict[str, LLMProvider], timeouts: Optional[Dict[str, float]] = None,
+                 max_workers: int = 32, min_samples: int = 20):
+        self.providers = providers
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.min_samples = min_samples
+        self.stats: Dict[str, BackendStats] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-router")
+
+    def timeout_for(self, name: str) -> float:
+        return self.timeouts.get(name, FALLBACK_TIMEOUT)
+
+    def _stats(self, name: str) -> BackendStats:
+        with self._lock:
+            return self.stats.setdefault(name, BackendStats())
+
+    def _breaker(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            return self.breakers.setdefault(name, CircuitBreaker())
+
+    def hedge_delay(self, name: str) -> float:
+        stats = self._stats(name)
+        p95 = stats.percentile(95) if stats.samples >= self.min_samples else None
+        return p95 if p95 is not None else self.timeout_for(name) / 2
+
+    def _invoke(self, name: str, model: str, messages, options: dict, stage: Optional[str] = None,
+                started: Optional[list] = None) -> str:
+        start = time.monotonic()
+        if started is not None:
+            started.append(start)  # The timeout runs from here, not from submit: queueing for a worker is free
+        ok = False
+        text, usage = None, None
+        try:
+            text, usage = self.providers[name].chat_with_usage(model, messages, **options)
+            ok = time.monotonic() - start <= self.timeout_for(name)
+            return text
+        finally:
+            latency = time.monotonic() - start
+            self._stats(name).record(latency, ok)
+            self._breaker(name).record(ok)
+            self._record_usage(name, model, stage, messages, text, usage, latency, ok)
+
+    @staticmethod
+    def _record_usage(name, model, stage, messages, text, usage, latency, ok):
+        """
+        Ledger entry for one backend call. Reported prompt counts calibrate
+        the token estimator; a partial count (Ollama leaves out prefix
+        tokens served from its KV cache) is only a lower bound, so it can
+        raise the estimate but never lower it. Backend timings (Ollama's
+        load and eval seconds) are kept alongside.
+        """
+        prompt = "\n\n".join(m["content"] for m in messages)
+        estimated = token_estimator.count(prompt, name, model)
+        reported = (usage or {}).get("prompt_tokens")
+        partial = bool((usage or {}).get("partial_prompt"))
+        if reported:
+            token_estimator.calibrate(name, model, prompt, reported, lower_bound=partial)
+        prompt_tokens = max(reported, estimated) if reported and partial else (reported or estimated)
+        completion = (usage or {}).get("completion_tokens")
+        if completion is None:
+            completion = token_estimator.count(text, name, model) if text else 0
+        timings = {key: value for key, value in (usage or {}).items() if key.endswith("_seconds")}
+        usage_ledger.record(provider=name, model=model, stage=stage, prompt_tokens=prompt_tokens,
+                            evaluated_tokens=reported, completion_tokens=completion,
+                            estimated=not reported or partial, latency=latency, ok=ok, **timings)
+
+    def call(self, candidates: List[Tuple[str, str]], messages, hedge: bool = True,
+             options: Optional[Dict[Union[str, Tuple[str, str]], dict]] = None,
+             stage: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Returns (reply text, provider name). Raises LLMUnavailableError when
+        every candidate failed, timed out or had its circuit open.
+        options maps provider name, or (provider name, model) for options
+        that hold for one model only, -> extra keyword arguments for its chat().
+        stage labels the calls in the usage ledger.
+        """
+        options = options or {}
+        queue = [(name, model) for name, model in candidates if name in self.providers]
+        pending = {}  # future -> (name, [time _invoke started], empty while queued for a worker)
+        errors = []
+        hedged = False
+
+        def launch() -> bool:
+            while queue:
+                name, model = queue.pop(0)
+                if not self._breaker(name).allow():
+                    errors.append(f"{name}: circuit open")
+                    continue
+                started = []
+                kwargs = {**options.get(name, {}), **options.get((name, model), {})}
+                future = self._pool.submit(self._invoke, name, model, messages, kwargs, stage, started)
+                pending[future] = (name, started)
+                return True
+            return False
+
+        def abandon(future):
+            # Still queued: never runs. Running: the client-level timeout ends the thread
+            name, _ = pending.pop(future)
+            if future.cancel():
+                self._breaker(name).release()  # A half-open trial that never ran must not hold the slot
+
+        launch()
+        while pending:
+            now = time.monotonic()
+            starts = {future: started[0] if started else now for future, (_, started) in pending.items()}
+            first_name = next(iter(pending.values()))[0]
+            first_start = next(iter(starts.values()))
+            wake_times = [starts[future] + self.timeout_for(name) for future, (name, _) in pending.items()]
+            if hedge and not hedged and queue:
+                wake_times.append(first_start + self.hedge_delay(first_name))
+            done, _ = wait(list(pending), timeout=max(0.0, min(wake_times) - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name, _ = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{name}: {e}")
+                    continue
+                for loser in list(pending):
+                    abandon(loser)
+                return result, name
+
+            now = time.monotonic()
+            for future, (name, started) in list(pending.items()):
+                if started and now - started[0] >= self.timeout_for(name):
+                    abandon(future)
+                    errors.append(f"{name}: timed out after {self.timeout_for(name):.0f}s")
+
+            if not pending:
+                launch()  # Fail over
+            elif hedge and not hedged and queue and now - first_start >= self.hedge_delay(first_name):
+                hedged = launch()
+
+        raise LLMUnavailableError("; ".join(errors) or "No LLM backend available.")
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Current health per backend, for display and benchmarks."""
+        report = {}
+        for name in self.providers:
+            stats = self._stats(name)
+            report[name] = {
+                "p50": stats.percentile(50),
+                "p95": stats.percentile(95),
+                "error_rate": stats.error_rate,
+                "samples": stats.samples,
+                "circuit": self._breaker(name).state,
+                "timeout": self.timeout_for(name),
+            }
+        return report
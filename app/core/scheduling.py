@@ -0,0 +1,154 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field as dataclass_field
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from app.core.llm import LLMConfig
+from app.core.tokens import token_estimator, EXPECTED_OUTPUT_TOKENS
+
+# Task outcomes
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# Skip reasons shown to the user
+REASON_DEADLINE = "time limit reached"
+REASON_BUDGET = "token budget exhausted"
+
+# Lower runs first
+PRIORITY_HIGH_REMEDY = 0
+PRIORITY_HIGH_EXPLANATION = 1
+PRIORITY_SUMMARY = 2
+PRIORITY_MEDIUM_REMEDY = 3
+PRIORITY_MEDIUM_EXPLANATION = 4
+PRIORITY_OBLIGATION = 5
+PRIORITY_RIGHT = 6
+PRIORITY_LONG_TEXT = 7
+
+
+def estimate_tokens(text: str, field_name: str, llm_config: Optional[LLMConfig] = None,
+                    max_prompt_tokens: Optional[int] = None) -> int:
+    """
+    Prompt + completion tokens for one task, counted for the config's
+    model. max_prompt_tokens caps the text part when the prompt will be
+    compacted to fit.
+    """
+    provider, model = (llm_config.provider, llm_config.model) if llm_config else (None, None)
+    prompt_tokens = token_estimator.count(text, provider, model)
+    if max_prompt_tokens is not None:
+        prompt_tokens = min(prompt_tokens, max_prompt_tokens)
+    return prompt_tokens + 200 + EXPECTED_OUTPUT_TOKENS.get(field_name, 300)
+
+
+def clause_priority(clause: dict, field_name: str) -> Optional[int]:
+    """
+    Priority for enriching one clause field, or None if it should not be
+    sent to the LLM at all.
+    """
+    risk, clause_type = clause["risk"], clause["type"]
+    if field_name == "remedy":
+        return {"High": PRIORITY_HIGH_REMEDY, "Medium": PRIORITY_MEDIUM_REMEDY}.get(risk)
+    if risk == "High":
+        return PRIORITY_HIGH_EXPLANATION
+    if risk == "Medium":
+        return PRIORITY_MEDIUM_EXPLANATION
+    if clause_type in ("Obligation", "Prohibition"):
+        return PRIORITY_OBLIGATION
+    if clause_type == "Right":
+        return PRIORITY_RIGHT
+    if len(clause["text"].split()) > 30:
+        return PRIORITY_LONG_TEXT
+    return None
+
+
+@dataclass(order=True)
+class EnrichmentTask:
+    """
+    One LLM call. clause_index is None for document-level work (summaries).
+    duplicates are further clauses that receive the same output.
+    """
+    priority: int
+    seq: int
+    field: str = dataclass_field(compare=False)
+    clause_index: Optional[int] = dataclass_field(compare=False)
+    est_tokens: int = dataclass_field(compare=False)
+    run: Callable[[], Optional[str]] = dataclass_field(compare=False, repr=False)
+    duplicates: Tuple[int, ...] = dataclass_field(default=(), compare=False)
+
+
+class EnrichmentScheduler:
+    """
+    Runs enrichment tasks in priority order with llm_config.concurrency
+    workers, within llm_config.deadline_s and llm_config.token_budget.
+
+    Tasks that do not fit are reported as skipped rather than run, so the
+    caller can return partial results and enrich them later on demand.
+    At the deadline, queued tasks are cancelled, but tasks already running
+    are not: they are reported as skipped while their LLM calls carry on
+    in the background (bounded by the router's timeouts) and their output
+    is discarded.
+    """
+
+    def __init__(self, llm_config: LLMConfig):
+        self.config = llm_config
+        self.stats = {}
+
+    def stream(self, tasks: List[EnrichmentTask]) -> Iterator[Tuple[EnrichmentTask, str, Optional[str]]]:
+        """
+        Yields (task, status, output-or-skip-reason) as tasks finish or are
+        skipped. Completed tasks arrive in completion order. self.stats holds
+        running counts per status plus tokens reserved and elapsed seconds.
+        """
+        start = time.monotonic()
+        self.stats = {DONE: 0, FAILED: 0, SKIPPED: 0, "scheduled": len(tasks), "tokens_reserved": 0, "seconds": 0.0}
+        for task, status, output in self._schedule(tasks):
+            self.stats[status] += 1
+            if status != SKIPPED:
+                self.stats["tokens_reserved"] += task.est_tokens
+            self.stats["seconds"] = time.monotonic() - start
+            yield task, status, output
+
+    def _schedule(self, tasks):
+        start = time.monotonic()
+        budget = self.config.token_budget
+        admitted, used = [], 0
+        for task in sorted(tasks):
+            if budget is not None and used + task.est_tokens > budget:
+                yield task, SKIPPED, REASON_BUDGET
+                continue
+            used += task.est_tokens
+            admitted.append(task)
+
+        if not admitted:
+            return
+
+        pool = ThreadPoolExecutor(max_workers=max(1, self.config.concurrency), thread_name_prefix="enrich")
+        futures = {pool.submit(task.run): task for task in admitted}
+        reported = set()
+        deadline = self.config.deadline_s
+        try:
+            remaining = None if deadline is None else max(0.0, deadline - (time.monotonic() - start))
+            for future in as_completed(futures, timeout=remaining):
+                reported.add(future)
+                yield self._outcome(futures[future], future)
+        except FutureTimeout:
+            for future, task in futures.items():
+                if future in reported:
+                    continue
+                if future.done():
+                    yield self._outcome(task, future)
+                else:
+                    future.cancel()
+                    yield task, SKIPPED, REASON_DEADLINE
+        finally:
+            # Queued calls are dropped; in-flight ones finish in the background
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _outcome(task, future):
+        try:
+            output = future.result()
+        except Exception as e:
+            print(f"Enrichment task failed: {e}")
+            output = None
+        return task, (DONE if output is not None else FAILED), output
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import PROCESSED_DIR, PIPELINE_VERSION, RESULTS_MEMORY_BUDGET_MB, ENRICHMENT_CLAIM_SECONDS
+from app.core.parsing import ClauseParser
+from app.core.classification import ClauseClassifier
+from app.core.risk import RiskEngine
+from app.core.ner import EntityExtractor
+from app.core.precedents import precedent_library
+from app.core.results import ClauseRecord, estimate_bytes
+from app.core.uploads import Upload
+
+STORE_PATH = PROCESSED_DIR / "results.db"
+
+# Clause columns kept in the body blob, in ClauseRecord attribute order
+CLAUSE_COLUMNS = ("start", "end", "id", "type", "risk", "risk_reason", "precedent", "explanation", "remedy", "ai_skipped")
+
+# Everything except the full text and clauses, loadable on its own
+SUMMARY_FIELDS = ("metadata", "entities", "risk_summary", "ai_summary", "comprehensive_summary",
+                  "timings", "enrichment", "dedup", "ai_pending", "llm_config")
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(repr(value).encode()).hexdigest()[:12]
+
+
+# Any change to the rule tables or precedents changes the deterministic report, so it invalidates stored results
+RULES_VERSION = _digest((ClauseParser.CLAUSE_PATTERNS, ClauseClassifier.PATTERNS,
+                         RiskEngine.RISK_RULES, EntityExtractor.PATTERNS, precedent_library.version))
+
+
+def content_hash(data) -> str:
+    """Identifies a document by its uploaded bytes; a spooled Upload already hashed them."""
+    if isinstance(data, Upload):
+        return data.sha256
+    return hashlib.sha256(data).hexdigest()
+
+
+def result_key(data, enable_ai: bool, llm_config=None) -> str:
+    """
+    Store key for one document analysed one way: content hash plus the
+    pipeline, rules and (when AI is on) model versions that produced it.
+    """
+    return f"{content_hash(data)}-p{PIPELINE_VERSION}-r{RULES_VERSION}-m{_model_tag(enable_ai, llm_config)}"
+
+
+def rekey(key: str, llm_config) -> str:
+    """The key for the same document and versions, enriched with llm_config."""
+    return f"{key.rsplit('-m', 1)[0]}-m{_model_tag(True, llm_config)}"
+
+
+def _model_tag(enable_ai: bool, llm_config) -> str:
+    model = f"{llm_config.provider}/{llm_config.model}/{llm_config.mode}" if enable_ai and llm_config else "none"
+    return _digest(model)[:8]
+
+
+def _pack(value) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode(), 6)
+
+
+def _unpack(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+
+class ResultStore:
+    """
+    Analysis results persisted in SQLite under PROCESSED_DIR, so a contract
+    analysed before (in another tab, or before a restart) reloads without
+    re-running the pipeline or any LLM call.
+
+    Each row holds risk counts as plain columns, a compressed summary blob
+    and a compressed body blob (full text plus clauses stored column-wise),
+    so listings and summaries never decompress clause bodies.
+    """
+
+    def __init__(self, path: Path = STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                filename TEXT,
+                saved_at REAL NOT NULL,
+                clause_count INTEGER NOT NULL,
+                high INTEGER NOT NULL,
+                medium INTEGER NOT NULL,
+                low INTEGER NOT NULL,
+                summary BLOB NOT NULL,
+                body BLOB NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_saved ON results(saved_at)")
+        self._conn.commit()
+
+    def save(self, key: str, results: dict):
+        clauses = results["clauses"]
+        columns = {name: [getattr(c, name) for c in clauses] for name in CLAUSE_COLUMNS}
+        body = {"full_text": results.get("full_text", ""), "clauses": columns, "index": results.get("index")}
+        summary = {name: results.get(name) for name in SUMMARY_FIELDS}
+        risk = results["risk_summary"]
+        row = (key, key.split("-", 1)[0], results["metadata"].get("filename"), time.time(), len(clauses),
+               risk.get("High", 0), risk.get("Medium", 0), risk.get("Low", 0), _pack(summary), _pack(body))
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+            self._conn.commit()
+
+    def load(self, key: str) -> Optional[dict]:
+        """Full results for key, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT summary, body FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        results = _unpack(row[0])
+        body = _unpack(row[1])
+        full_text = body["full_text"]
+        columns = body["clauses"]
+        clauses = []
+        for values in zip(*(columns[name] for name in CLAUSE_COLUMNS)):
+            start, end, clause_id, clause_type, risk, reason, precedent, explanation, remedy, skipped = values
+            clause = ClauseRecord(full_text, start, end, clause_id, clause_type, risk, reason)
+            clause.precedent = tuple(precedent) if precedent else None
+            clause.explanation, clause.remedy, clause.ai_skipped = explanation, remedy, skipped
+            clauses.append(clause)
+        results["full_text"] = full_text
+        results["clauses"] = clauses
+        if body.get("index"):
+            results["index"] = body["index"]
+        return {k: v for k, v in results.items() if v is not None}
+
+    def load_summary(self, key: str) -> Optional[dict]:
+        """Summary fields and risk counts for key, without the text or clauses."""
+        with self._lock:
+            row = self._conn.execute("SELECT summary, clause_count FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        summary = _unpack(row[0])
+        summary["clause_count"] = row[1]
+        return summary
+
+    def recent(self, limit: int = 10) -> List[Dict[str, object]]:
+        """Most recently saved analyses, from the plain columns only."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, filename, saved_at, clause_count, high, medium, low FROM results "
+                "ORDER BY saved_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {"key": key, "filename": filename, "saved_at": saved_at, "clause_count": count,
+             "risk_summary": {"High": high, "Medium": medium, "Low": low}}
+            for key, filename, saved_at, count, high, medium, low in rows
+        ]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._conn.commit()
+
+
+class ResultCache:
+    """
+    Process-wide home for analysis results, shared by all sessions.
+    Sessions keep only the key. Results are written through to the store;
+    when the total in memory exceeds the budget the least recently used
+    are dropped from memory and reloaded from the store on next access.
+    Dropped results are saved after the lock is released (so sessions
+    never wait on that disk write), and are still served from memory
+    until the save is done.
+
+    Every session viewing a key gets the same results dict, so only the
+    session holding claim(key) may write AI output into it; the others
+    redraw what it has written so far. Claimed results are never dropped,
+    since a reload would not be the dict the enriching session writes to.
+    """
+
+    def __init__(self, budget_bytes: int, store: ResultStore):
+        self.budget_bytes = budget_bytes
+        self.store = store
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._owners: Dict[str, tuple] = {}  # key -> (owner, last claimed at)
+        self._spilling: Dict[str, dict] = {}  # key -> dropped results not saved yet
+        self.evictions = 0
+
+    def put(self, key: str, results: dict):
+        """Stores results, or saves and re-measures them after enrichment."""
+        self.store.save(key, results)
+        with self._lock:
+            evicted = self._insert(key, results)
+        self._spill(evicted)
+
+    def get(self, key: str) -> Optional[dict]:
+        """Results for key from memory or the store. None if never saved."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            results = self._spilling.get(key)
+            evicted = self._insert(key, results) if results is not None else []
+        if results is None:
+            results = self.store.load(key)
+            if results is not None:
+                with self._lock:
+                    evicted = self._insert(key, results)
+        self._spill(evicted)
+        return results
+
+    def claim(self, key: str, owner: str) -> bool:
+        """
+        Makes owner the one writer of AI output for key, or renews its
+        claim. False while another owner holds a claim renewed within
+        ENRICHMENT_CLAIM_SECONDS (a session that went away stops renewing).
+        """
+        now = time.monotonic()
+        with self._lock:
+            holder = self._owners.get(key)
+            if holder is not None and holder[0] != owner and now - holder[1] < ENRICHMENT_CLAIM_SECONDS:
+                return False
+            self._owners[key] = (owner, now)
+            return True
+
+    def release(self, key: str, owner: str):
+        with self._lock:
+            if self._owners.get(key, (None,))[0] == owner:
+                del self._owners[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"resident": len(self._entries), "bytes": self._bytes,
+                    "budget": self.budget_bytes, "evictions": self.evictions}
+
+    def _insert(self, key: str, results: dict) -> List[tuple]:
+        """Adds results under the lock; returns the (key, results) dropped to stay in budget."""
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        size = estimate_bytes(results)
+        self._entries[key] = (results, size)
+        self._bytes += size
+        now = time.monotonic()
+        evicted = []
+        for old_key in list(self._entries):
+            if self._bytes <= self.budget_bytes:
+                break
+            holder = self._owners.get(old_key)
+            # Never evict the entry just used (even if it alone exceeds the budget) or one being enriched
+            if old_key == key or (holder is not None and now - holder[1] < ENRICHMENT_CLAIM_SECONDS):
+                continue
+            old_results, old_size = self._entries.pop(old_key)
+            self._bytes -= old_size
+            self.evictions += 1
+            self._spilling[old_key] = old_results
+            evicted.append((old_key, old_results))
+        return evicted
+
+    def _spill(self, evicted: List[tuple]):
+        # Keep AI output generated since the last put
+        for old_key, old_results in evicted:
+            try:
+                self.store.save(old_key, old_results)
+            except Exception as e:
+                print(f"Failed to save evicted results {old_key}: {e}")
+            with self._lock:
+                if self._spilling.get(old_key) is old_results:
+                    del self._spilling[old_key]
+
+
+results_store = ResultStore()
+result_cache = ResultCache(RESULTS_MEMORY_BUDGET_MB * 1024 * 1024, results_store)
@@ -0,0 +1,282 @@
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Sequence, Tuple
+
+from app.core.config import USAGE_LEDGER_ENTRIES
+
+# Characters per token by script, per tokenizer family. Latin counts include
+# the spaces between words. Small-vocabulary tokenizers fall back to UTF-8
+# bytes for Devanagari, so a Hindi character can cost more than one token.
+TOKENIZER_PROFILES = {
+    "gemini": {"latin": 4.0, "digit": 1.0, "punct": 1.6, "devanagari": 2.5, "other": 1.5},  # SentencePiece, 256k
+    "llama3": {"latin": 4.2, "digit": 3.0, "punct": 1.6, "devanagari": 1.4, "other": 1.0},  # tiktoken BPE, 128k
+    "qwen": {"latin": 4.0, "digit": 1.0, "punct": 1.6, "devanagari": 1.0, "other": 1.0},  # byte BPE, 151k
+    "sentencepiece32k": {"latin": 3.6, "digit": 1.0, "punct": 1.2, "devanagari": 0.6, "other": 0.5},  # Mistral/Llama 2
+    "default": {"latin": 4.0, "digit": 1.5, "punct": 1.5, "devanagari": 1.0, "other": 1.0},
+}
+
+# Matched in order against the lower-cased model name
+MODEL_FAMILIES = [
+    ("gemini", "gemini"), ("gemma", "gemini"),
+    ("llama3", "llama3"), ("llama-3", "llama3"),
+    ("qwen", "qwen"), ("deepseek", "qwen"),  # deepseek-r1 distills are mostly Qwen-based
+    ("mistral", "sentencepiece32k"), ("mixtral", "sentencepiece32k"), ("llama", "sentencepiece32k"),
+]
+
+# Rough completion sizes per stage, reserved out of the context window and used for budget estimates
+EXPECTED_OUTPUT_TOKENS = {"explanation": 120, "remedy": 450, "ai_summary": 300, "comprehensive_summary": 600,
+                          "chat": 600}
+# Hard completion limits per stage (Ollama num_predict), so a rambling reply cannot hold a slot for minutes
+MAX_OUTPUT_TOKENS = {"explanation": 200, "remedy": 800, "ai_summary": 500, "comprehensive_summary": 1000,
+                     "chat": 1000}
+
+SCRIPT_PATTERNS = {
+    "latin": re.compile(r"[A-Za-z\s]"),
+    "digit": re.compile(r"[0-9]"),
+    "punct": re.compile(r"[!-/:-@\[-`{-~]"),
+    "devanagari": re.compile(r"[ऀ-ॿ꣠-ꣿ]"),
+}
+
+
+def script_counts(text: str) -> Dict[str, int]:
+    # Length lost by deleting a script's characters is its count, without building match lists
+    counts = {script: len(text) - len(pattern.sub("", text)) for script, pattern in SCRIPT_PATTERNS.items()}
+    counts["other"] = len(text) - sum(counts.values())
+    return counts
+
+
+def model_family(provider: Optional[str], model: Optional[str]) -> str:
+    name = f"{provider or ''}/{model or ''}".lower()
+    for needle, family in MODEL_FAMILIES:
+        if needle in name:
+            return family
+    return "default"
+
+
+class TokenEstimator:
+    """
+    Script-aware token counts per provider/model, without a tokenizer.
+
+    Each model starts from its family's characters-per-token profile.
+    Backends that report real prompt token counts (Gemini, Ollama) feed
+    calibrate(), which keeps a running correction factor per model.
+    Thread-safe.
+    """
+
+    def __init__(self, smoothing: float = 0.2):
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._correction: Dict[Tuple[str, str], float] = {}
+
+    def raw_count(self, text: str, provider: Optional[str] = None, model: Optional[str] = None) -> int:
+        profile = TOKENIZER_PROFILES[model_family(provider, model)]
+        counts = script_counts(text)
+        return int(sum(n / profile[script] for script, n in counts.items())) + 1
+
+    def count(self, text: str, provider: Optional[str] = None, model: Optional[str] = None) -> int:
+        with self._lock:
+            correction = self._correction.get((provider, model), 1.0)
+        return int(self.raw_count(text, provider, model) * correction) + 1
+
+    def chars_for(self, text: str, tokens: int, provider: Optional[str] = None, model: Optional[str] = None) -> int:
+        """How many leading characters of text fit in `tokens`, at its average density."""
+        total = self.count(text, provider, model)
+        if total <= tokens:
+            return len(text)
+        return max(0, int(len(text) * tokens / total))
+
+    def calibrate(self, provider: str, model: str, prompt: str, actual_tokens: int, lower_bound: bool = False):
+        """
+        Folds a backend-reported prompt token count into the model's
+        correction. lower_bound counts only ever raise it.
+        """
+        estimated = self.raw_count(prompt, provider, model)
+        if estimated <= 0 or actual_tokens <= 0:
+            return
+        ratio = actual_tokens / estimated
+        with self._lock:
+            previous = self._correction.get((provider, model))
+            if lower_bound and ratio <= (previous or 1.0):
+                return
+            self._correction[(provider, model)] = ratio if previous is None else \
+                previous + self.smoothing * (ratio - previous)
+
+    def corrections(self) -> Dict[str, float]:
+        with self._lock:
+            return {f"{p}/{m}": round(c, 3) for (p, m), c in self._correction.items()}
+
+
+class UsageLedger:
+    """
+    Per-call LLM usage: provider, model, pipeline stage, prompt and
+    completion tokens (reported by the backend when it does, estimated
+    otherwise), latency and outcome, plus model load and generation
+    time where the backend reports them. Keeps the most recent max_entries
+    calls. Hedged duplicates are recorded too, since they are paid for.
+    """
+
+    def __init__(self, max_entries: int = USAGE_LEDGER_ENTRIES):
+        self._lock = threading.Lock()
+        self.entries = deque(maxlen=max_entries)
+
+    def record(self, **entry):
+        entry.setdefault("time", time.time())
+        with self._lock:
+            self.entries.append(entry)
+
+    def summary(self, by: str = "stage", since: Optional[float] = None) -> Dict[str, dict]:
+        """Totals grouped by 'stage', 'model' or 'provider'."""
+        with self._lock:
+            entries = [e for e in self.entries if since is None or e["time"] >= since]
+        report: Dict[str, dict] = {}
+        for e in entries:
+            key = e.get(by) or "other"
+            row = report.setdefault(key, {"calls": 0, "failed": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                                          "estimated": 0, "seconds": 0.0, "load_seconds": 0.0, "max_load": 0.0,
+                                          "eval_tokens": 0, "eval_seconds": 0.0})
+            row["calls"] += 1
+            row["failed"] += not e["ok"]
+            row["prompt_tokens"] += e["prompt_tokens"]
+            row["completion_tokens"] += e["completion_tokens"]
+            row["estimated"] += e["estimated"]
+            row["seconds"] += e["latency"]
+            # Backend timings, when reported (Ollama): model load and generation
+            row["load_seconds"] += e.get("load_seconds") or 0.0
+            row["max_load"] = max(row["max_load"], e.get("load_seconds") or 0.0)
+            if e.get("eval_seconds"):
+                row["eval_tokens"] += e["completion_tokens"]
+                row["eval_seconds"] += e["eval_seconds"]
+        for row in report.values():
+            row["avg_latency"] = row["seconds"] / row["calls"]
+            row["tokens_per_second"] = row["eval_tokens"] / row["eval_seconds"] if row["eval_seconds"] else None
+        return report
+
+
+# Priority for clauses clause_priority would not enrich (definitions, boilerplate)
+PRIORITY_OTHER = 99
+
+# OCR and layout noise: runs of filler characters, page markers, lone page numbers
+_NOISE_LINE = re.compile(r"^\s*(?:[-_=.·•*~]{3,}|page\s+\d+(?:\s+of\s+\d+)?|\d{1,4}|[^\wऀ-ॿ]{1,3})\s*$",
+                         re.IGNORECASE)
+_SPACES = re.compile(r"[ \t ]+")
+_FILLER_RUN = re.compile(r"([-_=.·•*~])\1{3,}")
+
+
+def normalize_text(text: str, repeat_threshold: int = 3) -> str:
+    """
+    Collapses whitespace, drops OCR/layout noise lines and keeps only the
+    first copy of short lines repeated repeat_threshold or more times
+    (running headers, footers, signature blocks).
+    """
+    lines = []
+    for line in text.splitlines():
+        line = _FILLER_RUN.sub(r"\1\1\1", _SPACES.sub(" ", line)).strip()
+        if line and not _NOISE_LINE.match(line):
+            lines.append(line)
+
+    counts: Dict[str, int] = {}
+    for line in lines:
+        if len(line) <= 120:
+            counts[line] = counts.get(line, 0) + 1
+    seen = set()
+    kept = []
+    for line in lines:
+        if counts.get(line, 0) >= repeat_threshold:
+            if line in seen:
+                continue
+            seen.add(line)
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def pack_clauses(clauses: Sequence[dict], budget_tokens: int, estimator: TokenEstimator,
+                 provider: Optional[str] = None, model: Optional[str] = None) -> Tuple[str, dict]:
+    """
+    Chooses which clauses to include in a prompt of budget_tokens. Clauses
+    are admitted by priority (risk first, then obligations and rights,
+    then the rest); repeats of a near-duplicate clause only once every
+    distinct clause has had its turn. Chosen clauses keep their ids and
+    document order, with "[...]" where text was left out. Returns
+    (text, stats).
+    """
+    from app.core.dedup import cluster
+    from app.core.scheduling import clause_priority
+
+    order = []
+    groups = cluster(clauses)
+    for members in groups:
+        first = clauses[members[0]]
+        priority = min((p for p in (clause_priority(first, f) for f in ("remedy", "explanation")) if p is not None),
+                       default=PRIORITY_OTHER)
+        order.append((0, priority, members[0]))
+        order.extend((1, priority, position) for position in members[1:])
+    order.sort()
+
+    chosen, used = {}, 0
+    for _, _, position in order:
+        clause = clauses[position]
+        line = f"{clause['id']} {clause['text']}" if clause.get("id") else clause["text"]
+        cost = estimator.count(line, provider, model) + 1
+        if used + cost > budget_tokens:
+            continue
+        chosen[position] = line
+        used += cost
+
+    parts, omitted = [], False
+    for position in range(len(clauses)):
+        if position in chosen:
+            if omitted:
+                parts.append("[...]")
+            parts.append(chosen[position])
+            omitted = False
+        else:
+            omitted = True
+    if omitted:
+        parts.append("[...]")
+    stats = {"clauses": len(clauses), "distinct": len(groups), "kept": len(chosen), "tokens": used}
+    return "\n".join(parts), stats
+
+
+def compact(text: str, budget_tokens: int, estimator: TokenEstimator, provider: Optional[str] = None,
+            model: Optional[str] = None, clauses: Optional[Sequence[dict]] = None) -> Tuple[str, dict]:
+    """
+    Fits document text into budget_tokens for this provider/model:
+    normalises it, and if it is still too long packs whole clauses by
+    priority. clauses are the analysed clause records when available;
+    otherwise the text is parsed and risk-scored here. Returns
+    (text, stats) where stats records tokens before/after and the method.
+    """
+    original = estimator.count(text, provider, model)
+    normalized = normalize_text(text)
+    tokens = estimator.count(normalized, provider, model)
+    stats = {"original_tokens": original, "normalized_tokens": tokens, "method": "normalized"}
+    if tokens <= budget_tokens:
+        stats["tokens"] = tokens
+        return normalized, stats
+
+    if clauses is None:
+        from app.core.parsing import ClauseParser
+        from app.core.risk import RiskEngine
+        from app.core.classification import ClauseClassifier
+        clauses = []
+        for span in ClauseParser.parse_spans(normalized):
+            clause_text = ClauseParser.span_text(normalized, span["start"], span["end"])
+            risk, _ = RiskEngine.evaluate(clause_text)
+            clauses.append({"id": span["id"], "text": clause_text, "risk": risk,
+                            "type": ClauseClassifier.classify(clause_text)})
+
+    if len(clauses) > 1:
+        packed, pack_stats = pack_clauses(clauses, budget_tokens, estimator, provider, model)
+        stats.update(pack_stats, method="packed")
+        stats["tokens"] = estimator.count(packed, provider, model)
+        return packed, stats
+
+    cut = normalized[:estimator.chars_for(normalized, budget_tokens, provider, model)]
+    stats.update(method="truncated", tokens=estimator.count(cut, provider, model))
+    return cut, stats
+
+
+token_estimator = TokenEstimator()
+usage_ledger = UsageLedger()
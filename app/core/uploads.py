@@ -0,0 +1,223 @@
+import codecs
+import hashlib
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+from app.core.config import UPLOAD_DIR, UPLOAD_SPOOL_BYTES, UPLOAD_CHUNK_BYTES
+
+# Optional: guesses the encoding of TXT files that are not UTF-8
+try:
+    from charset_normalizer import from_bytes
+    CHARSET_DETECTION = True
+except ImportError:
+    CHARSET_DETECTION = False
+
+FALLBACK_ENCODING = "cp1252"  # Legacy Windows text, when detection is unavailable or unsure
+CHARSET_MIN_BYTES = 32  # Shorter samples are too little for charset detection to beat the fallback
+CHARSET_CHAOS_MARGIN = 0.05  # Detection must read the sample this much cleaner (mess ratio) than the fallback
+
+_BOMS = [(codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"), (codecs.BOM_UTF8, "utf-8-sig"),
+         (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")]
+
+
+class Upload:
+    """
+    An uploaded document, copied at most once.
+
+    Uploads already in memory (Streamlit's UploadedFile, BytesIO) up to
+    UPLOAD_SPOOL_BYTES are used in place through zero-copy views. Larger
+    ones, and plain file objects, are spooled in chunks to a temporary
+    file under UPLOAD_DIR, which readers open by path or memory-map; a
+    path can also be handed to another process. The SHA-256 is computed
+    on the way through. close() removes the spooled file.
+    """
+
+    def __init__(self, name: str, size: int, sha256: str, path: Optional[str] = None,
+                 file_obj=None, owns_path: bool = False):
+        self.name = name
+        self.size = size
+        self.sha256 = sha256
+        self.path = path
+        self._file_obj = file_obj
+        self._owns_path = owns_path
+        self._views = []
+
+    def view(self):
+        """Read-only bytes-like view of the whole document, without copying it."""
+        if self.path is None:
+            view = memoryview(self._file_obj.getvalue())
+        elif self.size == 0:
+            return b""
+        else:
+            with open(self.path, "rb") as f:
+                view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views.append(view)
+        return view
+
+    def stream(self):
+        """Binary file object positioned at the start; opened per call for spooled uploads."""
+        if self.path is None:
+            self._file_obj.seek(0)
+            return self._file_obj
+        return open(self.path, "rb")
+
+    def chunks(self, size: int = UPLOAD_CHUNK_BYTES) -> Iterator[memoryview]:
+        view = memoryview(self.view())
+        try:
+            for start in range(0, len(view), size):
+                yield view[start:start + size]
+        finally:
+            view.release()
+
+    def close(self):
+        for view in self._views:
+            try:
+                view.release() if isinstance(view, memoryview) else view.close()
+            except BufferError:
+                pass  # A reader still holds an export; the view goes when it does
+        self._views = []
+        if self._owns_path and self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def spool(file_obj: Union[Upload, str, Path], name: Optional[str] = None) -> Upload:
+    """Wraps an upload (file object, path or Upload) as an Upload."""
+    if isinstance(file_obj, Upload):
+        return file_obj
+
+    if isinstance(file_obj, (str, Path)):
+        path = str(file_obj)
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_BYTES), b""):
+                digest.update(chunk)
+        return Upload(name or os.path.basename(path), os.path.getsize(path), digest.hexdigest(), path=path)
+
+    name = name or getattr(file_obj, "name", "upload")
+    if hasattr(file_obj, "getvalue"):
+        # BytesIO (and Streamlit's UploadedFile) made from bytes share them: getvalue() is free, getbuffer() copies
+        buffer = memoryview(file_obj.getvalue())
+        try:
+            if len(buffer) <= UPLOAD_SPOOL_BYTES:
+                return Upload(name, len(buffer), hashlib.sha256(buffer).hexdigest(), file_obj=file_obj)
+            chunks = (buffer[start:start + UPLOAD_CHUNK_BYTES] for start in range(0, len(buffer), UPLOAD_CHUNK_BYTES))
+            return _spool_chunks(name, chunks)
+        finally:
+            buffer.release()
+
+    file_obj.seek(0)
+    return _spool_chunks(name, iter(lambda: file_obj.read(UPLOAD_CHUNK_BYTES), b""))
+
+
+def _spool_chunks(name: str, chunks) -> Upload:
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=Path(name).suffix, dir=UPLOAD_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in chunks:
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return Upload(name, size, digest.hexdigest(), path=path, owns_path=True)
+
+
+@contextmanager
+def spooled(file_obj) -> Iterator[Upload]:
+    """spool() for the duration of a block; a spooled copy made here is removed after it."""
+    upload = spool(file_obj)
+    try:
+        yield upload
+    finally:
+        if upload is not file_obj:
+            upload.close()
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    BOM first, then UTF-8, then charset detection on the sample. Western
+    text is the common case, and detection often names a sibling code page
+    for it (cp1250 reads "naïve" as "naďve"), so the detected encoding is
+    used only for samples of CHARSET_MIN_BYTES or more that it reads
+    clearly cleaner than cp1252.
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # A multi-byte character cut off at the end of the sample is still UTF-8
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    if CHARSET_DETECTION and len(sample) >= CHARSET_MIN_BYTES:
+        matches = from_bytes(sample)
+        best = matches.best()
+        if best is not None and not any(FALLBACK_ENCODING in match.could_be_from_charset
+                                        and match.chaos < best.chaos + CHARSET_CHAOS_MARGIN for match in matches):
+            return best.encoding
+    return FALLBACK_ENCODING
+
+
+def decode_text(upload: Upload, sample_bytes: int = 1024 * 1024) -> str:
+    """
+    Decodes a text upload chunk by chunk with the encoding detected from
+    its first sample_bytes. A file that is UTF-8 at the start but not
+    further in (text pasted from a legacy editor) stays UTF-8, with the
+    bytes that are not valid decoded in the legacy encoding detected
+    around the first of them.
+    """
+    view = upload.view()
+    encoding = detect_encoding(bytes(view[:sample_bytes]))
+    text, failed_at = _decode_chunks(upload, encoding)
+    if text is not None:
+        return text
+    if not encoding.startswith("utf-8"):
+        print(f"Ingestion: {upload.name} is not valid {encoding}; replacing undecodable bytes")
+        return _decode_chunks(upload, encoding, errors="replace")[0]
+
+    start = max(0, failed_at - sample_bytes // 2)
+    legacy = detect_encoding(bytes(view[start:start + sample_bytes]))
+    if legacy.startswith("utf"):
+        legacy = FALLBACK_ENCODING
+    print(f"Ingestion: {upload.name} is not UTF-8 from byte {failed_at}; reading those bytes as {legacy}")
+    return _decode_chunks(upload, encoding, errors=_legacy_bytes_handler(legacy))[0]
+
+
+def _legacy_bytes_handler(encoding: str) -> str:
+    """Name of a codecs error handler that decodes the offending bytes in `encoding`."""
+    name = f"legacy-{encoding}"
+    try:
+        codecs.lookup_error(name)
+    except LookupError:
+        codecs.register_error(name, lambda e: (bytes(e.object[e.start:e.end]).decode(encoding, errors="replace"),
+                                               e.end))
+    return name
+
+
+def _decode_chunks(upload: Upload, encoding: str, errors: str = "strict") -> Tuple[Optional[str], int]:
+    """(text, -1), or (None, offset of the first undecodable byte)."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+    parts, offset = [], 0
+    try:
+        for chunk in upload.chunks():
+            parts.append(decoder.decode(chunk))
+            offset += len(chunk)
+        parts.append(decoder.decode(b"", final=True))
+    except UnicodeDecodeError as e:
+        # The decoder may hold back a partial character from the previous chunk
+        return None, max(0, offset + e.start - len(decoder.getstate()[0]))
+    return "".join(parts), -1
@@ -6,8 +6,11 @@ import os
 # This is required because the script is inside app/ui/
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
+import math
+import time
+import uuid
 from pathlib import Path
-from app.core.config import APP_NAME
+from app.core.config import APP_NAME, CLAUSES_PER_PAGE
 
 # Page Config MUST be the first Streamlit command
 st.set_page_config(
@@ -39,16 +42,18 @@ with st.sidebar:
     enable_ai = st.toggle("Enable AI Insights", value=True)
     
     # Import LLM service to check provider
-    from app.core.llm import llm_service
+    from app.core.llm import llm_service, LLMConfig
     
     # Display Active LLM Provider
     st.markdown("#### Analysis Engine")
     
-    # Always show both options
+    # Always show both options (plus the stub backend when LLM_STUB is set)
     provider_options = ["☁️ Cloud LLM (Gemini)", "🖥️ Local LLM (Ollama)"]
+    if "stub" in llm_service.providers:
+        provider_options.append("🧪 Stub LLM (Testing)")
     
     # Default selection based on current provider
-    default_idx = 0 if getattr(llm_service, 'provider', 'gemini') == "gemini" else 1
+    default_idx = {"gemini": 0, "stub": 2}.get(getattr(llm_service, 'provider', 'gemini'), 1)
     
     selected_provider = st.radio(
         "Select Provider",
@@ -57,21 +62,21 @@ with st.sidebar:
         label_visibility="collapsed"
     )
     
-    # Update provider based on selection
+    # Build this session's LLM config (never mutate the shared llm_service)
+    llm_config = llm_service.make_config(None)
     if "Cloud" in selected_provider:
         if getattr(llm_service, 'gemini_available', False):
-            llm_service.switch_provider("gemini")
-            st.success(f"**Active:** {llm_service.active_model}")
+            llm_config = llm_service.make_config("gemini")
+            st.success(f"**Active:** {llm_config.model}")
             st.caption("Powered by Google Gemini")
         else:
+            llm_config = LLMConfig(model="No LLM Available")
             st.error("**Cloud LLM Not Configured**")
             st.caption("Add GOOGLE_API_KEY to Streamlit secrets (cloud) or .env file (local)")
         
     elif "Local" in selected_provider:
         available_models = getattr(llm_service, 'available_models', [])
         if available_models:
-            llm_service.switch_provider("ollama")
-            
             # Ollama mode with model selection
             model_type = st.radio(
                 "Local Model",
@@ -81,16 +86,54 @@ with st.sidebar:
                 label_visibility="collapsed"
             )
             
-            if "DeepSeek" in model_type:
-                llm_service.set_mode("reasoning")
-            else:
-                llm_service.set_mode("standard")
+            mode = "reasoning" if "DeepSeek" in model_type else "standard"
+            llm_config = llm_service.make_config("ollama", mode)
             
-            st.info(f"**Active:** {llm_service.active_model}")
+            st.info(f"**Active:** {llm_config.model}")
         else:
+            llm_config = LLMConfig(model="No LLM Available")
             st.error("**Ollama Not Running**")
             st.caption("Start Ollama to use local models")
     
+    elif "Stub" in selected_provider:
+        llm_config = llm_service.make_config("stub")
+        st.warning(f"**Active:** {llm_config.model}")
+        st.caption("Deterministic local stub - responses are synthetic")
+    
+    st.session_state['llm_config'] = llm_config
+    # Load (and pin) the chosen local model now rather than on the first analysis
+    llm_service.warm_up(llm_config)
+    
+    with st.expander("Backend Health"):
+        for name, health in llm_service.router.snapshot().items():
+            p95 = f"{health['p95']:.1f}s" if health['p95'] is not None else "n/a"
+            st.caption(f"**{name}** • circuit {health['circuit']} • p95 {p95} • errors {health['error_rate']:.0%}")
+
+    with st.expander("AI Usage"):
+        from app.core.tokens import usage_ledger
+        if not llm_config.is_offline:
+            st.caption(f"Context window: {llm_service.context_window(llm_config.provider, llm_config.model):,} tokens")
+        usage = usage_ledger.summary("stage")
+        for stage, row in sorted(usage.items()):
+            estimated = " (estimated)" if row["estimated"] == row["calls"] else ""
+            st.caption(f"**{stage}** • {row['calls']} calls • {row['prompt_tokens']:,} in / "
+                       f"{row['completion_tokens']:,} out tokens{estimated} • avg {row['avg_latency']:.1f}s")
+        if not usage:
+            st.caption("No AI calls yet.")
+        for model, row in sorted(usage_ledger.summary("model").items()):
+            if row["max_load"] or row["tokens_per_second"]:
+                speed = f" • {row['tokens_per_second']:.0f} tok/s" if row["tokens_per_second"] else ""
+                st.caption(f"**{model}** • load {row['max_load']:.1f}s{speed}")
+
+    with st.expander("Recent Analyses"):
+        from app.core.store import results_store
+        for entry in results_store.recent(5):
+            risk = entry["risk_summary"]
+            label = f"{entry['filename']} • {entry['clause_count']} clauses • {risk['High']} high"
+            if st.button(label, key=f"recent_{entry['key']}", use_container_width=True):
+                st.session_state['results_key'] = entry['key']
+                st.session_state.pop('chat_session', None)
+    
     st.markdown("---")
     st.caption(f"System v1.0 • Secure Environment")
 
@@ -120,19 +163,128 @@ with upload_container:
             if st.button("Analyze Now", type="primary"):
                 with st.spinner("Processing document..."):
                     from app.core.pipeline import ContractPipeline
+                    from app.core.store import result_cache, result_key, content_hash
+                    from app.core.uploads import spooled
                     
-                    # RUN PIPELINE
-                    results = ContractPipeline.run(uploaded_file, file_type, enable_ai=enable_ai)
-                    
-                    if "error" in results:
-                        st.error(f"Analysis Error: {results['error']}")
-                    else:
-                        st.session_state['results'] = results
-                        st.success("Processing Complete")
+                    # Hashed once (and spooled to disk if large); ingestion reads from it without copying
+                    with spooled(uploaded_file) as upload:
+                        # Same document, rules and model as a stored analysis -> reuse it
+                        key = result_key(upload, enable_ai, llm_config)
+                        if result_cache.get(key) is not None:
+                            st.session_state['results_key'] = key
+                            st.session_state.pop('chat_session', None)
+                            st.success("Loaded previous analysis")
+                        else:
+                            # RUN PIPELINE (deterministic phase; AI output streams in below)
+                            results = ContractPipeline.analyze(upload, file_type, enable_ai=enable_ai)
+                            
+                            if "error" in results:
+                                st.error(f"Analysis Error: {results['error']}")
+                            else:
+                                # Session state holds only the key; results live in the shared, memory-bounded cache
+                                result_cache.put(key, results)
+                                
+                                # Make its clauses searchable across the portfolio
+                                from app.core.portfolio import portfolio_index
+                                try:
+                                    portfolio_index.add_document(content_hash(upload), results)
+                                except Exception as e:
+                                    print(f"Portfolio indexing failed: {e}")
+                                st.session_state['results_key'] = key
+                                st.session_state.pop('chat_session', None)
+                                st.success("Processing Complete")
+
+def enrich_on_demand(clause, field, key):
+    """Offers to generate AI output the enrichment scheduler skipped for this clause."""
+    reason = clause.get("ai_skipped", {}).get(field)
+    if not reason:
+        return False
+    st.caption(f"⏳ AI insight skipped ({reason}).")
+    if st.button("Generate AI insight", key=key):
+        from app.core.pipeline import ContractPipeline
+        # Results are shared by every session viewing them: write only while holding the claim
+        results_key = st.session_state['results_key']
+        if not result_cache.claim(results_key, session_id):
+            st.caption("Another session is generating AI insights for this contract; try again shortly.")
+            return True
+        try:
+            with st.spinner("Asking the AI..."):
+                ContractPipeline.enrich_clause(clause, ContractPipeline.enrichment_config(
+                    results, st.session_state['llm_config']))
+            result_cache.put(results_key, results)
+        finally:
+            result_cache.release(results_key, session_id)
+        st.rerun()
+    return True
+
+def render_ai_field(clause, field, key, pending):
+    """
+    Explanation/remedy for a clause, or a marker while it is generating,
+    after it was skipped, or when the clause needs none.
+    While AI output is still streaming (pending) no buttons are drawn,
+    because the placeholder may be redrawn within the same run.
+    """
+    from app.core.scheduling import clause_priority
+    
+    value = clause.get(field)
+    if value and field == "explanation":
+        st.info(value)
+    elif value:
+        title = "Mitigation Strategy" if clause['risk'] == 'High' else "Recommendation"
+        with st.expander(title, expanded=clause['risk'] == 'High'):
+            st.markdown(value)
+    elif pending and clause.get("ai_skipped", {}).get(field):
+        st.caption(f"⏳ AI insight skipped ({clause['ai_skipped'][field]}).")
+    elif pending and clause_priority(clause, field) is not None:
+        st.caption("✨ Generating AI insight...")
+    elif not pending and enrich_on_demand(clause, field, key):
+        pass
+    elif field == "explanation":
+        st.caption("Standard text.")
+
+def paginate(positions, key):
+    """
+    Renders page controls for a list of clause positions and returns the
+    positions on the current page. Changing the result count resets the page.
+    """
+    pages = max(1, math.ceil(len(positions) / CLAUSES_PER_PAGE))
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1,
+                               key=f"{key}_{len(positions)}")
+    visible = ClauseIndex.page(positions, page, CLAUSES_PER_PAGE)
+    if visible:
+        start = (page - 1) * CLAUSES_PER_PAGE
+        st.caption(f"Showing {start + 1}–{start + len(visible)} of {len(positions)}")
+    return visible
+
+# Placeholders for AI output, redrawn as enrichment events arrive
+ai_slots = {}
+
+def ai_slot(slot_key, render):
+    slot = st.empty()
+    def draw():
+        with slot.container():
+            render()
+    draw()
+    ai_slots[slot_key] = draw
 
 # Dashboard - Display Results if available
-if 'results' in st.session_state:
-    results = st.session_state['results']
+# Identifies this session to the shared result cache (see ResultCache.claim)
+session_id = st.session_state.setdefault('session_id', uuid.uuid4().hex)
+results = None
+if 'results_key' in st.session_state:
+    from app.core.store import result_cache
+    results = result_cache.get(st.session_state['results_key'])
+    if results is None:
+        st.session_state.pop('results_key')
+        st.warning("This analysis is no longer available. Please analyze the document again.")
+
+if results is not None:
+    from app.core.indexing import ClauseIndex
+    
+    clauses = results["clauses"]
+    index = ClauseIndex.ensure(results)
     
     st.markdown("### Analysis Report")
     
@@ -140,11 +292,26 @@ if 'results' in st.session_state:
     risk_summary = results["risk_summary"]
     # Metric cards will be styled by CSS
     c1, c2, c3, c4 = st.columns(4)
-    c1.metric("Clauses", len(results["clauses"]))
+    c1.metric("Clauses", len(clauses))
     c2.metric("High Priority", risk_summary["High"])
     c3.metric("Medium Priority", risk_summary["Medium"])
     c4.metric("Entities", sum(len(v) for v in results["entities"].values()))
     
+    pending = results.get("ai_pending", False)
+    progress_slot = st.empty()
+    if pending:
+        progress_slot.progress(0.0, text="Generating AI insights...")
+    
+    enrichment = results.get("enrichment")
+    if enrichment and enrichment["skipped"]:
+        st.warning(f"AI insights were generated for the highest-priority clauses first; "
+                   f"{enrichment['skipped']} lower-priority items were skipped to stay within the time/token limits. "
+                   "Use **Generate AI insight** on a clause to fill it in.")
+    dedup = results.get("dedup")
+    if dedup and dedup["calls_saved"]:
+        st.caption(f"♻️ {dedup['calls_saved']} of {dedup['requested']} clause insights were reused from "
+                   "near-duplicate clauses in this or earlier contracts instead of new AI calls.")
+    
     st.markdown("---")
     
     # Tabs
@@ -154,18 +321,25 @@ if 'results' in st.session_state:
         st.markdown("#### 📖 Document Walkthrough")
         st.markdown("_A simplified breakdown of the key terms in this agreement._")
         
-        # Group clauses for better UX
-        # 1. High Risks first
-        # 2. Then by type
-        
-        # Filter out boring definitions unless they are risky
-        display_clauses = [c for c in results["clauses"] if c['type'] != 'Definition/Neutral' or c['risk'] != 'Low']
+        # Filters backed by the precomputed index (no rescans per rerun)
+        f1, f2, f3 = st.columns(3)
+        risk_filter = f1.multiselect("Risk", ["High", "Medium", "Low"], key="filter_risk")
+        type_filter = f2.multiselect("Type", sorted(index["by_type"]), key="filter_type")
+        section_filter = f3.multiselect("Section", list(index["by_section"]), key="filter_section")
         
-        if not display_clauses:
-             st.info("No major functional clauses detected. This might be a very simple or non-standard document.")
-             display_clauses = results["clauses"] # Fallback
+        if risk_filter or type_filter or section_filter:
+            positions = ClauseIndex.select(index, risk_filter, type_filter, section_filter)
+            if not positions:
+                st.info("No clauses match these filters.")
+        else:
+            # Default view: filter out boring definitions unless they are risky
+            positions = index["walkthrough"]
+            if not positions:
+                 st.info("No major functional clauses detected. This might be a very simple or non-standard document.")
+                 positions = list(range(len(clauses))) # Fallback
 
-        for clause in display_clauses:
+        for idx in paginate(positions, "page_walkthrough"):
+            clause = clauses[idx]
             # CARD STYLE LAYOUT
             # Uses a container with a background color from CSS
             with st.container():
@@ -186,10 +360,7 @@ if 'results' in st.session_state:
                     st.markdown(f"**{clause['type'].upper()}** • Clause {clause['id']}")
                     
                     # PRIMARY CONTENT: The Explanation (Plain English)
-                    if clause.get("explanation"):
-                        st.info(f"{clause['explanation']}")
-                    else:
-                        st.caption("Standard text.")
+                    ai_slot((idx, "explanation"), lambda c=clause, i=idx: render_ai_field(c, "explanation", f"explain_{i}", pending))
                     
                     # RISK WARNING (If any)
                     if clause['risk'] != 'Low':
@@ -198,50 +369,59 @@ if 'results' in st.session_state:
                     # SECONDARY CONTENT: The Raw Text (Hidden by default)
                     with st.expander("Show Original Legalese"):
                         st.code(clause['text'], language=None)
+                        if clause.get('precedent'):
+                            precedent_id, score = clause['precedent']
+                            st.caption(f"Closest precedent: {precedent_id} ({score:.0%} similar)")
             
             st.divider()
     
     with tab2:
         st.markdown("#### Critical Issues")
-        high_risks = [c for c in results["clauses"] if c['risk'] == 'High']
+        high_risks = index["by_risk"]["High"]
         if high_risks:
-            for hr in high_risks:
+            for idx in paginate(high_risks, "page_high"):
+                hr = clauses[idx]
                 with st.container():
                      st.error(f"**Clause {hr['id']}**: {hr['risk_reason']}")
                      st.caption(f"_{hr['text'][:300]}..._")
-                     if hr.get("remedy"):
-                          with st.expander("Mitigation Strategy", expanded=True):
-                               st.markdown(hr["remedy"])
+                     ai_slot((idx, "remedy"), lambda c=hr, i=idx: render_ai_field(c, "remedy", f"remedy_{i}", pending))
         else:
             st.success("No critical high-risk clauses identified.")
             
         st.markdown("---")
         st.markdown("#### Cautionary Items")
-        medium_risks = [c for c in results["clauses"] if c['risk'] == 'Medium']
+        medium_risks = index["by_risk"]["Medium"]
         if medium_risks:
-            for mr in medium_risks:
+            for idx in paginate(medium_risks, "page_medium"):
+                mr = clauses[idx]
                 st.warning(f"**Clause {mr['id']}**: {mr['risk_reason']}")
                 st.caption(f"_{mr['text'][:300]}..._")
-                if mr.get("remedy"):
-                    with st.expander("Recommendation"):
-                        st.markdown(mr["remedy"])
+                ai_slot((idx, "remedy"), lambda c=mr, i=idx: render_ai_field(c, "remedy", f"remedy_{i}", pending))
         else:
             st.info("No medium-risk clauses identified.")
             
     with tab3:
         st.markdown("#### 📝 One-Page Summary")
-        if results.get("comprehensive_summary"):
-             st.info(results["comprehensive_summary"])
-        else:
-             st.caption("Detailed summary unavailable.")
+        def render_comprehensive_summary():
+            if results.get("comprehensive_summary"):
+                 st.info(results["comprehensive_summary"])
+            elif pending:
+                 st.caption("✨ Writing summary...")
+            else:
+                 st.caption("Detailed summary unavailable.")
+        ai_slot((None, "comprehensive_summary"), render_comprehensive_summary)
              
         st.divider()
         
         st.markdown("#### Strategic Risk Overview")
-        if results.get("ai_summary"):
-            st.markdown(results["ai_summary"])
-        else:
-            st.info("No summary available.")
+        def render_ai_summary():
+            if results.get("ai_summary"):
+                st.markdown(results["ai_summary"])
+            elif pending:
+                st.caption("✨ Writing risk overview...")
+            else:
+                st.info("No summary available.")
+        ai_slot((None, "ai_summary"), render_ai_summary)
             
         st.markdown("---")
         st.markdown("#### Key Entities")
@@ -278,13 +458,48 @@ if 'results' in st.session_state:
             # Generate response
             with st.chat_message("assistant"):
                 from app.core.llm import llm_service
-                doc_text = results.get("full_text", "")
+                from app.core.chat import ChatSession
+                
+                # One chat session per document + LLM config keeps the cached prefix warm
+                chat = st.session_state.get('chat_session')
+                if chat is None or chat.config != st.session_state['llm_config']:
+                    chat = ChatSession(llm_service, results.get("full_text", ""), st.session_state['llm_config'])
+                    st.session_state['chat_session'] = chat
                 
                 with st.spinner("Analyzing contract..."):
-                    response = llm_service.chat_with_document(prompt, doc_text)
+                    response = chat.ask(prompt)
                 
                 st.markdown(response)
                 
             # Add assistant response to history
             st.session_state.messages.append({"role": "assistant", "content": response})
 
+    # Phase 2: stream AI output into the placeholders drawn above.
+    # If the user interacts mid-stream Streamlit reruns the script and the
+    # stream resumes, skipping fields that are already filled, with the
+    # config it started with. Only one session streams into shared results;
+    # others viewing the same analysis poll until it is done.
+    if pending:
+        from app.core.pipeline import ContractPipeline
+        from app.core.store import rekey
+        results_key = st.session_state['results_key']
+        if result_cache.claim(results_key, session_id):
+            config = ContractPipeline.enrichment_config(results, st.session_state['llm_config'])
+            try:
+                for event in ContractPipeline.enrich_stream(results, config):
+                    result_cache.claim(results_key, session_id)
+                    progress_slot.progress(event["completed"] / event["total"],
+                                           text=f"Generating AI insights... {event['completed']}/{event['total']}")
+                    redraw = ai_slots.get((event["clause_index"], event["field"]))
+                    if redraw:
+                        redraw()
+                progress_slot.empty()
+                # Save and re-measure now the AI fields are filled, under the key of the config that filled them
+                st.session_state['results_key'] = rekey(results_key, config)
+                result_cache.put(st.session_state['results_key'], results)
+            finally:
+                result_cache.release(results_key, session_id)
+        else:
+            progress_slot.progress(0.0, text="Generating AI insights in another session...")
+            time.sleep(1.0)
+        st.rerun() # Final render with on-demand controls, or the next poll
@@ -0,0 +1,247 @@
+import gzip
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+TimeArg = Union[datetime, str, float, None]
+
+GROUP_COLUMNS = {"day": "day", "action": "action", "user": "user_id", "filename": "filename"}
+
+
+def _to_epoch(value: TimeArg) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def _row(line: str):
+    """Index columns for one audit line, or None if it is not a valid entry."""
+    try:
+        entry = json.loads(line)
+        stamp = datetime.fromisoformat(entry["timestamp"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    details = entry.get("details") or {}
+    ai_enabled = details.get("ai_enabled")
+    return (
+        stamp.timestamp(), stamp.strftime("%Y-%m-%d"), entry.get("action"), entry.get("user_id"),
+        details.get("filename"), details.get("clause_count"), details.get("high_risks"),
+        None if ai_enabled is None else int(bool(ai_enabled)), line
+    )
+
+
+def _first_line(path: Path) -> Optional[str]:
+    """A trail segment's first complete line, which identifies it once it is archived too."""
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rb") as f:
+        line = f.readline()
+    return line.decode("utf-8") if line.endswith(b"\n") else None
+
+
+def _archives(trail: Path, archive_dir: Optional[Path]) -> List[Path]:
+    """Rotated segments of trail, oldest first."""
+    if not archive_dir or not Path(archive_dir).exists():
+        return []
+    return sorted(Path(archive_dir).glob(f"{trail.stem}-*.gz"), key=lambda path: (path.stat().st_mtime, path.name))
+
+
+class AuditIndex:
+    """
+    SQLite sidecar over the audit trail for filtered queries and aggregates
+    without scanning the JSON lines. The index keeps a high-water mark (the
+    trail segment it read last, identified by its first line, and the byte
+    offset reached), committed with the rows. catch_up() indexes everything
+    past it, following the segment into the archive when it was rotated;
+    it runs at startup and after every batch the AuditWriter writes, so
+    lines whose indexing was missed (crash, sink error) are picked up.
+
+    Rows carry their day as well as the timestamp, and the composite
+    indexes lead with the filter column then time, so every query touches
+    only the time range it asks for.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._follow_lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                ts REAL NOT NULL,
+                day TEXT NOT NULL,
+                action TEXT,
+                user_id TEXT,
+                filename TEXT,
+                clause_count INTEGER,
+                high_risks INTEGER,
+                ai_enabled INTEGER,
+                raw TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_time ON entries(ts, action, high_risks, ai_enabled);
+            CREATE INDEX IF NOT EXISTS idx_entries_action ON entries(action, ts, high_risks, ai_enabled);
+            CREATE INDEX IF NOT EXISTS idx_entries_user ON entries(user_id, ts);
+            CREATE INDEX IF NOT EXISTS idx_entries_file ON entries(filename, ts);
+            CREATE TABLE IF NOT EXISTS mark (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def add_lines(self, lines: Iterable[str]) -> int:
+        """Indexes raw audit JSON lines. Returns how many were valid entries."""
+        rows = [row for row in map(_row, lines) if row is not None]
+        if rows:
+            with self._lock:
+                self._conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self._conn.commit()
+        return len(rows)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def mark(self):
+        """(first line of the segment read last, byte offset reached), or (None, 0) before any."""
+        with self._lock:
+            row = self._conn.execute("SELECT segment, offset FROM mark").fetchone()
+        return row if row else (None, 0)
+
+    def rebuild(self, trail: Path, archive_dir: Optional[Path] = None) -> int:
+        """Re-indexes the archives (oldest first) and the live trail from scratch."""
+        with self._follow_lock:
+            self._clear()
+            return self._catch_up(Path(trail), archive_dir)
+
+    def catch_up(self, trail: Path, archive_dir: Optional[Path] = None) -> int:
+        """Indexes the lines written since the mark. Returns how many entries were added."""
+        with self._follow_lock:
+            return self._catch_up(Path(trail), archive_dir)
+
+    def _catch_up(self, trail: Path, archive_dir: Optional[Path]) -> int:
+        segment, offset = self.mark()
+        live = _first_line(trail) if trail.exists() else None
+        if segment is not None and segment == live:
+            sources = [(trail, offset)]
+        else:
+            archives = _archives(trail, archive_dir)
+            if segment is None:
+                if self.count():
+                    self._clear()  # Indexed before marks were kept: start over
+                sources = [(path, 0) for path in archives]
+            else:
+                # The marked segment was rotated since: finish it, then any later archives
+                found = next((i for i in range(len(archives) - 1, -1, -1) if _first_line(archives[i]) == segment), None)
+                sources = [] if found is None else \
+                    [(archives[found], offset)] + [(path, 0) for path in archives[found + 1:]]
+            if live is not None:
+                sources.append((trail, 0))
+        return sum(self._index_from(path, start) for path, start in sources)
+
+    def _index_from(self, path: Path, offset: int, batch_lines: int = 10000) -> int:
+        """Indexes path's complete lines from offset, moving the mark with each batch."""
+        segment = _first_line(path)
+        if segment is None:
+            return 0
+        total = 0
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rb") as f:
+            f.seek(offset)
+            batch = []
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Torn final write (crash mid-line): stop before it
+                batch.append(line.decode("utf-8", errors="replace").rstrip("\n"))
+                offset += len(line)
+                if len(batch) >= batch_lines:
+                    total += self._add(batch, segment, offset)
+                    batch = []
+            if batch or self.mark()[0] != segment:
+                total += self._add(batch, segment, offset)
+        return total
+
+    def _add(self, lines: List[str], segment: str, offset: int) -> int:
+        # Rows and mark in one transaction: a crash leaves both or neither
+        rows = [row for row in map(_row, lines) if row is not None]
+        with self._lock:
+            self._conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.execute("INSERT OR REPLACE INTO mark VALUES (0, ?, ?)", (segment, offset))
+            self._conn.commit()
+        return len(rows)
+
+    def _clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM mark")
+            self._conn.commit()
+
+    @staticmethod
+    def _where(start: TimeArg, end: TimeArg, action: Optional[str], user: Optional[str], filename: Optional[str]):
+        clauses, params = [], []
+        for column, op, value in (("ts", ">=", _to_epoch(start)), ("ts", "<", _to_epoch(end)),
+                                  ("action", "=", action), ("user_id", "=", user)):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        if filename is not None:
+            # Shell-style wildcards ("*.pdf", "NDA*") match with GLOB, anything else exactly
+            clauses.append("filename GLOB ?" if any(ch in filename for ch in "*?[") else "filename = ?")
+            params.append(filename)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, start: TimeArg = None, end: TimeArg = None, action: Optional[str] = None,
+              user: Optional[str] = None, filename: Optional[str] = None, limit: int = 100) -> List[dict]:
+        """Matching audit entries, newest first, as the dicts log_audit wrote."""
+        where, params = self._where(start, end, action, user, filename)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT raw FROM entries{where} ORDER BY ts DESC LIMIT ?", params + [limit]
+            ).fetchall()
+        return [json.loads(raw) for (raw,) in rows]
+
+    def aggregate(self, start: TimeArg = None, end: TimeArg = None, action: Optional[str] = None,
+                  user: Optional[str] = None, filename: Optional[str] = None,
+                  group_by: Optional[str] = None) -> List[Dict[str, object]]:
+        """
+        Counts over matching entries: entries, high-risk total, analyses with
+        any high risk and the AI-enabled ratio. One row overall, or one per
+        group_by value ("day", "action", "user" or "filename").
+        """
+        if group_by is not None and group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Unknown group_by {group_by!r}; expected one of {sorted(GROUP_COLUMNS)}")
+        where, params = self._where(start, end, action, user, filename)
+        group_column = GROUP_COLUMNS.get(group_by)
+        select_group = f"{group_column}, " if group_column else ""
+        group_clause = f" GROUP BY {group_column} ORDER BY {group_column}" if group_column else ""
+        sql = (f"SELECT {select_group}COUNT(*), COALESCE(SUM(high_risks), 0), "
+               f"SUM(CASE WHEN high_risks > 0 THEN 1 ELSE 0 END), COUNT(ai_enabled), COALESCE(SUM(ai_enabled), 0) "
+               f"FROM entries{where}{group_clause}")
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        results = []
+        for row in rows:
+            key, values = (row[0], row[1:]) if group_column else (None, row)
+            entries, high_total, with_high, ai_known, ai_on = values
+            if entries == 0:
+                continue
+            result = {
+                "entries": entries,
+                "high_risk_total": high_total,
+                "with_high_risk": with_high or 0,
+                "ai_enabled_ratio": ai_on / ai_known if ai_known else None,
+            }
+            if group_column:
+                result = {group_by: key, **result}
+            results.append(result)
+        return results
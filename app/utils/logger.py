@@ -1,28 +1,235 @@
-import logging
+import atexit
+import gzip
 import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler
 from pathlib import Path
-from app.core.config import DATA_DIR
+from typing import Callable, Iterable, List, Optional
+
+from app.core.config import (
+    DATA_DIR, AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL, AUDIT_FSYNC, AUDIT_FSYNC_INTERVAL,
+    AUDIT_MAX_BYTES, AUDIT_ROTATE_SECONDS
+)
+from app.utils.audit_index import AuditIndex
 
 # Setup Logging Directory
 LOG_DIR = DATA_DIR / "logs"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 
+FSYNC_POLICIES = ("batch", "interval", "never")
+
+_STOP = object()
+
+
+class AuditWriter:
+    """
+    Background writer for the audit trail. log_audit only enqueues (via a
+    QueueHandler); this thread drains the queue in batches of up to
+    batch_size records, writes each batch with one write call and fsyncs
+    according to the policy:
+        "batch"    - after every batch (nothing acknowledged is lost on power failure)
+        "interval" - at most every fsync_interval seconds
+        "never"    - leave it to the OS
+    The file is rotated once it reaches max_bytes or has been open for
+    rotate_seconds; rotated files are gzipped into archive_dir. Each sink
+    is called with a batch's lines once they are written (e.g. to index them).
+    """
+
+    def __init__(self, path: Path, archive_dir: Optional[Path] = None, batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_interval: float = AUDIT_FLUSH_INTERVAL, fsync: str = AUDIT_FSYNC,
+                 fsync_interval: float = AUDIT_FSYNC_INTERVAL, max_bytes: int = AUDIT_MAX_BYTES,
+                 rotate_seconds: Optional[float] = AUDIT_ROTATE_SECONDS,
+                 sinks: Optional[List[Callable[[Iterable[str]], object]]] = None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}; expected one of {FSYNC_POLICIES}")
+        self.path = Path(path)
+        self.archive_dir = Path(archive_dir) if archive_dir else self.path.parent / "archive"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.sinks = list(sinks or [])
+        self.queue = queue.SimpleQueue()
+        self.written = 0
+        self._stream = None
+        self._dirty = False
+        self._opened_at = 0.0
+        self._last_fsync = 0.0
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Writes everything queued so far, then stops the thread."""
+        if self._thread is not None:
+            self.queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every record queued before this call is on disk."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        running = True
+        while running:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._sync()
+                continue
+
+            lines, waiters = [], []
+            while True:
+                if item is _STOP:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    lines.append(item.getMessage())
+                if not running or len(lines) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if lines:
+                try:
+                    self._write(lines)
+                except Exception as e:
+                    print(f"Audit log write failed ({len(lines)} entries): {e}")
+                else:
+                    for sink in self.sinks:
+                        try:
+                            sink(lines)
+                        except Exception as e:
+                            print(f"Audit sink failed ({len(lines)} entries): {e}")
+            if waiters or not running:
+                self._sync(force=True)
+            for waiter in waiters:
+                waiter.set()
+
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _write(self, lines):
+        if self._stream is None:
+            self._open()
+        if self._should_rotate():
+            self._rotate()
+        self._stream.write("\n".join(lines) + "\n")
+        self._stream.flush()
+        self.written += len(lines)
+        self._dirty = True
+        self._sync()
+
+    def _sync(self, force: bool = False):
+        if self._stream is None or not self._dirty:
+            return
+        if self.fsync == "never" and not force:
+            return
+        now = time.monotonic()
+        if force or self.fsync == "batch" or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._stream.fileno())
+            self._dirty = False
+            self._last_fsync = now
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._stream = open(self.path, "a", encoding="utf-8")
+        # Time-based rotation counts from when the segment was started, which survives restarts
+        self._opened_at = self._segment_started() if self.path.stat().st_size else time.time()
+
+    def _segment_started(self) -> float:
+        """Timestamp of the file's first entry; else its birth time, where the OS keeps one; else its last write."""
+        with open(self.path, "rb") as f:
+            first = f.readline()
+        try:
+            return datetime.fromisoformat(json.loads(first)["timestamp"]).timestamp()
+        except (ValueError, KeyError, TypeError):
+            stat = self.path.stat()
+            return getattr(stat, "st_birthtime", stat.st_mtime)
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes and self._stream.tell() >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.time() - self._opened_at >= self.rotate_seconds
+
+    def _rotate(self):
+        self._sync(force=True)
+        self._stream.close()
+        self._stream = None
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        archive = self.archive_dir / f"{self.path.stem}-{stamp}{self.path.suffix}.gz"
+        counter = 1
+        while archive.exists():
+            archive = self.archive_dir / f"{self.path.stem}-{stamp}-{counter}{self.path.suffix}.gz"
+            counter += 1
+        rotated = self.path.with_name(self.path.name + ".rotating")
+        os.replace(self.path, rotated)
+        with open(rotated, "rb") as src, gzip.open(archive, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        rotated.unlink()
+        self._open()
+
+
+class _AuditQueueHandler(QueueHandler):
+    """
+    Enqueues records as-is. Audit messages are already final JSON, so the
+    stock prepare() (format + copy of every record) is skipped on the
+    request path; the writer calls getMessage() instead.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def attach_writer(target: logging.Logger, writer: AuditWriter) -> AuditWriter:
+    """Routes target's records through a QueueHandler into writer."""
+    target.addHandler(_AuditQueueHandler(writer.queue))
+    return writer.start()
+
+
 # Configure Logger
 logger = logging.getLogger("LegalAuditLog")
 logger.setLevel(logging.INFO)
 
-# File Handler for Audit Trail (JSON Lines format)
+# Audit Trail (JSON Lines format), written off the request path
 audit_files_path = LOG_DIR / "audit_trail.jsonl"
-file_handler = logging.FileHandler(audit_files_path)
-file_formatter = logging.Formatter('%(message)s')
-file_handler.setFormatter(file_formatter)
 
-logger.addHandler(file_handler)
+# Queryable index over the trail: caught up from its high-water mark now and after every batch written
+audit_index = AuditIndex(LOG_DIR / "audit_index.db")
+audit_index.catch_up(audit_files_path, LOG_DIR / "archive")
+
+audit_writer = attach_writer(logger, AuditWriter(
+    audit_files_path, sinks=[lambda lines: audit_index.catch_up(audit_files_path, LOG_DIR / "archive")]))
+
+# Clean shutdown drains the queue
+atexit.register(audit_writer.stop)
 
 def log_audit(action: str, details: dict, user_id: str = "local_user"):
     """
     Logs an action to the audit trail in JSON format.
+    Returns once the entry is queued; the background writer persists it.
     """
     entry = {
         "timestamp": datetime.now().isoformat(),
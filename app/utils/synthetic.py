@@ -0,0 +1,95 @@
+"""
+Synthetic contract generator for benchmarks.
+Produces numbered agreements that ClauseParser splits into a known number
+of clauses, rendered as TXT, DOCX or PDF bytes.
+"""
+import io
+import math
+import random
+import textwrap
+
+CLAUSE_TEMPLATES = [
+    "The Supplier shall deliver the Goods to the premises of {org} within {days} days of the Purchase Order.",
+    "The Client shall pay Rs. {amount} within {days} days of receipt of a valid invoice.",
+    "The Service Provider must maintain the confidentiality of all information disclosed by {org}.",
+    "Either party may terminate at any time by giving written notice to the other party.",
+    "The Vendor agrees to indemnify {org} against all losses, claims and damages arising from this Agreement.",
+    "The Employee shall not engage in any competing business and accepts this non-compete for {days} months.",
+    "All disputes shall be referred to arbitration seated in Mumbai under the Arbitration and Conciliation Act, 1996.",
+    "The Licensee has the right to use the Software at its principal place of business from {date}.",
+    "The Distributor is granted exclusivity for the territory of Maharashtra for the Term.",
+    "This Agreement shall be governed by the laws of India and the courts of Delhi shall have jurisdiction.",
+    "In this Agreement, \"Effective Date\" means {date} and \"Term\" means the period of {days} months thereafter.",
+    "The Contractor will be liable without limit and accepts unlimited liability for breach of the warranties in this clause.",
+    "Notices under this Agreement will be delivered in writing to the registered office of {org} and are deemed received two business days after dispatch.",
+    "The Buyer is prohibited from assigning this Agreement without the prior written consent of {org}.",
+]
+
+ORGS = ["Acme Traders Pvt. Ltd.", "Zenith Services LLP", "Bharat Components Limited", "Nova Software Inc."]
+DATES = ["1st April 2024", "15/08/2024", "January 10, 2025", "31st March 2026"]
+
+
+def generate_contract_text(n_clauses: int, seed: int = 0) -> str:
+    """
+    Returns a contract with exactly n_clauses numbered clauses (plus a title
+    line that becomes the Intro clause). Numbers stay within ClauseParser's
+    two-digit "N.M" pattern even for large documents.
+    """
+    rng = random.Random(seed)
+    per_section = max(10, math.ceil(n_clauses / 99))
+    lines = ["MASTER SERVICES AGREEMENT between " + " and ".join(rng.sample(ORGS, 2))]
+    for k in range(n_clauses):
+        section, sub = k // per_section + 1, k % per_section + 1
+        clause = rng.choice(CLAUSE_TEMPLATES).format(
+            org=rng.choice(ORGS),
+            days=rng.choice([7, 15, 30, 45, 60, 90]),
+            amount=f"{rng.randint(10, 999) * 1000:,}",
+            date=rng.choice(DATES),
+        )
+        lines.append(f"{section}.{sub} {clause}")
+    return "\n".join(lines)
+
+
+def to_docx_bytes(text: str) -> bytes:
+    import docx
+
+    document = docx.Document()
+    for line in text.split("\n"):
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def to_pdf_bytes(text: str, lines_per_page: int = 55, width: int = 95) -> bytes:
+    import fitz  # PyMuPDF
+
+    wrapped = []
+    for line in text.split("\n"):
+        wrapped.extend(textwrap.wrap(line, width) or [""])
+
+    pdf = fitz.open()
+    for start in range(0, len(wrapped), lines_per_page):
+        page = pdf.new_page()
+        y = 50
+        for line in wrapped[start:start + lines_per_page]:
+            page.insert_text((40, y), line, fontsize=9)
+            y += 13
+    return pdf.tobytes()
+
+
+def render(text: str, file_type: str) -> bytes:
+    if file_type == "txt":
+        return text.encode("utf-8")
+    if file_type == "docx":
+        return to_docx_bytes(text)
+    if file_type == "pdf":
+        return to_pdf_bytes(text)
+    raise ValueError(f"Unsupported file type: {file_type}")
+
+
+def make_upload(data: bytes, name: str) -> io.BytesIO:
+    """Wraps bytes in a file-like object shaped like Streamlit's UploadedFile."""
+    upload = io.BytesIO(data)
+    upload.name = name
+    return upload
@@ -0,0 +1,74 @@
+"""
+Query the audit trail through its SQLite index.
+
+Examples:
+    python scripts/audit_query.py stats --since 7d --action "Analysis Complete"
+    python scripts/audit_query.py stats --since 30d --group-by filename
+    python scripts/audit_query.py entries --user local_user --file "*.pdf" --limit 20
+    python scripts/audit_query.py rebuild
+
+--since/--until take an ISO date/time or a relative age such as 12h or 7d.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.logger import audit_index, audit_files_path, LOG_DIR
+
+RELATIVE = re.compile(r"^(\d+(?:\.\d+)?)([mhdw])$")
+UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def parse_time(value):
+    if value is None:
+        return None
+    match = RELATIVE.match(value)
+    if match:
+        return datetime.now() - timedelta(**{UNITS[match.group(2)]: float(match.group(1))})
+    return datetime.fromisoformat(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["entries", "stats", "rebuild"])
+    parser.add_argument("--since", help="Start of the time range (inclusive)")
+    parser.add_argument("--until", help="End of the time range (exclusive)")
+    parser.add_argument("--action")
+    parser.add_argument("--user")
+    parser.add_argument("--file", help="Exact filename or a glob such as '*.pdf'")
+    parser.add_argument("--group-by", choices=["day", "action", "user", "filename"])
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "rebuild":
+        count = audit_index.rebuild(audit_files_path, LOG_DIR / "archive")
+        print(f"Indexed {count:,} entries in {time.perf_counter() - start:.2f}s")
+        return
+
+    filters = dict(start=parse_time(args.since), end=parse_time(args.until),
+                   action=args.action, user=args.user, filename=args.file)
+    if args.command == "entries":
+        for entry in audit_index.query(limit=args.limit, **filters):
+            print(json.dumps(entry))
+    else:
+        rows = audit_index.aggregate(group_by=args.group_by, **filters)
+        for row in rows:
+            ratio = row["ai_enabled_ratio"]
+            label = f"{row[args.group_by]}: " if args.group_by else ""
+            print(f"{label}{row['entries']:,} entries, {row['high_risk_total']:,} high risks "
+                  f"in {row['with_high_risk']:,} analyses, AI enabled {'n/a' if ratio is None else f'{ratio:.0%}'}")
+        if not rows:
+            print("No matching entries")
+    print(f"({(time.perf_counter() - start) * 1000:.1f} ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Audit logging throughput benchmark.
+
+Many threads call log_audit-style logging at once against a temporary
+directory, first through a plain synchronous FileHandler (the old setup,
+with and without a per-entry fsync) and then through the queued
+AuditWriter under each fsync policy. Reports
+caller-side latency (what the request path pays), end-to-end throughput
+until everything is on disk, and checks no entry was lost. Rotation is
+exercised by a small --max-kb.
+
+Usage:
+    python scripts/benchmark_audit.py --threads 1 8 32 --entries 2000 --max-kb 512
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.logger import AuditWriter, attach_writer, FSYNC_POLICIES
+
+
+class FsyncFileHandler(logging.FileHandler):
+    """The old handler made as durable as the "batch" policy: fsync per entry."""
+
+    def emit(self, record):
+        super().emit(record)
+        os.fsync(self.stream.fileno())
+
+
+def make_logger(name, handler=None):
+    bench_logger = logging.getLogger(name)
+    bench_logger.setLevel(logging.INFO)
+    bench_logger.propagate = False
+    if handler is not None:
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        bench_logger.addHandler(handler)
+    return bench_logger
+
+
+def hammer(bench_logger, threads, entries):
+    latencies = [[] for _ in range(threads)]
+
+    def worker(slot):
+        for i in range(entries):
+            entry = {"timestamp": datetime.now().isoformat(), "user_id": f"user_{slot}",
+                     "action": "Analysis Complete", "details": {"filename": f"contract_{i}.pdf", "clause_count": i}}
+            start = time.perf_counter()
+            bench_logger.info(json.dumps(entry))
+            latencies[slot].append(time.perf_counter() - start)
+
+    pool = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sorted(x for per_thread in latencies for x in per_thread)
+
+
+def count_entries(log_dir):
+    total = 0
+    for path in Path(log_dir).rglob("*"):
+        if path.suffix == ".jsonl":
+            with open(path, "rb") as f:
+                total += sum(1 for _ in f)
+        elif path.suffix == ".gz":
+            with gzip.open(path, "rb") as f:
+                total += sum(1 for _ in f)
+    return total
+
+
+def report(label, threads, entries, latencies, seconds, written, archives):
+    expected = threads * entries
+    p50 = statistics.median(latencies) * 1e6
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1e6
+    status = "ok" if written == expected else f"LOST {expected - written}"
+    print(f"{label:<16} {threads:>7} {p50:>9.1f} {p99:>9.1f} {expected / seconds:>12,.0f} {archives:>8}  {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--entries", type=int, default=2000, help="Entries per thread")
+    parser.add_argument("--max-kb", type=int, default=512, help="Rotation size for the queued writer")
+    args = parser.parse_args()
+
+    print(f"{'writer':<16} {'threads':>7} {'p50 us':>9} {'p99 us':>9} {'entries/s':>12} {'archives':>8}  lost")
+    run = 0
+    for threads in args.threads:
+        for durable in (False, True):
+            with tempfile.TemporaryDirectory() as log_dir:
+                run += 1
+                handler = (FsyncFileHandler if durable else logging.FileHandler)(Path(log_dir) / "audit_trail.jsonl")
+                bench_logger = make_logger(f"bench.sync.{run}", handler)
+                start = time.perf_counter()
+                latencies = hammer(bench_logger, threads, args.entries)
+                handler.close()
+                seconds = time.perf_counter() - start
+                label = "sync+fsync" if durable else "sync"
+                report(label, threads, args.entries, latencies, seconds, count_entries(log_dir), 0)
+
+        for policy in FSYNC_POLICIES:
+            with tempfile.TemporaryDirectory() as log_dir:
+                run += 1
+                writer = AuditWriter(Path(log_dir) / "audit_trail.jsonl", fsync=policy, max_bytes=args.max_kb * 1024)
+                bench_logger = make_logger(f"bench.queued.{run}")
+                attach_writer(bench_logger, writer)
+                start = time.perf_counter()
+                latencies = hammer(bench_logger, threads, args.entries)
+                writer.stop()  # Drains the queue, as on a clean shutdown
+                seconds = time.perf_counter() - start
+                archives = len(list((Path(log_dir) / "archive").glob("*.gz")))
+                report(f"queued/{policy}", threads, args.entries, latencies, seconds, count_entries(log_dir), archives)
+
+
+if __name__ == "__main__":
+    main()
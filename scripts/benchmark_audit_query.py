@@ -0,0 +1,80 @@
+"""
+Audit index query benchmark.
+
+Fills a temporary AuditIndex with synthetic entries spread over a year
+and times typical queries: last-week stats, per-day grouping, one user,
+one file, and a full-range aggregate.
+
+Usage:
+    python scripts/benchmark_audit_query.py --entries 2000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.audit_index import AuditIndex
+
+ACTIONS = ["Analysis Complete"] * 8 + ["Chat Question", "Export Report"]
+
+
+def synthetic_lines(count, seed=0):
+    rng = random.Random(seed)
+    end = datetime(2026, 1, 1)
+    step = timedelta(days=365) / count
+    for i in range(count):
+        stamp = end - timedelta(days=365) + step * i
+        entry = {"timestamp": stamp.isoformat(), "user_id": f"user_{rng.randrange(200)}",
+                 "action": rng.choice(ACTIONS),
+                 "details": {"filename": f"contract_{rng.randrange(50000)}.pdf", "clause_count": rng.randrange(10, 400),
+                             "high_risks": rng.choice([0, 0, 0, 1, 2, 5]), "ai_enabled": rng.random() < 0.7}}
+        yield json.dumps(entry)
+
+
+def timed(label, fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<44} {best * 1000:8.1f} ms  ({len(result)} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = AuditIndex(Path(tmp) / "audit_index.db")
+        start = time.perf_counter()
+        batch = []
+        for line in synthetic_lines(args.entries):
+            batch.append(line)
+            if len(batch) >= 512:  # The writer's default batch size
+                index.add_lines(batch)
+                batch = []
+        index.add_lines(batch)
+        seconds = time.perf_counter() - start
+        print(f"Indexed {args.entries:,} entries in {seconds:.1f}s ({args.entries / seconds:,.0f}/s)")
+
+        week = datetime(2026, 1, 1) - timedelta(days=7)
+        timed("last week, analyses", lambda: index.aggregate(start=week, action="Analysis Complete"))
+        timed("last week, analyses by filename", lambda: index.aggregate(start=week, action="Analysis Complete", group_by="filename"))
+        timed("last 30 days by day", lambda: index.aggregate(start=week - timedelta(days=23), group_by="day"))
+        timed("one user, all time", lambda: index.aggregate(user="user_7"))
+        timed("one file, all time, entries", lambda: index.query(filename="contract_123.pdf"))
+        timed("all time, by action", lambda: index.aggregate(group_by="action"))
+        timed("all time, overall", lambda: index.aggregate())
+
+
+if __name__ == "__main__":
+    main()
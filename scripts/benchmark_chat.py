@@ -0,0 +1,60 @@
+"""
+Multi-turn document chat benchmark.
+
+Uses a stub backend whose latency grows with the number of prompt tokens
+not covered by a recently seen prefix (a stand-in for Ollama's KV cache or
+Gemini cached content) and asks a series of questions about one synthetic
+contract through ChatSession. Turn 1 pays for the whole contract; later
+turns should only pay for the new question plus history.
+
+Usage:
+    python scripts/benchmark_chat.py --clauses 300 --turns 5 --prefill-ms 400
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.chat import ChatSession
+from app.core.llm import llm_service, LLMConfig
+from app.core.providers import StubProvider
+from app.utils.synthetic import generate_contract_text
+
+QUESTIONS = [
+    "What is the termination notice period?",
+    "Who bears liability for defective goods?",
+    "Is there a non-compete and how long does it last?",
+    "Where are disputes resolved?",
+    "What are the payment terms?",
+    "Can the agreement be assigned?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, default=300)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--prefill-ms", type=float, default=400.0, help="Stub latency per 1k uncached prompt tokens")
+    args = parser.parse_args()
+
+    llm_service.register_provider(StubProvider(latency_ms=30, prefill_ms_per_1k=args.prefill_ms))
+    config = LLMConfig(provider="stub", model="stub", chat_tokens=8000)
+    document = generate_contract_text(args.clauses, seed=7)
+
+    chat = ChatSession(llm_service, document, config)
+    print(f"Contract: {len(document):,} chars (~{len(chat.system_prompt) // 4:,} prefix tokens)")
+    for turn in range(args.turns):
+        chat.ask(QUESTIONS[turn % len(QUESTIONS)])
+        print(f"  turn {turn + 1}: {chat.turn_latencies[-1] * 1000:8.1f} ms")
+
+    first, rest = chat.turn_latencies[0], chat.turn_latencies[1:]
+    if rest:
+        mean_rest = sum(rest) / len(rest)
+        print(f"First turn {first * 1000:.1f} ms, later turns avg {mean_rest * 1000:.1f} ms "
+              f"({first / mean_rest:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+DOCX extraction benchmark: python-docx paragraphs (the old reader)
+against the streaming DocxReader.
+
+Each sample contract has a running header, numbered clauses written as
+Word list paragraphs (so the numbers live in numbering.xml, not the
+text) and a payment schedule table every 100 clauses. Reports seconds,
+peak memory growth while reading (each reader in its own process),
+clauses ClauseParser finds, and how many schedule table cells reach
+the text.
+
+Usage:
+    python scripts/benchmark_docx.py --sizes 1000 4000 9000
+"""
+import argparse
+import io
+import logging
+import os
+import sys
+import multiprocessing
+import resource
+import time
+import zipfile
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import docx
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+from app.core.docx_reader import read_docx
+from app.core.parsing import ClauseParser
+from app.utils.synthetic import generate_contract_text
+
+# Keep benchmark runs out of the audit trail
+logging.getLogger("LegalAuditLog").disabled = True
+
+
+NUMBERING = """<w:abstractNum %s w:abstractNumId="90">
+  <w:lvl w:ilvl="0"><w:start w:val="1"/><w:numFmt w:val="decimal"/><w:lvlText w:val="%%1."/></w:lvl>
+  <w:lvl w:ilvl="1"><w:start w:val="1"/><w:numFmt w:val="decimal"/><w:lvlText w:val="%%1.%%2"/></w:lvl>
+</w:abstractNum>""" % nsdecls("w")
+
+
+def numbered(paragraph, level):
+    ppr = paragraph._p.get_or_add_pPr()
+    ppr.append(parse_xml(f'<w:numPr {nsdecls("w")}><w:ilvl w:val="{level}"/><w:numId w:val="90"/></w:numPr>'))
+
+
+def build(n_clauses, seed=0):
+    """
+    Returns (docx bytes, schedule cell texts, numbered paragraphs). Clause
+    numbers come from a two-level list ("1." headings, "1.1" clauses).
+    """
+    document = docx.Document()
+    numbering = document.part.numbering_part.element
+    numbering.insert(0, parse_xml(NUMBERING))
+    numbering.append(parse_xml(f'<w:num {nsdecls("w")} w:numId="90"><w:abstractNumId w:val="90"/></w:num>'))
+    document.sections[0].header.paragraphs[0].text = "CONFIDENTIAL - MASTER SERVICES AGREEMENT"
+
+    lines = generate_contract_text(n_clauses, seed=seed).split("\n")
+    document.add_paragraph(lines[0])
+    cells, section, expected = [], None, 0
+    for k, line in enumerate(lines[1:], start=1):
+        number, text = line.split(" ", 1)
+        if number.split(".")[0] != section:
+            section = number.split(".")[0]
+            numbered(document.add_paragraph(f"Section {section}"), 0)
+            expected += 1
+        numbered(document.add_paragraph(text), 1)
+        expected += 1
+        if k % 100 == 0:
+            table = document.add_table(rows=3, cols=3)
+            rows = [("Milestone", "Due date", "Amount"), (f"Phase {k // 100}", "30 April 2024", f"Rs. {k},000"),
+                    (f"Phase {k // 100} acceptance", "31 May 2024", f"Rs. {k // 2},000")]
+            for r, row in enumerate(rows):
+                for c, value in enumerate(row):
+                    table.cell(r, c).text = value
+                    cells.append(value)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue(), cells, expected
+
+
+def python_docx_text(data):
+    return "\n".join(para.text for para in docx.Document(io.BytesIO(data)).paragraphs)
+
+
+def _measure(reader, data, queue):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    text = reader(data)
+    seconds = time.perf_counter() - start
+    # Peak RSS growth, which also counts lxml's C allocations that tracemalloc misses (KB on Linux)
+    queue.put((text, seconds, (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) * 1024))
+
+
+def measure(reader, data):
+    """Runs one reader in a fresh process so peak memory is its own."""
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(reader, data, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000, 9000], help="Clauses per contract")
+    args = parser.parse_args()
+
+    readers = {"python-docx": python_docx_text, "streaming": lambda data: read_docx(io.BytesIO(data))}
+    print(f"{'clauses':>7} {'xml':>7} {'reader':<12} {'seconds':>8} {'peak MB':>8} {'clauses found':>15} {'cells':>11}")
+    for n in args.sizes:
+        data, cells, expected = build(n, seed=n)
+        xml_size = zipfile.ZipFile(io.BytesIO(data)).getinfo("word/document.xml").file_size
+        for name, reader in readers.items():
+            text, seconds, peak = measure(reader, data)
+            found = sum(1 for span in ClauseParser.parse_spans(text) if span["type"] == "clause")
+            kept = sum(1 for cell in set(cells) if cell in text)
+            print(f"{n:>7} {xml_size / 1e6:>6.1f}M {name:<12} {seconds:>8.2f} {peak / 1e6:>8.1f} "
+                  f"{found:>7}/{expected:<7} {kept:>5}/{len(set(cells)):<5}")
+
+
+if __name__ == "__main__":
+    main()
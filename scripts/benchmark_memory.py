@@ -0,0 +1,102 @@
+"""
+Result memory benchmark.
+
+Measures, with tracemalloc, the bytes per clause held by the old result
+layout (a dict per clause with its own copy of the text, plus a 2,000 char
+sneak peek of the document) against ClauseRecord spans into the shared
+full text. AI outputs cost the same in both layouts and are left out.
+Then pushes many sessions' results through a small ResultCache to show
+resident memory staying within its budget.
+
+Usage:
+    python scripts/benchmark_memory.py --clauses 100 1000 --sessions 50 --budget-mb 8
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.pipeline import ContractPipeline
+from app.core.providers import StubProvider
+from app.core.results import estimate_bytes
+from app.core.store import ResultCache, ResultStore
+from app.utils.synthetic import generate_contract_text, make_upload
+
+# Keep benchmark runs out of the audit trail
+logging.getLogger("LegalAuditLog").disabled = True
+
+
+def analyse(n_clauses, seed=0):
+    text = generate_contract_text(n_clauses, seed=seed)
+    return ContractPipeline.analyze(make_upload(text.encode(), "bench.txt"), "txt")
+
+
+def fill_ai(clauses):
+    filler = StubProvider.FILLER
+    for i, clause in enumerate(clauses):
+        if clause["risk"] != "Low":
+            clause["explanation"] = f"{filler} ({i})"
+            clause["remedy"] = f"{filler} {filler} ({i})"
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return kept, allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--budget-mb", type=float, default=8.0)
+    args = parser.parse_args()
+
+    print(f"{'clauses':>8} {'legacy B/clause':>16} {'compact B/clause':>17} {'saving':>7}")
+    for n_clauses in args.clauses:
+        results = analyse(n_clauses)
+        full_text = results["full_text"]
+        records = results["clauses"]
+        # The full text is held by both layouts; only the sneak peek and per-clause data differ
+        legacy, legacy_bytes = measure(lambda: (full_text[:2000], [r.to_dict() for r in records]))
+        compact, compact_bytes = measure(lambda: [_copy_record(r) for r in records])
+        count = len(records)
+        print(f"{count:>8} {legacy_bytes / count:>16.0f} {compact_bytes / count:>17.0f} "
+              f"{1 - compact_bytes / legacy_bytes:>7.0%}")
+
+    budget = int(args.budget_mb * 1024 * 1024)
+    with tempfile.TemporaryDirectory() as store_dir:
+        cache = ResultCache(budget, ResultStore(Path(store_dir) / "results.db"))
+        total = 0
+        keys = []
+        for session in range(args.sessions):
+            results = analyse(args.clauses[-1], seed=session)
+            fill_ai(results["clauses"])
+            total += estimate_bytes(results)
+            keys.append(f"session-{session}")
+            cache.put(keys[-1], results)
+        stats = cache.stats()
+        print(f"\n{args.sessions} sessions, {total / 2**20:.1f} MB of results, budget {args.budget_mb:.1f} MB: "
+              f"{stats['resident']} resident ({stats['bytes'] / 2**20:.1f} MB), {stats['evictions']} evicted")
+        reloaded = cache.get(keys[0])
+        print(f"Oldest session reloaded from the store: {len(reloaded['clauses'])} clauses, "
+              f"first clause text intact: {reloaded['clauses'][0]['text'][:40]!r}")
+
+
+def _copy_record(record):
+    # Fresh record over the same text buffer, as the pipeline builds them
+    return type(record)(record._doc, record.start, record.end, record.id, record.type, record.risk, record.risk_reason)
+
+
+if __name__ == "__main__":
+    main()
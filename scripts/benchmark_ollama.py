@@ -0,0 +1,93 @@
+"""
+Ollama warm-up and keep-alive benchmark.
+
+Registers a stub under the name "ollama" that charges a model load
+(load_ms) on the first request after the model was idle past its
+keep_alive, the way Ollama does, and replays one user's session:
+pick Standard, read for a few seconds, analyse; stay away longer than
+Ollama's default 5 minute keep_alive; switch to Reasoning, analyse;
+come back later, switch to Standard, analyse. Idle periods move the
+stub's clock instead of sleeping.
+
+  previous   requests sent without options, as before: no warm-up and
+             Ollama's default keep_alive
+  warmed     LLMService.warm_up() when the mode is chosen, and requests
+             pinned with OLLAMA_KEEP_ALIVE plus per-stage num_predict
+
+Reports the first reply's latency after each choice and the load time
+in the usage ledger, then the num_predict and prompt budget per stage.
+
+Usage:
+    python scripts/benchmark_ollama.py --load-ms 1500 --think 2
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import OLLAMA_KEEP_ALIVE, OLLAMA_NUM_CTX
+from app.core.llm import llm_service, LLMConfig
+from app.core.providers import StubProvider
+from app.core.tokens import usage_ledger, MAX_OUTPUT_TOKENS
+
+# Keep benchmark runs out of the audit trail
+logging.getLogger("LegalAuditLog").disabled = True
+
+MODELS = {"standard": "mistral", "reasoning": "deepseek-r1"}
+SESSION = [("standard", 0), ("reasoning", 6 * 60), ("standard", 20 * 60)]  # (mode, seconds idle before choosing it)
+PROMPT = "Explain this clause in simple English: The Supplier may terminate this Agreement on 30 days notice."
+
+
+def run(strategy, stub, think):
+    llm_service.register_provider(stub)
+    llm_service._warmed.clear()
+    since = time.time()
+    latencies = []
+    for mode, idle in SESSION:
+        stub.advance(idle)
+        config = LLMConfig(provider="ollama", model=MODELS[mode], mode=mode, hedge=False)
+        if strategy == "warmed":
+            llm_service.warm_up(config)
+        time.sleep(think)  # The user reads the page and uploads a contract
+        start = time.perf_counter()
+        if strategy == "warmed":
+            llm_service._call_llm(PROMPT, config, "explanation")
+        else:
+            messages = [{"role": "user", "content": PROMPT}]
+            llm_service.router.call([("ollama", config.model)], messages, hedge=False, stage="explanation")
+        latencies.append((mode, time.perf_counter() - start))
+    return latencies, usage_ledger.summary("model", since=since)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--load-ms", type=float, default=1500.0, help="Stub model load time")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Stub generation time")
+    parser.add_argument("--think", type=float, default=2.0, help="Seconds between choosing a mode and analysing")
+    args = parser.parse_args()
+
+    print(f"{'strategy':<9} " + " ".join(f"{mode + ' (s)':>15}" for mode, _ in SESSION) + f" {'loads (s)':>10}")
+    for strategy in ("previous", "warmed"):
+        stub = StubProvider(name="ollama", load_ms=args.load_ms, latency_ms=args.latency_ms,
+                            context_tokens=OLLAMA_NUM_CTX)
+        latencies, by_model = run(strategy, stub, args.think)
+        loads = sum(row["load_seconds"] for row in by_model.values())
+        print(f"{strategy:<9} " + " ".join(f"{seconds:>15.2f}" for _, seconds in latencies) + f" {loads:>10.2f}")
+    print(f"(keep_alive: Ollama default 5m vs {OLLAMA_KEEP_ALIVE}; "
+          f"idle {', '.join(str(idle // 60) + 'm' for _, idle in SESSION[1:])} before the later choices)\n")
+
+    print(f"{'stage':<22} {'num_predict':>11} {'reasoning':>10} {'prompt budget @ num_ctx':>24}")
+    window = llm_service.context_window("ollama", MODELS["standard"])
+    for stage in MAX_OUTPUT_TOKENS:
+        budgets = [llm_service.prompt_budget(LLMConfig(provider="ollama", model=MODELS[mode], mode=mode), stage)
+                   for mode in ("standard", "reasoning")]
+        print(f"{stage:<22} {llm_service.output_limit(stage):>11} {llm_service.output_limit(stage, True):>10} "
+              f"{budgets[0]:>10} / {budgets[1]:<6} @ {window}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+End-to-end pipeline benchmark on synthetic contracts.
+
+Generates contracts of several sizes and formats, runs ContractPipeline
+against the deterministic stub LLM provider at several concurrency
+settings, and records per-stage and total timings (median of --repeat runs)
+to a JSON file. Pass --compare to diff against an earlier results file and
+exit non-zero on regressions.
+
+Usage:
+    python scripts/benchmark_pipeline.py --clauses 10 100 1000 --formats txt docx pdf \
+        --concurrency 1 4 16 --output bench_results.json
+    python scripts/benchmark_pipeline.py --compare bench_baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.llm import llm_service, LLMConfig
+from app.core.pipeline import ContractPipeline
+from app.core.providers import StubProvider
+from app.utils.synthetic import generate_contract_text, render, make_upload
+
+# Timings below this many seconds are too noisy to flag as regressions
+MIN_COMPARABLE_SECONDS = 0.005
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def run_case(data, file_type, enable_ai, config, repeat):
+    """Runs the pipeline `repeat` times and returns median timings."""
+    totals, stages = [], {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = ContractPipeline.run(make_upload(data, f"bench.{file_type}"), file_type,
+                                       enable_ai=enable_ai, llm_config=config)
+        totals.append(time.perf_counter() - start)
+        if "error" in results:
+            raise RuntimeError(results["error"])
+        for stage, seconds in results["timings"].items():
+            stages.setdefault(stage, []).append(seconds)
+    return {
+        "clauses": len(results["clauses"]),
+        "total": statistics.median(totals),
+        "stages": {stage: statistics.median(values) for stage, values in stages.items()},
+    }
+
+
+def compare(current, baseline, threshold):
+    """Returns a list of human-readable regression descriptions."""
+    regressions = []
+    for key, new in current["results"].items():
+        old = baseline.get("results", {}).get(key)
+        if not old:
+            continue
+        metrics = [("total", new["total"], old["total"])]
+        metrics += [(stage, secs, old["stages"].get(stage)) for stage, secs in new["stages"].items()]
+        for name, new_s, old_s in metrics:
+            if old_s is None or max(new_s, old_s) < MIN_COMPARABLE_SECONDS:
+                continue
+            if new_s > old_s * (1 + threshold):
+                regressions.append(f"{key} {name}: {old_s * 1000:.1f}ms -> {new_s * 1000:.1f}ms (+{(new_s / old_s - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--formats", nargs="+", default=["txt", "docx", "pdf"], choices=["txt", "docx", "pdf"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stub", default="distribution=lognormal,latency_ms=20,sigma=0.4,error_rate=0.01",
+                        help="StubProvider spec, see StubProvider.from_spec")
+    parser.add_argument("--no-ai", action="store_true", help="Only benchmark the deterministic stages")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Earlier results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown ratio before flagging")
+    args = parser.parse_args()
+
+    stub = StubProvider.from_spec(args.stub)
+    llm_service.register_provider(stub)
+    # Keep benchmark runs out of the audit trail
+    logging.getLogger("LegalAuditLog").disabled = True
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "stub": args.stub,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+
+    for file_type in args.formats:
+        for n_clauses in args.clauses:
+            data = render(generate_contract_text(n_clauses, seed=n_clauses), file_type)
+            key = f"{file_type}/{n_clauses}/no-ai"
+            report["results"][key] = run_case(data, file_type, False, None, args.repeat)
+            print(f"{key:<24} {report['results'][key]['total'] * 1000:>10.1f} ms")
+            if args.no_ai:
+                continue
+            for workers in args.concurrency:
+                config = LLMConfig(provider="stub", model="stub", concurrency=workers)
+                key = f"{file_type}/{n_clauses}/ai-c{workers}"
+                report["results"][key] = run_case(data, file_type, True, config, args.repeat)
+                print(f"{key:<24} {report['results'][key]['total'] * 1000:>10.1f} ms")
+
+    report["meta"]["stub_calls"] = stub.calls
+    report["meta"]["stub_errors"] = stub.errors
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"REGRESSIONS vs {args.compare} ({baseline['meta'].get('commit')}):")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"No regressions vs {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Portfolio search benchmark.
+
+Analyses synthetic contracts into a temporary PortfolioIndex (FTS5 and the
+postings fallback) and times typical searches.
+
+Usage:
+    python scripts/benchmark_portfolio.py --documents 3000 --clauses 30
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.pipeline import ContractPipeline
+from app.core.portfolio import PortfolioIndex, _fts5_available
+from app.core.store import content_hash
+from app.utils.synthetic import generate_contract_text, make_upload
+
+# Keep benchmark runs out of the audit trail
+logging.getLogger("LegalAuditLog").disabled = True
+
+QUERIES = [
+    ("unlimited liability", {}),
+    ("non-compete", {}),
+    ("terminate", {"risks": ["High"]}),
+    ("indemnify", {"types": ["Obligation"], "risks": ["High", "Medium"]}),
+    ("", {"risks": ["High"], "entity": "Delhi"}),
+    ("invoice", {"filename": "contract_1*.txt"}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=3000)
+    parser.add_argument("--clauses", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    analysed = []
+    for i in range(args.documents):
+        data = generate_contract_text(args.clauses, seed=i).encode()
+        analysed.append((content_hash(data), ContractPipeline.analyze(make_upload(data, f"contract_{i}.txt"), "txt")))
+
+    modes = [True, False] if _fts5_available() else [False]
+    with tempfile.TemporaryDirectory() as tmp:
+        for use_fts in modes:
+            index = PortfolioIndex(Path(tmp) / f"portfolio_{use_fts}.db", use_fts=use_fts)
+            start = time.perf_counter()
+            for doc_id, results in analysed:
+                index.add_document(doc_id, results)
+            seconds = time.perf_counter() - start
+            stats = index.stats()
+            print(f"\n{'FTS5' if use_fts else 'postings fallback'}: indexed {stats['documents']:,} documents / "
+                  f"{stats['clauses']:,} clauses in {seconds:.1f}s ({seconds / args.documents * 1000:.1f} ms/doc)")
+            for query, filters in QUERIES:
+                best = float("inf")
+                for _ in range(args.repeat):
+                    t = time.perf_counter()
+                    hits = index.search(query, limit=50, **filters)
+                    best = min(best, time.perf_counter() - t)
+                label = f"{query!r} {filters}" if filters else repr(query)
+                print(f"  {label:<70} {best * 1000:7.1f} ms  {len(hits)} hits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Precedent matching benchmark.
+
+1. Detection: paraphrased risky clauses (none of them in the library, most
+   missed by the keyword rules) and neutral/standard clauses, scored by the
+   keyword RiskEngine alone and with the precedent signal added.
+2. Speed: batched matching of synthetic clauses against libraries of
+   growing size, exact matrix product vs the LSH index, with LSH recall of
+   the exact nearest precedent.
+
+Usage:
+    python scripts/benchmark_precedents.py --sizes 1000 10000 50000 --queries 1000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.precedents import PrecedentLibrary, precedent_library
+from app.core.risk import RiskEngine
+from app.utils.synthetic import generate_contract_text
+
+# (clause, expected level) - written independently of the library texts
+PARAPHRASES = [
+    ("The Company may end this contract whenever it likes.", "High"),
+    ("Either side can walk away from the deal at any moment without giving reasons.", "High"),
+    ("The Supplier's liability shall not be limited in any way.", "High"),
+    ("The Contractor accepts liability without limit for breach.", "High"),
+    ("After termination the Employee will not join any competing firm for three years.", "High"),
+    ("The Company can change these terms at any time without notice.", "High"),
+    ("The Distributor may cancel this arrangement at its convenience without cause.", "High"),
+    ("The Vendor shall hold the Client harmless from all third party claims.", "Medium"),
+    ("This contract renews automatically each year unless cancelled in advance.", "Medium"),
+    ("Any delay shall attract liquidated damages payable to the Buyer for each week.", "Medium"),
+    ("All inventions made by the Consultant shall vest in the Client.", "Medium"),
+    ("Either party may terminate this agreement with sixty days written notice.", "Low"),
+    ("Each party's aggregate liability is capped at the fees paid in the prior twelve months.", "Low"),
+    ("The Licensee has the right to use the Software at its principal place of business.", "Low"),
+    ("Notices shall be delivered in writing to the registered office.", "Low"),
+    ("The Supplier shall deliver the Goods to the premises within 30 days.", "Low"),
+    ("In this Agreement, Effective Date means 1st April 2024.", "Low"),
+    ("This Agreement is governed by the laws of India.", "Low"),
+]
+
+
+def detection():
+    rule_hits = precedent_hits = false_raises = risky = 0
+    matches = precedent_library.match([text for text, _ in PARAPHRASES])
+    print(f"{'expected':>8} {'rules':>6} {'+prec':>6} {'score':>6}  clause")
+    for (text, expected), match in zip(PARAPHRASES, matches):
+        rule = RiskEngine.evaluate(text)
+        combined = rule
+        if match is not None and match.escalates():
+            combined = RiskEngine.escalate(rule, match.signal)
+        if expected != "Low":
+            risky += 1
+            rule_hits += rule[0] != "Low"
+            precedent_hits += combined[0] != "Low"
+        elif combined[0] != "Low":
+            false_raises += 1
+        score = f"{match.score:.2f}" if match else "-"
+        print(f"{expected:>8} {rule[0]:>6} {combined[0]:>6} {score:>6}  {text[:70]}")
+    print(f"\nRisky paraphrases flagged: rules {rule_hits}/{risky}, rules + precedents {precedent_hits}/{risky}; "
+          f"neutral clauses wrongly raised: {false_raises}")
+
+
+def synthetic_library(size, seed=0):
+    rng = random.Random(seed)
+    base = precedent_library.precedents
+    lines = generate_contract_text(size, seed=seed).split("\n")[1:]
+    library = []
+    for i, line in enumerate(lines):
+        source = rng.choice(base)
+        text = line.split(" ", 1)[1] + " " + " ".join(rng.sample(source["text"].split(), 6))
+        library.append({**source, "id": f"SYN-{i}", "text": text})
+    return library
+
+
+def speed(sizes, n_queries):
+    queries = [line.split(" ", 1)[1] for line in generate_contract_text(n_queries, seed=99).split("\n")[1:]]
+    print(f"\n{'library':>8} {'build s':>8} {'exact ms':>9} {'lsh ms':>8} {'recall@1':>9}")
+    for size in sizes:
+        start = time.perf_counter()
+        library = PrecedentLibrary(synthetic_library(size), lsh_threshold=0)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        exact = library.match(queries, min_score=0, exact=True)
+        exact_s = time.perf_counter() - start
+        start = time.perf_counter()
+        approx = library.match(queries, min_score=0)
+        lsh_s = time.perf_counter() - start
+
+        agree = sum(1 for e, a in zip(exact, approx)
+                    if a is not None and (a.precedent["id"] == e.precedent["id"] or abs(a.score - e.score) < 1e-6))
+        print(f"{size:>8} {build:>8.2f} {exact_s * 1000:>9.1f} {lsh_s * 1000:>8.1f} {agree / len(queries):>9.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    detection()
+    speed(args.sizes, args.queries)
+
+
+if __name__ == "__main__":
+    main()
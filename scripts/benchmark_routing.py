@@ -0,0 +1,74 @@
+"""
+Hedged routing benchmark.
+
+Registers two stub backends ("stub" with a heavy latency tail, "stub-b"
+with steady latency) and sends the same workload through the router with
+hedging off and on, reporting p50/p95/p99 end-to-end latency. A second
+phase makes the primary fail every call and shows the circuit opening and
+traffic failing over.
+
+Usage:
+    python scripts/benchmark_routing.py --requests 400 --workers 16
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.llm import llm_service, LLMConfig
+from app.core.providers import StubProvider
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))]
+
+
+def run(n_requests, workers, hedge, tag):
+    config = LLMConfig(provider="stub", model="stub", hedge=hedge)
+
+    def one(i):
+        start = time.perf_counter()
+        answer = llm_service.explain_clause(f"{tag} clause {i}", config=config)
+        return time.perf_counter() - start, answer is not None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(one, range(n_requests)))
+    latencies = [lat for lat, _ in outcomes]
+    failures = sum(1 for _, ok in outcomes if not ok)
+    print(f"{tag:<12} p50 {statistics.median(latencies) * 1000:7.1f}ms  "
+          f"p95 {percentile(latencies, 95) * 1000:7.1f}ms  p99 {percentile(latencies, 99) * 1000:7.1f}ms  "
+          f"failed {failures}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    llm_service.register_provider(StubProvider(distribution="lognormal", latency_ms=40, sigma=1.2, name="stub"), "stub")
+    llm_service.register_provider(StubProvider(distribution="uniform", latency_ms=60, spread_ms=10, name="stub-b"), "stub-b")
+    llm_service.hedge_targets = ["stub", "stub-b"]
+    llm_service.router.min_samples = 20
+
+    # Warm up the rolling latency window so p95 is known
+    run(100, args.workers, False, "warm-up")
+    run(args.requests, args.workers, False, "no-hedge")
+    run(args.requests, args.workers, True, "hedged")
+
+    print("\nPrimary failing every call:")
+    llm_service.register_provider(StubProvider(error_rate=1.0, latency_ms=5, name="stub"), "stub")
+    run(args.requests, args.workers, True, "fail-over")
+    for name, health in llm_service.router.snapshot().items():
+        print(f"  {name:<8} circuit={health['circuit']:<9} error_rate={health['error_rate']:.0%} "
+              f"p95={(health['p95'] or 0) * 1000:.1f}ms samples={health['samples']}")
+
+
+if __name__ == "__main__":
+    main()
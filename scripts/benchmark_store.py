@@ -0,0 +1,72 @@
+"""
+Results store benchmark.
+
+Analyses synthetic contracts, saves them to a temporary ResultStore and
+compares re-running the pipeline with a full reload and a summary-only
+load. Also checks the reloaded results match the originals.
+
+Usage:
+    python scripts/benchmark_store.py --clauses 100 1000 5000 --repeat 5
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.pipeline import ContractPipeline
+from app.core.providers import StubProvider
+from app.core.store import ResultStore, result_key
+from app.utils.synthetic import generate_contract_text, make_upload
+
+# Keep benchmark runs out of the audit trail
+logging.getLogger("LegalAuditLog").disabled = True
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = ResultStore(Path(store_dir) / "results.db")
+        print(f"{'clauses':>8} {'analyze ms':>11} {'save ms':>8} {'load ms':>8} {'summary ms':>11} {'row KB':>7}  match")
+        for n_clauses in args.clauses:
+            data = generate_contract_text(n_clauses, seed=n_clauses).encode()
+            analyze_s, results = best_of(args.repeat, lambda: ContractPipeline.analyze(make_upload(data, "bench.txt"), "txt"))
+            for i, clause in enumerate(results["clauses"]):
+                if clause["risk"] != "Low":
+                    clause["remedy"] = f"{StubProvider.FILLER} ({i})"
+
+            key = result_key(data, enable_ai=False)
+            save_s, _ = best_of(args.repeat, lambda: store.save(key, results))
+            load_s, loaded = best_of(args.repeat, lambda: store.load(key))
+            summary_s, summary = best_of(args.repeat, lambda: store.load_summary(key))
+
+            row_bytes = store._conn.execute(
+                "SELECT length(summary) + length(body) FROM results WHERE key = ?", (key,)
+            ).fetchone()[0]
+            match = ([c.to_dict() for c in loaded["clauses"]] == [c.to_dict() for c in results["clauses"]]
+                     and loaded["risk_summary"] == summary["risk_summary"] == results["risk_summary"]
+                     and loaded["index"] == results["index"])
+            print(f"{len(results['clauses']):>8} {analyze_s * 1000:>11.1f} {save_s * 1000:>8.1f} "
+                  f"{load_s * 1000:>8.1f} {summary_s * 1000:>11.2f} {row_bytes / 1024:>7.0f}  {'ok' if match else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
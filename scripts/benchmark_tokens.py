@@ -0,0 +1,158 @@
+"""
+Token budgeting benchmark.
+
+1. Fit: prompt tokens of the old fixed character cut-offs versus the new
+   window-aware compaction, for English and Hindi contracts, per model
+   family, against that model's context window.
+2. Coverage: how many risky clauses reach a summary prompt for a 4k
+   window with head truncation versus priority packing, on a long noisy
+   contract whose risky clauses are spread through the document.
+3. Ledger: per-stage usage recorded for one enriched analysis (stub LLM).
+
+Usage:
+    python scripts/benchmark_tokens.py --clauses 600
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import CONTEXT_MARGIN, OLLAMA_DEFAULT_NUM_CTX
+from app.core.llm import llm_service, LLMConfig
+from app.core.pipeline import ContractPipeline
+from app.core.providers import StubProvider
+from app.core.tokens import compact, token_estimator, usage_ledger, EXPECTED_OUTPUT_TOKENS
+from app.utils.synthetic import generate_contract_text, make_upload
+
+# Keep benchmark runs out of the audit trail
+logging.getLogger("LegalAuditLog").disabled = True
+
+HINDI_TEMPLATES = [
+    "किरायेदार प्रत्येक माह की {day} तारीख तक रु. {amount} किराया मकान मालिक को देगा।",
+    "कोई भी पक्ष {days} दिन की लिखित सूचना देकर इस अनुबंध को समाप्त कर सकता है।",
+    "आपूर्तिकर्ता क्रय आदेश के {days} दिनों के भीतर माल की डिलीवरी करेगा।",
+    "इस अनुबंध से उत्पन्न सभी विवाद मुंबई में मध्यस्थता द्वारा सुलझाए जाएंगे।",
+    "कर्मचारी सेवा समाप्ति के {days} महीने बाद तक किसी प्रतिस्पर्धी व्यवसाय में शामिल नहीं होगा।",
+    "विक्रेता ग्राहक को सभी दावों, हानियों और क्षतियों से क्षतिपूर्ति देगा।",
+]
+
+RISKY_CLAUSES = [
+    "Either party may terminate at any time by giving written notice to the other party.",
+    "The Contractor will be liable without limit and accepts unlimited liability for any breach.",
+    "The Employee shall not engage in any competing business and accepts this non-compete for 24 months.",
+    "The Vendor agrees to indemnify the Client against all losses, claims and damages.",
+    "The Distributor is granted exclusivity for the territory of Maharashtra for the Term.",
+    "All disputes shall be referred to arbitration seated in Mumbai.",
+    "The Company may terminate this agreement at any time at its sole discretion.",
+    "The Licensee shall indemnify the Licensor for any third party claims.",
+]
+
+# (label, provider, model, old cut-off in characters for the summary prompt, window)
+MODELS = [
+    ("gemini-1.5-flash", "gemini", "models/gemini-1.5-flash", 30000, 1_000_000),
+    ("mistral (Ollama)", "ollama", "mistral", 12000, OLLAMA_DEFAULT_NUM_CTX),
+    ("llama3.1 (Ollama)", "ollama", "llama3.1", 12000, OLLAMA_DEFAULT_NUM_CTX),
+    ("deepseek-r1 (Ollama)", "ollama", "deepseek-r1:14b", 12000, OLLAMA_DEFAULT_NUM_CTX),
+]
+
+
+def hindi_contract(n_clauses, seed=0):
+    rng = random.Random(seed)
+    lines = ["किराया अनुबंध"]
+    for k in range(n_clauses):
+        clause = rng.choice(HINDI_TEMPLATES).format(day=rng.randint(1, 10), days=rng.choice([15, 30, 60, 90]),
+                                                    amount=f"{rng.randint(5, 90) * 1000:,}")
+        lines.append(f"{k // 10 + 1}.{k % 10 + 1} {clause}")
+    return "\n".join(lines)
+
+
+def noisy(text, seed=0):
+    """Adds the layout noise PDF/OCR extraction leaves behind."""
+    rng = random.Random(seed)
+    out = []
+    for i, line in enumerate(text.split("\n")):
+        out.append(line.replace(" ", "  ") if rng.random() < 0.3 else line)
+        if i % 40 == 39:
+            out += ["", "CONFIDENTIAL - MASTER SERVICES AGREEMENT", f"Page {i // 40 + 1} of 99", "_" * 30, ""]
+    return "\n".join(out)
+
+
+def fit(n_clauses):
+    documents = {"English": generate_contract_text(n_clauses, seed=3), "Hindi": hindi_contract(n_clauses, seed=3)}
+    print(f"{'model':<22} {'text':<8} {'window':>9} {'old prompt':>11} {'fits':>5} {'new prompt':>11} {'fits':>5}")
+    for label, provider, model, old_chars, window in MODELS:
+        budget = min(int(window * (1 - CONTEXT_MARGIN)) - EXPECTED_OUTPUT_TOKENS["comprehensive_summary"] - 250, 8000)
+        for language, text in documents.items():
+            old = token_estimator.count(text[:old_chars], provider, model) + 250
+            new_text, _ = compact(text, budget, token_estimator, provider, model)
+            new = token_estimator.count(new_text, provider, model) + 250
+            limit = window - EXPECTED_OUTPUT_TOKENS["comprehensive_summary"]
+            print(f"{label:<22} {language:<8} {window:>9,} {old:>11,} {'yes' if old <= limit else 'NO':>5} "
+                  f"{new:>11,} {'yes' if new <= limit else 'NO':>5}")
+
+
+def long_contract(n_clauses, seed=0):
+    """Distinct routine clauses with RISKY_CLAUSES spread through the later two thirds."""
+    rng = random.Random(seed)
+    texts = [f"The Supplier shall deliver the items listed in Annexure {k} to the premises of the Client "
+             f"within {rng.choice([7, 15, 30])} days of the purchase order reference {1000 + k}." for k in range(n_clauses)]
+    for risky in RISKY_CLAUSES:
+        texts.insert(rng.randint(n_clauses // 3, len(texts)), risky)
+    lines = ["MASTER SUPPLY AGREEMENT"]
+    per_section = max(10, -(-len(texts) // 99))
+    lines += [f"{k // per_section + 1}.{k % per_section + 1} {text}" for k, text in enumerate(texts)]
+    return "\n".join(lines)
+
+
+def coverage(n_clauses):
+    text = noisy(long_contract(n_clauses, seed=7))
+    results = ContractPipeline.analyze(make_upload(text.encode(), "long.txt"), "txt")
+    clauses = results["clauses"]
+    provider, model = "ollama", "mistral"
+    budget = int(OLLAMA_DEFAULT_NUM_CTX * (1 - CONTEXT_MARGIN)) - EXPECTED_OUTPUT_TOKENS["comprehensive_summary"] - 250
+
+    head = text[:token_estimator.chars_for(text, budget, provider, model)]
+    start = time.perf_counter()
+    packed, stats = compact(text, budget, token_estimator, provider, model, clauses=clauses)
+    seconds = time.perf_counter() - start
+
+    def covered(prompt):
+        flat = " ".join(prompt.split())
+        return sum(1 for risky in RISKY_CLAUSES if risky in flat)
+
+    print(f"\n{len(clauses)} clauses, {len(RISKY_CLAUSES)} risky; budget {budget:,} tokens for {model}")
+    print(f"  normalization: {stats['original_tokens']:,} -> {stats['normalized_tokens']:,} tokens")
+    print(f"  head truncation: {covered(head)}/{len(RISKY_CLAUSES)} risky clauses in the prompt")
+    print(f"  priority packing: {covered(packed)}/{len(RISKY_CLAUSES)} risky clauses, {stats['kept']} clauses kept "
+          f"in {seconds * 1000:.0f} ms")
+
+
+def ledger(n_clauses):
+    llm_service.register_provider(StubProvider(latency_ms=5))
+    config = LLMConfig(provider="stub", model="stub", deadline_s=None, token_budget=None)
+    since = time.time()
+    ContractPipeline.run(make_upload(generate_contract_text(n_clauses, seed=11).encode(), "ledger.txt"), "txt",
+                         enable_ai=True, llm_config=config)
+    print(f"\n{'stage':<22} {'calls':>5} {'prompt tok':>10} {'output tok':>10} {'avg ms':>7}")
+    for stage, row in sorted(usage_ledger.summary("stage", since=since).items()):
+        print(f"{stage:<22} {row['calls']:>5} {row['prompt_tokens']:>10,} {row['completion_tokens']:>10,} "
+              f"{row['avg_latency'] * 1000:>7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, default=600)
+    args = parser.parse_args()
+
+    fit(args.clauses)
+    coverage(args.clauses)
+    ledger(args.clauses)
+
+
+if __name__ == "__main__":
+    main()
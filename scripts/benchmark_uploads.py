@@ -0,0 +1,118 @@
+"""
+Upload memory benchmark.
+
+Builds a large scanned-style PDF (one full-page image per page, plus a
+line of text so there is something to extract without OCR) and ingests
+it three ways, each in a fresh process holding the upload in memory the
+way Streamlit does:
+
+  previous    what ingestion used to do: getvalue() for the result key
+              and again for the portfolio hash, then pdfplumber over
+              every page of the in-memory upload
+  in memory   spool() with spooling disabled: zero-copy views only
+  spooled     spool() as configured: large uploads go to UPLOAD_DIR once
+              and PyMuPDF/pdfplumber open the file by path
+
+Reports seconds and peak RSS growth over the upload itself.
+
+Usage:
+    python scripts/benchmark_uploads.py --mb 200
+"""
+import argparse
+import hashlib
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import fitz
+import pdfplumber
+
+from app.core import uploads
+from app.core.ingestion import DocumentIngestor
+from app.core.store import content_hash
+from app.utils.synthetic import generate_contract_text, make_upload
+
+# Keep benchmark runs out of the audit trail
+logging.getLogger("LegalAuditLog").disabled = True
+
+
+def build_scan(path, megabytes):
+    """PDF of noise images (incompressible, like scans) totalling about `megabytes`."""
+    lines = generate_contract_text(400, seed=5).split("\n")
+    doc = fitz.open()
+    for k in range(max(1, megabytes)):
+        page = doc.new_page()
+        # 640x546 RGB noise: about 1 MB per page once PNG-encoded
+        pixmap = fitz.Pixmap(fitz.csRGB, 640, 546, os.urandom(640 * 546 * 3), 0)
+        page.insert_image(page.rect, stream=pixmap.tobytes("png"))
+        page.insert_text((40, 40), lines[k % len(lines)], fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def previous(upload_file):
+    """The ingestion path before spooling (the text layer is dense enough that it never reached OCR)."""
+    hashlib.sha256(upload_file.getvalue()).hexdigest()  # result_key
+    hashlib.sha256(upload_file.getvalue()).hexdigest()  # portfolio content_hash
+    with pdfplumber.open(upload_file) as pdf:
+        return "\n".join(page.extract_text(x_tolerance=1) or "" for page in pdf.pages)
+
+
+def through_spool(upload_file):
+    with uploads.spooled(upload_file) as upload:
+        content_hash(upload)
+        content_hash(upload)
+        return DocumentIngestor.extract(upload, "pdf")
+
+
+def _run(mode, path, queue):
+    with open(path, "rb") as f:
+        upload_file = make_upload(f.read(), "scan.pdf")
+    if mode == "in memory":
+        uploads.UPLOAD_SPOOL_BYTES = 1 << 62
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    text = previous(upload_file) if mode == "previous" else through_spool(upload_file)
+    seconds = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((seconds, (after - before) * 1024, len(text)))
+
+
+def measure(mode, path):
+    context = multiprocessing.get_context("spawn")  # Fresh processes: fork would inherit the builder's peak RSS
+    queue = context.Queue()
+    process = context.Process(target=_run, args=(mode, path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=int, default=200, help="Approximate PDF size")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        build_scan(path, args.mb)
+        size = os.path.getsize(path)
+        print(f"scanned PDF: {size / 1e6:.0f} MB, {fitz.open(path).page_count} pages\n")
+        print(f"{'mode':<10} {'seconds':>8} {'peak RSS growth':>16} {'chars':>7}")
+        for mode in ("previous", "in memory", "spooled"):
+            seconds, growth, chars = measure(mode, path)
+            print(f"{mode:<10} {seconds:>8.2f} {growth / 1e6:>13.0f} MB {chars:>7}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Concurrent-session load test for the analysis pipeline.
+
+Simulates N Streamlit sessions analysing contracts at the same time, each
+with its own LLMConfig (distinct model name), against the deterministic stub
+provider, which sleeps to mimic network latency and echoes the model it was
+called with.
+
+Checks:
+  * Throughput (analyses/sec) grows with the number of concurrent users.
+  * No cross-talk: every AI output in a session was produced by that
+    session's own model.
+
+Usage:
+    python scripts/load_test_sessions.py --users 1 2 4 8 16 --latency 0.05
+"""
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.llm import llm_service, LLMConfig
+from app.core.pipeline import ContractPipeline
+from app.core.providers import StubProvider
+
+
+SAMPLE_CONTRACT = "\n".join([
+    "1. The Supplier shall deliver the goods within 30 days.",
+    "2. The Client may terminate at any time by written notice.",
+    "3. The Supplier agrees to indemnify the Client against all claims.",
+    "4. The Supplier shall not engage with competitors (non-compete).",
+    "5. All disputes shall be referred to arbitration in Mumbai.",
+])
+
+
+def run_session(session_no):
+    config = LLMConfig(provider="stub", model=f"session-model-{session_no}")
+    file_obj = io.BytesIO(SAMPLE_CONTRACT.encode("utf-8"))
+    file_obj.name = f"contract_{session_no}.txt"
+
+    results = ContractPipeline.run(file_obj, "txt", enable_ai=True, llm_config=config)
+
+    outputs = [c["explanation"] for c in results["clauses"] if c["explanation"]]
+    outputs += [c["remedy"] for c in results["clauses"] if c["remedy"]]
+    outputs += [results["ai_summary"], results["comprehensive_summary"]]
+    tag = f"[{config.model}]"
+    leaked = [o for o in outputs if o and o.startswith("[") and not o.startswith(tag)]
+    return len(outputs), leaked
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--runs-per-user", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM latency in seconds")
+    args = parser.parse_args()
+
+    llm_service.register_provider(StubProvider(latency_ms=args.latency * 1000))
+    # Keep load-test runs out of the audit trail
+    logging.getLogger("LegalAuditLog").disabled = True
+
+    baseline = None
+    failed = False
+    print(f"{'users':>6} {'runs':>6} {'seconds':>9} {'runs/s':>8} {'speedup':>8} {'leaks':>6}")
+    for users in args.users:
+        jobs = users * args.runs_per_user
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=users) as pool:
+            outcomes = list(pool.map(run_session, range(jobs)))
+        elapsed = time.perf_counter() - start
+
+        throughput = jobs / elapsed
+        baseline = baseline or throughput
+        leaks = sum(len(leaked) for _, leaked in outcomes)
+        failed = failed or leaks > 0
+        print(f"{users:>6} {jobs:>6} {elapsed:>9.2f} {throughput:>8.2f} {throughput / baseline:>7.1f}x {leaks:>6}")
+
+    if failed:
+        print("FAIL: responses leaked between sessions")
+        sys.exit(1)
+    print("OK: no cross-session leakage")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Search clauses across every analysed contract.
+
+Examples:
+    python scripts/portfolio_search.py index contracts/            # analyse + index files
+    python scripts/portfolio_search.py search "unlimited liability" --risk High
+    python scripts/portfolio_search.py search non-compete --type Prohibition --entity Mumbai
+    python scripts/portfolio_search.py search --risk High --file "*.pdf" --limit 20
+    python scripts/portfolio_search.py stats
+
+Search text: words are ANDed; quoted text and hyphenated words match as phrases.
+"""
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import SUPPORTED_EXTENSIONS
+from app.core.pipeline import ContractPipeline
+from app.core.portfolio import portfolio_index
+from app.core.store import content_hash
+
+
+def index_paths(paths):
+    files = []
+    for path in map(Path, paths):
+        candidates = path.rglob("*") if path.is_dir() else [path]
+        files.extend(p for p in candidates if p.suffix.lower().lstrip(".") in SUPPORTED_EXTENSIONS)
+
+    for path in sorted(files):
+        data = path.read_bytes()
+        upload = io.BytesIO(data)
+        upload.name = path.name
+        start = time.perf_counter()
+        results = ContractPipeline.analyze(upload, path.suffix.lower().lstrip("."))
+        if "error" in results:
+            print(f"  skipped {path}: {results['error']}")
+            continue
+        portfolio_index.add_document(content_hash(data), results)
+        print(f"  indexed {path} ({len(results['clauses'])} clauses, {time.perf_counter() - start:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["index", "search", "stats"])
+    parser.add_argument("terms", nargs="*", help="Files/directories to index, or the search text")
+    parser.add_argument("--risk", action="append", help="High, Medium or Low (repeatable)")
+    parser.add_argument("--type", action="append", help="Clause type, e.g. Obligation (repeatable)")
+    parser.add_argument("--entity", help="Documents with an entity containing this text")
+    parser.add_argument("--file", help="Exact filename or a glob such as '*.pdf'")
+    parser.add_argument("--file-type", choices=SUPPORTED_EXTENSIONS)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--full", action="store_true", help="Print whole clause text instead of a snippet")
+    args = parser.parse_args()
+
+    if args.command == "index":
+        # Batch indexing should not flood the audit trail
+        logging.getLogger("LegalAuditLog").disabled = True
+        index_paths(args.terms)
+    elif args.command == "stats":
+        stats = portfolio_index.stats()
+        print(f"{stats['documents']:,} documents, {stats['clauses']:,} clauses "
+              f"({'FTS5' if stats['fts5'] else 'postings fallback'})")
+    else:
+        start = time.perf_counter()
+        hits = portfolio_index.search(" ".join(args.terms), risks=args.risk, types=args.type, entity=args.entity,
+                                      filename=args.file, file_type=args.file_type, limit=args.limit)
+        elapsed = time.perf_counter() - start
+        for hit in hits:
+            text = portfolio_index.clause_text(hit["doc_id"], hit["position"]) if args.full else hit["snippet"]
+            print(f"{hit['filename']} [{hit['doc_id'][:12]}] clause {hit['clause_id']} "
+                  f"(#{hit['position']}, {hit['risk']}, {hit['type']})\n    {text}")
+        print(f"{len(hits)} matches in {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,9 +14,7 @@ print(f"Offline: {llm_service.is_offline}")
 if not llm_service.is_offline:
     print("Testing Generation...")
     try:
-        # Bypass _call_llm's try-except to see full traceback if needed, 
-        # but _call_llm returns the string error.
-        # Let's just print the result and if it starts with "Gemini Error", print it carefully.
+        # _call_llm raises LLMUnavailableError listing each backend's failure
         response = llm_service._call_llm("Say 'Hello!'")
         print(f"FULL RESPONSE: {response}", flush=True)
     except Exception as e:
@@ -0,0 +1,42 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Add the project root to sys.path so tests can import 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core import config  # noqa: E402
+
+# Modules read these paths when first imported: point them away from app/data before any test imports one
+_DATA_DIR = Path(tempfile.mkdtemp(prefix="legal-tests-"))
+atexit.register(shutil.rmtree, _DATA_DIR, ignore_errors=True)
+shutil.copy(config.DATA_DIR / "precedents.json", _DATA_DIR)
+config.DATA_DIR = _DATA_DIR
+config.UPLOAD_DIR = _DATA_DIR / "uploads"
+config.PROCESSED_DIR = _DATA_DIR / "processed"
+config.UPLOAD_DIR.mkdir()
+config.PROCESSED_DIR.mkdir()
+
+
+@pytest.fixture(autouse=True)
+def isolated_data(tmp_path_factory, monkeypatch):
+    """Gives each test its own result store, portfolio index and audit trail."""
+    from app.core import portfolio, store
+    from app.utils import logger
+
+    tmp_path = tmp_path_factory.mktemp("data")
+
+    results_store = store.ResultStore(tmp_path / "results.db")
+    monkeypatch.setattr(store, "results_store", results_store)
+    monkeypatch.setattr(store, "result_cache", store.ResultCache(store.result_cache.budget_bytes, results_store))
+    monkeypatch.setattr(portfolio, "portfolio_index", portfolio.PortfolioIndex(tmp_path / "portfolio.db"))
+
+    writer = logger.AuditWriter(tmp_path / "logs" / "audit_trail.jsonl").start()
+    monkeypatch.setattr(logger.logger, "handlers", [logger._AuditQueueHandler(writer.queue)])
+    yield
+    writer.stop()
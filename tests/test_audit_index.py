@@ -0,0 +1,77 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.utils.audit_index import AuditIndex
+
+START = datetime(2024, 3, 1, 9, 0)
+
+
+def entry(minutes, action="analysis_complete", user="local_user", filename="nda.pdf", high=0, ai=False):
+    return json.dumps({
+        "timestamp": (START + timedelta(minutes=minutes)).isoformat(), "user_id": user, "action": action,
+        "details": {"filename": filename, "clause_count": 10, "high_risks": high, "ai_enabled": ai},
+    })
+
+
+LINES = [
+    entry(0, filename="nda.pdf", high=2, ai=True),
+    entry(10, filename="lease.docx", high=0),
+    entry(20, action="upload", filename="lease.docx"),
+    entry(60 * 24, user="auditor", filename="nda-v2.pdf", high=1, ai=True),
+    "not json",
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = AuditIndex(tmp_path / "audit_index.db")
+    index.add_lines(LINES)
+    return index
+
+
+def test_query_filters_newest_first(index):
+    assert index.count() == 4
+    assert [e["details"]["filename"] for e in index.query()] == ["nda-v2.pdf", "lease.docx", "lease.docx", "nda.pdf"]
+    assert [e["details"]["filename"] for e in index.query(action="analysis_complete", end=START + timedelta(days=1))] \
+        == ["lease.docx", "nda.pdf"]
+    assert [e["user_id"] for e in index.query(user="auditor")] == ["auditor"]
+    assert [e["details"]["filename"] for e in index.query(filename="nda*")] == ["nda-v2.pdf", "nda.pdf"]
+    assert len(index.query(start=(START + timedelta(minutes=10)).isoformat(), limit=2)) == 2
+
+
+def test_aggregate_overall_and_grouped(index):
+    overall = index.aggregate(action="analysis_complete")
+    assert overall == [{"entries": 3, "high_risk_total": 3, "with_high_risk": 2, "ai_enabled_ratio": 2 / 3}]
+
+    by_day = index.aggregate(action="analysis_complete", group_by="day")
+    assert [(row["day"], row["entries"]) for row in by_day] == [("2024-03-01", 2), ("2024-03-02", 1)]
+
+    by_action = {row["action"]: row["entries"] for row in index.aggregate(group_by="action")}
+    assert by_action == {"analysis_complete": 3, "upload": 1}
+    assert index.aggregate(user="nobody") == []
+
+    with pytest.raises(ValueError):
+        index.aggregate(group_by="clause_count")
+
+
+def test_catch_up_follows_the_trail_through_rotation(tmp_path):
+    trail, archive = tmp_path / "audit_trail.jsonl", tmp_path / "archive"
+    index = AuditIndex(tmp_path / "audit_index.db")
+    trail.write_text("\n".join(LINES[:2]) + "\n")
+    assert index.catch_up(trail, archive) == 2
+    assert index.catch_up(trail, archive) == 0
+
+    # More lines, then rotation before they were indexed, then a torn write on the new segment
+    with open(trail, "a") as f:
+        f.write(LINES[2] + "\n")
+    archive.mkdir()
+    with gzip.open(archive / "audit_trail-20240301-100000.jsonl.gz", "wb") as f:
+        f.write(trail.read_bytes())
+    trail.write_text(LINES[3] + "\n" + entry(60 * 25)[:20])
+
+    assert index.catch_up(trail, archive) == 2
+    assert index.count() == 4
+    assert index.rebuild(trail, archive) == 4
@@ -0,0 +1,49 @@
+import pytest
+
+from app.core.chat import ChatSession
+from app.core.llm import LLMConfig, LLMService
+from app.core.providers import StubProvider
+
+CONTRACT = "The Supplier shall deliver the Goods within thirty days. The Buyer shall pay within sixty days."
+
+
+class CachingStub(StubProvider):
+    """Stands in for Gemini: hands out context caches and records the options of every request."""
+
+    def __init__(self, **kwargs):
+        super().__init__(name="gemini", latency_ms=1, **kwargs)
+        self.caches = 0
+        self.requests = []
+
+    def create_context_cache(self, model, system_prompt, ttl_seconds):
+        self.caches += 1
+        return f"cache-{self.caches}"
+
+    def chat_with_usage(self, model, messages, **options):
+        self.requests.append((model, options, messages))
+        return super().chat_with_usage(model, messages)
+
+
+@pytest.fixture
+def service():
+    service = LLMService()
+    service.register_provider(CachingStub(), default_model="gemini-flash")
+    return service
+
+
+def test_turns_reuse_one_cache_and_send_only_the_conversation(service):
+    session = ChatSession(service, CONTRACT, LLMConfig(provider="gemini", model="gemini-flash", hedge=False))
+    session.ask("When are the Goods delivered?")
+    session.ask("And payment?")
+
+    stub = service.providers["gemini"]
+    assert stub.caches == 1
+    assert [options for _, options, _ in stub.requests] == [{"cached_content": "cache-1"}] * 2
+    # The second turn carries the first question and answer
+    assert [m["role"] for m in stub.requests[1][2]] == ["system", "user", "assistant", "user"]
+    assert len(session.history) == 4
+
+
+def test_candidates_are_public_and_lead_with_the_config(service):
+    config = LLMConfig(provider="gemini", model="gemini-flash", hedge=False)
+    assert service.candidates(config, "Explain this clause.", "chat") == [("gemini", "gemini-flash")]
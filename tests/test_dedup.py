@@ -0,0 +1,80 @@
+import pytest
+
+from app.core.dedup import EnrichmentCache, cluster, minhasher, polarity
+from app.core.llm import LLMConfig
+
+LONG = ("The Supplier shall be liable to the Buyer for all direct losses, costs and expenses arising from any delay "
+        "in delivery of the Goods, provided that the Buyer has notified the Supplier in writing within fourteen days.")
+
+NEAR_DUPLICATES = [
+    ("The Client shall pay Rs. 45,000 to Acme Traders Pvt. Ltd. within 30 days of the invoice date.",
+     "The Client shall pay Rs 45,000 to Acme Traders Pvt Ltd within 30 days of the invoice date."),
+    (LONG, LONG.replace("notified the Supplier", "informed the Supplier")),
+]
+
+# Same template, different figures or parties: explanations and remedies quote them, so nothing is shared
+DIFFERENT_DETAILS = [
+    ("The Client shall pay Rs. 45,000 to Acme Traders Pvt. Ltd. within 30 days of the invoice date.",
+     "The Client shall pay Rs. 60,000 to Acme Traders Pvt. Ltd. within 30 days of the invoice date."),
+    ("The Client shall pay Rs. 45,000 to Acme Traders Pvt. Ltd. within 30 days of the invoice date.",
+     "The Client shall pay Rs. 45,000 to Zenith Services LLP within 30 days of the invoice date."),
+    ("This Agreement commences on 1st April 2024 and continues for 12 months.",
+     "This Agreement commences on January 10, 2025 and continues for 12 months."),
+]
+
+NEGATIONS = [
+    (LONG, LONG.replace("shall be liable", "shall not be liable")),
+    (LONG, LONG.replace("shall be liable", "shall never be liable")),
+    (LONG, LONG.replace("shall be liable", "won't be liable")),
+    ("The Licensee may sublicense the Software to its affiliates with the prior written consent of the Licensor.",
+     "The Licensee may not sublicense the Software to its affiliates with the prior written consent of the Licensor."),
+]
+
+
+def low(*texts):
+    return [{"text": text, "risk": "Low"} for text in texts]
+
+
+@pytest.mark.parametrize("a, b", NEAR_DUPLICATES)
+def test_near_duplicates_cluster(a, b):
+    assert cluster(low(a, b)) == [[0, 1]]
+
+
+@pytest.mark.parametrize("a, b", DIFFERENT_DETAILS)
+def test_clauses_differing_in_amount_date_or_party_never_cluster(a, b):
+    assert cluster(low(a, b)) == [[0], [1]]
+
+
+@pytest.mark.parametrize("a, b", NEGATIONS)
+def test_negated_clause_never_clusters_with_the_original(a, b):
+    assert cluster(low(a, b)) == [[0], [1]]
+    assert polarity(a) != polarity(b)
+
+
+def test_different_risk_never_clusters():
+    a, b = NEAR_DUPLICATES[0]
+    assert cluster([{"text": a, "risk": "High"}, {"text": b, "risk": "Low"}]) == [[0], [1]]
+
+
+def test_clusters_compare_against_their_first_clause():
+    a, b = NEAR_DUPLICATES[1]
+    unrelated = "Nothing in this Agreement creates a partnership or agency between the parties."
+    assert cluster(low(a, unrelated, b, "")) == [[0, 2], [1], [3]]
+
+
+def test_cache_shares_output_between_near_duplicates_only():
+    cache = EnrichmentCache(max_entries=10)
+    config = LLMConfig(provider="stub", model="stub")
+    original, duplicate = NEAR_DUPLICATES[0]
+    other_amount = DIFFERENT_DETAILS[0][1]
+    clause = {"text": original, "risk": "Low"}
+    cache.put(cache.namespace(config, clause), minhasher.signature(original), "explanation", "Plain English.")
+
+    def lookup(text, risk="Low"):
+        clause = {"text": text, "risk": risk}
+        return cache.get(cache.namespace(config, clause), minhasher.signature(text), "explanation")
+
+    assert lookup(duplicate) == "Plain English."
+    assert lookup(other_amount) is None
+    assert lookup(original.replace("shall pay", "shall not pay")) is None
+    assert lookup(duplicate, risk="High") is None
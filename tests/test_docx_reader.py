@@ -0,0 +1,111 @@
+import io
+import zipfile
+
+import docx
+
+from app.core.docx_reader import CELL_SEPARATOR, format_number, read_docx
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def saved(document) -> io.BytesIO:
+    buffer = io.BytesIO()
+    document.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def test_paragraphs_lists_tables_and_header():
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = "CONFIDENTIAL"
+    document.add_paragraph("Terms")
+    document.add_paragraph("The Supplier shall deliver the Goods.", style="List Number")
+    document.add_paragraph("The Buyer shall pay the Price.", style="List Number")
+    table = document.add_table(rows=2, cols=2)
+    for row, values in enumerate([("Party", "Fee"), ("Acme Traders", "Rs. 50,000")]):
+        for column, value in enumerate(values):
+            table.cell(row, column).text = value
+
+    assert read_docx(saved(document)).split("\n") == [
+        "CONFIDENTIAL",
+        "Terms",
+        "1. The Supplier shall deliver the Goods.",
+        "2. The Buyer shall pay the Price.",
+        f"Party{CELL_SEPARATOR}Fee",
+        f"Acme Traders{CELL_SEPARATOR}Rs. 50,000",
+    ]
+
+
+def test_nested_table_stays_in_its_cell():
+    document = docx.Document()
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "Schedule"
+    inner = table.cell(0, 1).add_table(rows=2, cols=2)
+    for row, values in enumerate([("Item", "Qty"), ("Steel", "10")]):
+        for column, value in enumerate(values):
+            inner.cell(row, column).text = value
+
+    assert read_docx(saved(document)) == f"Schedule{CELL_SEPARATOR}Item, Qty; Steel, 10;"
+
+
+NUMBERING = f"""<w:numbering {W}>
+  <w:abstractNum w:abstractNumId="0">
+    <w:lvl w:ilvl="0"><w:start w:val="1"/><w:numFmt w:val="decimal"/><w:lvlText w:val="%1."/></w:lvl>
+    <w:lvl w:ilvl="1"><w:start w:val="1"/><w:numFmt w:val="decimal"/><w:lvlText w:val="%1.%2"/></w:lvl>
+    <w:lvl w:ilvl="2"><w:start w:val="1"/><w:numFmt w:val="lowerLetter"/><w:lvlText w:val="(%3)"/></w:lvl>
+  </w:abstractNum>
+  <w:num w:numId="1"><w:abstractNumId w:val="0"/></w:num>
+  <w:num w:numId="2"><w:abstractNumId w:val="0"/>
+    <w:lvlOverride w:ilvl="0"><w:startOverride w:val="5"/></w:lvlOverride></w:num>
+</w:numbering>"""
+
+
+def paragraph(text, num_id=None, ilvl=None):
+    numbering = f'<w:pPr><w:numPr><w:ilvl w:val="{ilvl}"/><w:numId w:val="{num_id}"/></w:numPr></w:pPr>' \
+        if num_id else ""
+    return f"<w:p>{numbering}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def package(body: str, numbering: str = NUMBERING) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        z.writestr("_rels/.rels", '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                   '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+                   'relationships/officeDocument" Target="word/document.xml"/></Relationships>')
+        z.writestr("word/_rels/document.xml.rels",
+                   '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                   '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+                   'relationships/numbering" Target="numbering.xml"/></Relationships>')
+        z.writestr("word/numbering.xml", numbering)
+        z.writestr("word/document.xml", f"<w:document {W}><w:body>{body}</w:body></w:document>")
+    buffer.seek(0)
+    return buffer
+
+
+def test_multilevel_numbering_and_restarts():
+    body = "".join([
+        paragraph("Definitions", 1, 0),
+        paragraph("Goods means the items ordered.", 1, 1),
+        paragraph("Price means the agreed fee.", 1, 1),
+        paragraph("including taxes", 1, 2),
+        paragraph("Delivery", 1, 0),
+        paragraph("Goods are delivered to site.", 1, 1),
+        paragraph("Unnumbered note."),
+        paragraph("Payment", 2, 0),
+    ])
+    assert read_docx(package(body)).split("\n") == [
+        "1. Definitions",
+        "1.1 Goods means the items ordered.",
+        "1.2 Price means the agreed fee.",
+        "(a) including taxes",
+        "2. Delivery",
+        "2.1 Goods are delivered to site.",
+        "Unnumbered note.",
+        "5. Payment",
+    ]
+
+
+def test_number_formats():
+    assert [format_number(n, "lowerRoman") for n in (1, 4, 9, 14)] == ["i", "iv", "ix", "xiv"]
+    assert format_number(28, "upperLetter") == "BB"
+    assert format_number(3, "bullet") == ""
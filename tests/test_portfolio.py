@@ -0,0 +1,74 @@
+import pytest
+
+from app.core.portfolio import PortfolioIndex, _fts5_available
+
+MODES = [pytest.param(True, id="fts5",
+                      marks=pytest.mark.skipif(not _fts5_available(), reason="SQLite built without FTS5")),
+         pytest.param(False, id="postings")]
+
+
+def clause(clause_id, text, clause_type="Obligation", risk="Low"):
+    return {"id": clause_id, "text": text, "type": clause_type, "risk": risk, "risk_reason": ""}
+
+
+NDA = {
+    "metadata": {"filename": "nda.pdf", "type": "pdf"},
+    "risk_summary": {"High": 1, "Medium": 0, "Low": 2},
+    "entities": {"ORG": ["Acme Traders Pvt. Ltd."]},
+    "clauses": [
+        clause("1", "The Recipient shall keep the Confidential Information secret."),
+        clause("2", "The Discloser may terminate this Agreement without notice.", "Right", "High"),
+        clause("3", "The Recipient agrees to a non-compete period of two years."),
+    ],
+}
+LEASE = {
+    "metadata": {"filename": "lease.docx", "type": "docx"},
+    "risk_summary": {"High": 0, "Medium": 1, "Low": 1},
+    "entities": {"ORG": ["Zenith Services LLP"]},
+    "clauses": [
+        clause("1", "Either party may terminate the lease by giving ninety days notice.", "Right", "Medium"),
+        clause("2", "The Tenant shall pay the rent on the first day of each month."),
+    ],
+}
+
+
+@pytest.fixture(params=MODES)
+def index(request, tmp_path):
+    index = PortfolioIndex(tmp_path / "portfolio.db", use_fts=request.param)
+    index.add_document("nda", NDA)
+    index.add_document("lease", LEASE)
+    return index
+
+
+def found(hits):
+    return sorted((hit["doc_id"], hit["clause_id"]) for hit in hits)
+
+
+def test_terms_are_anded(index):
+    assert found(index.search("terminate")) == [("lease", "1"), ("nda", "2")]
+    assert found(index.search("terminate notice lease")) == [("lease", "1")]
+    assert index.search("arbitration") == []
+
+
+def test_phrases_keep_their_word_order(index):
+    assert found(index.search('"confidential information"')) == [("nda", "1")]
+    assert index.search('"information confidential"') == []
+    assert found(index.search("non-compete")) == [("nda", "3")]
+
+
+def test_filters(index):
+    assert found(index.search("terminate", risks=["High"])) == [("nda", "2")]
+    assert found(index.search(types=["Right"], file_type="docx")) == [("lease", "1")]
+    assert found(index.search("shall", entity="zenith")) == [("lease", "2")]
+    assert found(index.search(filename="*.pdf")) == [("nda", "1"), ("nda", "2"), ("nda", "3")]
+
+
+def test_reindexing_replaces_and_removal_drops(index):
+    index.add_document("nda", {**NDA, "clauses": NDA["clauses"][:1]})
+    assert index.stats()["clauses"] == 3
+    assert index.search("terminate", filename="nda.pdf") == []
+    assert index.clause_text("nda", 0) == NDA["clauses"][0]["text"]
+
+    index.remove_document("lease")
+    assert index.search("terminate") == []
+    assert index.stats()["documents"] == 1
@@ -0,0 +1,52 @@
+import pytest
+
+from app.core.precedents import PrecedentMatch, precedent_library
+from app.core.risk import RiskEngine
+
+# Boilerplate that shares wording with risky precedents (notice, termination, party) but is not risky
+NEUTRAL_CLAUSES = [
+    "Any notice under this Agreement shall be in writing and delivered to the other party",
+    "Any notice given under this Agreement shall be sent to the other party at its registered address.",
+    "Either party shall give the other party prompt notice of any change in its address.",
+    "This Agreement may be executed in any number of counterparts, each of which shall be an original.",
+    "Upon termination each party shall return the other party's confidential information.",
+    "The obligations in this clause shall survive the termination or expiry of this Agreement.",
+    "Any amendment to this Agreement shall be in writing and signed by both parties.",
+    "The term of this Agreement shall commence on the Effective Date and continue for two years.",
+    "Nothing in this Agreement creates a partnership or agency between the parties.",
+    "This Agreement is governed by the laws of India.",
+]
+
+RISKY_CLAUSES = [
+    ("The Company may end this contract whenever it likes.", "High"),
+    ("Any delay shall attract liquidated damages payable to the Buyer for each week.", "Medium"),
+]
+
+
+@pytest.mark.parametrize("text", NEUTRAL_CLAUSES)
+def test_neutral_clause_is_not_escalated(text):
+    match = precedent_library.match([text])[0]
+    assert match is None or not match.escalates()
+
+
+@pytest.mark.parametrize("text,level", RISKY_CLAUSES)
+def test_risky_paraphrase_is_escalated(text, level):
+    match = precedent_library.match([text])[0]
+    assert match is not None and match.escalates()
+    assert RiskEngine.escalate(RiskEngine.evaluate(text), match.signal)[0] == level
+
+
+def test_close_standard_precedent_blocks_escalation():
+    risky = {"id": "R", "level": "High", "reason": "r", "text": "x"}
+    assert PrecedentMatch(risky, 0.45, standard_score=0.10).escalates()
+    assert not PrecedentMatch(risky, 0.45, standard_score=0.40).escalates()
+    assert not PrecedentMatch(risky, 0.35, standard_score=0.0).escalates()
+    assert not PrecedentMatch({**risky, "level": "Low"}, 0.9).escalates()
+
+
+def test_standard_score_is_the_closest_low_precedent():
+    text = "Either party may terminate this agreement with sixty days written notice."
+    match = precedent_library.match([text])[0]
+    standard = [p["text"] for p in precedent_library.precedents if p["level"] == "Low"]
+    scores = precedent_library.embedder.embed(standard) @ precedent_library.embedder.embed([text])[0]
+    assert match.standard_score == pytest.approx(float(scores.max()), abs=1e-5)
@@ -0,0 +1,130 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.providers import StubProvider
+from app.core.routing import CircuitBreaker, LLMRouter, LLMUnavailableError
+
+MESSAGES = [{"role": "user", "content": "Explain the termination clause."}]
+
+
+def make_router(*stubs, **timeouts):
+    return LLMRouter({stub.name: stub for stub in stubs}, timeouts=timeouts, max_workers=4)
+
+
+def test_fails_over_to_the_next_candidate():
+    primary = StubProvider(name="primary", latency_ms=1, error_rate=1.0)
+    backup = StubProvider(name="backup", latency_ms=1)
+    router = make_router(primary, backup)
+
+    text, name = router.call([("primary", "m"), ("backup", "m")], MESSAGES, hedge=False)
+
+    assert name == "backup"
+    assert text.startswith("[m]")
+    assert primary.errors == 1
+
+
+def test_every_candidate_failing_raises():
+    router = make_router(StubProvider(name="primary", latency_ms=1, error_rate=1.0))
+    with pytest.raises(LLMUnavailableError, match="primary"):
+        router.call([("primary", "m")], MESSAGES, hedge=False)
+
+
+def test_slow_primary_is_hedged():
+    slow = StubProvider(name="slow", latency_ms=500)
+    fast = StubProvider(name="fast", latency_ms=1)
+    # Before enough samples, the hedge goes out after half the timeout
+    router = make_router(slow, fast, slow=0.2)
+
+    _, name = router.call([("slow", "m"), ("fast", "m")], MESSAGES, hedge=True)
+
+    assert name == "fast"
+    assert router.hedge_delay("slow") == pytest.approx(0.1)
+
+
+def test_without_hedging_the_primary_answers():
+    slow = StubProvider(name="slow", latency_ms=50)
+    fast = StubProvider(name="fast", latency_ms=1)
+    router = make_router(slow, fast, slow=1.0)
+
+    _, name = router.call([("slow", "m"), ("fast", "m")], MESSAGES, hedge=False)
+
+    assert name == "slow"
+    assert fast.calls == 0
+
+
+def test_circuit_opens_after_repeated_failures():
+    primary = StubProvider(name="primary", latency_ms=1, error_rate=1.0)
+    backup = StubProvider(name="backup", latency_ms=1)
+    router = make_router(primary, backup)
+    candidates = [("primary", "m"), ("backup", "m")]
+
+    for _ in range(router._breaker("primary").threshold):
+        router.call(candidates, MESSAGES, hedge=False)
+    assert router.breakers["primary"].state == CircuitBreaker.OPEN
+
+    calls = primary.calls
+    _, name = router.call(candidates, MESSAGES, hedge=False)
+    assert name == "backup"
+    assert primary.calls == calls  # Skipped while open
+
+
+def test_circuit_half_opens_after_cooldown():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.0)
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # One trial at a time
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_calls_waiting_for_a_worker_do_not_time_out():
+    stub = StubProvider(name="primary", latency_ms=150)
+    router = LLMRouter({"primary": stub}, timeouts={"primary": 0.25}, max_workers=1)
+    prompts = [[{"role": "user", "content": f"Clause {i}"}] for i in range(3)]
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        calls = [pool.submit(router.call, [("primary", "m")], messages, False) for messages in prompts]
+        names = [call.result()[1] for call in calls]
+
+    assert names == ["primary"] * 3
+
+
+def test_cancelled_half_open_trial_frees_the_breaker():
+    slow = StubProvider(name="slow", latency_ms=300)
+    recovering = StubProvider(name="recovering", latency_ms=1)
+    router = LLMRouter({"slow": slow, "recovering": recovering}, timeouts={"slow": 0.4}, max_workers=2)
+    breaker = router.breakers["recovering"] = CircuitBreaker(threshold=1, cooldown=0.0)
+    breaker.record(False)
+
+    # Both workers busy: the hedge to "recovering" (at 0.2s) queues behind other work and is cancelled once
+    # "slow" answers (at 0.3s)
+    router._pool.submit(time.sleep, 1.0)
+    threading.Timer(0.1, router._pool.submit, (time.sleep, 0.5)).start()
+    _, name = router.call([("slow", "m"), ("recovering", "m")], MESSAGES, hedge=True)
+
+    assert name == "slow"
+    assert recovering.calls == 0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_options_by_model_apply_to_that_model_only():
+    seen = []
+
+    class Recording(StubProvider):
+        def chat_with_usage(self, model, messages, **options):
+            seen.append((model, options))
+            return super().chat_with_usage(model, messages)
+
+    router = make_router(Recording(name="primary", latency_ms=1))
+    options = {"primary": {"keep_alive": "5m"}, ("primary", "cached"): {"cached_content": "handle"}}
+    router.call([("primary", "cached")], MESSAGES, hedge=False, options=options)
+    router.call([("primary", "other")], MESSAGES, hedge=False, options=options)
+
+    assert seen == [("cached", {"keep_alive": "5m", "cached_content": "handle"}),
+                    ("other", {"keep_alive": "5m"})]
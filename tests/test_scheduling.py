@@ -0,0 +1,52 @@
+import time
+
+from app.core.llm import LLMConfig
+from app.core.scheduling import (
+    DONE, FAILED, SKIPPED, REASON_BUDGET, REASON_DEADLINE, EnrichmentScheduler, EnrichmentTask,
+)
+
+
+def task(priority, seq, tokens=100, seconds=0.0, output="ok"):
+    def run():
+        time.sleep(seconds)
+        return output
+    return EnrichmentTask(priority, seq, "explanation", seq, tokens, run)
+
+
+def run(tasks, **config):
+    scheduler = EnrichmentScheduler(LLMConfig(provider="stub", model="stub", **config))
+    outcomes = {task.seq: (status, output) for task, status, output in scheduler.stream(tasks)}
+    return outcomes, scheduler.stats
+
+
+def test_all_tasks_run_without_limits():
+    outcomes, stats = run([task(1, 0), task(0, 1), task(2, 2, output=None)], deadline_s=None, token_budget=None)
+    assert outcomes == {0: (DONE, "ok"), 1: (DONE, "ok"), 2: (FAILED, None)}
+    assert stats[DONE] == 2 and stats[FAILED] == 1 and stats["tokens_reserved"] == 300
+
+
+def test_budget_skips_lowest_priority_first():
+    tasks = [task(3, 0, tokens=400), task(0, 1, tokens=400), task(1, 2, tokens=400), task(2, 3, tokens=100)]
+    outcomes, stats = run(tasks, deadline_s=None, token_budget=900)
+    # Priorities 0 and 1 take 800; priority 2 still fits in what is left, priority 3 does not
+    assert outcomes[1][0] == outcomes[2][0] == outcomes[3][0] == DONE
+    assert outcomes[0] == (SKIPPED, REASON_BUDGET)
+    assert stats["tokens_reserved"] == 900
+
+
+def test_deadline_skips_unfinished_tasks():
+    tasks = [task(0, 0, seconds=0.01), task(1, 1, seconds=0.5), task(2, 2, seconds=0.5)]
+    start = time.monotonic()
+    outcomes, stats = run(tasks, deadline_s=0.2, token_budget=None, concurrency=1)
+    assert time.monotonic() - start < 0.45  # Returns at the deadline, without waiting for the running task
+    assert outcomes[0] == (DONE, "ok")
+    assert outcomes[1] == outcomes[2] == (SKIPPED, REASON_DEADLINE)
+    assert stats[SKIPPED] == 2
+
+
+def test_stream_runs_in_priority_order():
+    scheduler = EnrichmentScheduler(LLMConfig(provider="stub", model="stub", concurrency=1,
+                                              deadline_s=None, token_budget=None))
+    order = [task.seq for task, _, _ in scheduler.stream([task(2, 0), task(0, 1), task(1, 2)])]
+    assert order == [1, 2, 0]
+    assert scheduler.stats["scheduled"] == 3
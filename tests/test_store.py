@@ -0,0 +1,112 @@
+import pytest
+
+from app.core import store as store_module
+from app.core.llm import LLMConfig
+from app.core.pipeline import ContractPipeline
+from app.core.store import ResultCache, ResultStore, rekey, result_key
+from app.utils.synthetic import generate_contract_text, make_upload
+
+DATA = generate_contract_text(12, seed=3).encode("utf-8")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(tmp_path / "results.db")
+
+
+@pytest.fixture
+def results():
+    return ContractPipeline.analyze(make_upload(DATA, "contract.txt"), "txt")
+
+
+def test_save_load_round_trip(store, results):
+    results["clauses"][0]["explanation"] = "Plain English."
+    results["clauses"][1]["ai_skipped"] = {"remedy": "time limit reached"}
+    key = result_key(DATA, enable_ai=False)
+    store.save(key, results)
+
+    loaded = store.load(key)
+    assert loaded["full_text"] == results["full_text"]
+    assert loaded["risk_summary"] == results["risk_summary"]
+    assert [c["text"] for c in loaded["clauses"]] == [c["text"] for c in results["clauses"]]
+    assert [(c["id"], c["type"], c["risk"], c["risk_reason"]) for c in loaded["clauses"]] == \
+        [(c["id"], c["type"], c["risk"], c["risk_reason"]) for c in results["clauses"]]
+    assert loaded["clauses"][0]["explanation"] == "Plain English."
+    assert loaded["clauses"][1]["ai_skipped"] == {"remedy": "time limit reached"}
+
+    summary = store.load_summary(key)
+    assert summary["clause_count"] == len(results["clauses"])
+    assert "clauses" not in summary and "full_text" not in summary
+    assert store.recent()[0]["key"] == key
+
+
+def test_missing_key_loads_none(store):
+    assert store.load("missing") is None
+    assert store.load_summary("missing") is None
+
+
+def test_result_key_changes_with_what_produced_the_results():
+    standard = LLMConfig(provider="ollama", model="mistral")
+    key = result_key(DATA, enable_ai=True, llm_config=standard)
+
+    assert key == result_key(DATA, enable_ai=True, llm_config=LLMConfig(provider="ollama", model="mistral"))
+    assert result_key(DATA + b" ", enable_ai=True, llm_config=standard) != key
+    assert result_key(DATA, enable_ai=False, llm_config=standard) != key
+    assert result_key(DATA, enable_ai=True, llm_config=LLMConfig(provider="ollama", model="deepseek-r1")) != key
+    assert result_key(DATA, enable_ai=True,
+                      llm_config=LLMConfig(provider="ollama", model="mistral", mode="reasoning")) != key
+
+
+def test_result_key_changes_with_pipeline_and_rules(monkeypatch):
+    key = result_key(DATA, enable_ai=False)
+    monkeypatch.setattr(store_module, "PIPELINE_VERSION", store_module.PIPELINE_VERSION + 1)
+    bumped = result_key(DATA, enable_ai=False)
+    monkeypatch.setattr(store_module, "RULES_VERSION", "changed")
+    assert len({key, bumped, result_key(DATA, enable_ai=False)}) == 3
+
+
+def test_cache_evicts_least_recently_used_and_keeps_ai_output(store, results):
+    cache = ResultCache(1, store)  # Every put is over budget
+    cache.put("a", results)
+    results["clauses"][0]["explanation"] = "Written after the put."
+    cache.put("b", {**results, "clauses": results["clauses"][:1]})
+
+    assert cache.stats()["resident"] == 1 and cache.evictions == 1
+    assert cache.get("a")["clauses"][0]["explanation"] == "Written after the put."
+
+
+def test_cache_never_evicts_results_being_enriched(store, results):
+    cache = ResultCache(1, store)
+    cache.put("a", results)
+    assert cache.claim("a", "session-a")
+    cache.put("b", results)
+    assert cache.stats()["resident"] == 2
+    assert cache.get("a") is results
+
+    cache.release("a", "session-a")
+    cache.put("c", results)
+    assert cache.stats()["resident"] == 1
+
+
+def test_rekey_matches_result_key_for_the_new_config():
+    old = LLMConfig(provider="ollama", model="mistral")
+    new = LLMConfig(provider="gemini", model="gemini-flash")
+    assert rekey(result_key(DATA, True, old), new) == result_key(DATA, True, new)
+
+
+def test_only_one_owner_enriches_a_key(store):
+    cache = ResultCache(1 << 20, store)
+    assert cache.claim("key", "session-a")
+    assert not cache.claim("key", "session-b")
+    assert cache.claim("key", "session-a")  # Renewal
+    cache.release("key", "session-b")  # Not the owner: no effect
+    assert not cache.claim("key", "session-b")
+    cache.release("key", "session-a")
+    assert cache.claim("key", "session-b")
+
+
+def test_abandoned_claim_expires(store, monkeypatch):
+    monkeypatch.setattr(store_module, "ENRICHMENT_CLAIM_SECONDS", 0)
+    cache = ResultCache(1 << 20, store)
+    assert cache.claim("key", "session-a")
+    assert cache.claim("key", "session-b")
@@ -0,0 +1,72 @@
+import codecs
+import io
+
+import pytest
+
+from app.core import uploads
+from app.core.uploads import decode_text, detect_encoding, spool
+
+WESTERN = [
+    "naïve café…",
+    "The naïve café… charged €5 for a crème brûlée – “quoted”.",
+    "Der Lieferant muss die Waren innerhalb von dreißig Tagen an den Käufer übergeben.",
+    "The Supplier shall deliver the Goods to the Buyer’s premises within thirty days – “time is of the essence”.",
+]
+
+
+@pytest.mark.parametrize("text", WESTERN)
+def test_western_legacy_text_reads_as_cp1252(text):
+    with spool(io.BytesIO(text.encode("cp1252")), "contract.txt") as upload:
+        assert decode_text(upload) == text
+
+
+@pytest.mark.skipif(not uploads.CHARSET_DETECTION, reason="charset_normalizer not installed")
+@pytest.mark.parametrize("text, encoding", [
+    ("Поставщик обязан доставить товар покупателю в течение тридцати дней", "cp1251"),
+    ("Dostawca zobowiązuje się dostarczyć towar. Zażółć gęślą jaźń.", "cp1250"),
+])
+def test_other_legacy_text_is_still_detected(text, encoding):
+    assert detect_encoding(text.encode(encoding)) == encoding
+
+
+def test_utf8_and_boms():
+    text = "naïve café…"
+    assert detect_encoding(text.encode("utf-8")) == "utf-8"
+    # A character cut off by the end of the sample
+    assert detect_encoding(text.encode("utf-8")[:-1]) == "utf-8"
+    assert detect_encoding(codecs.BOM_UTF8 + text.encode("utf-8")) == "utf-8-sig"
+    assert detect_encoding(text.encode("utf-16")) == "utf-16"
+
+
+def test_small_in_memory_upload_is_used_in_place(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path)
+    data = b"The Supplier shall deliver the Goods."
+    with uploads.spooled(io.BytesIO(data)) as upload:
+        assert upload.path is None
+        assert bytes(upload.view()) == data
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_large_upload_is_spooled_and_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(uploads, "UPLOAD_SPOOL_BYTES", 16)
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_BYTES", 7)  # Spooled in pieces that split characters
+    data = "naïve café… ".encode("utf-8") * 10
+    source = io.BytesIO(data)
+    source.name = "contract.txt"
+
+    with uploads.spooled(source) as upload:
+        assert upload.path is not None and upload.path.endswith(".txt")
+        assert list(tmp_path.iterdir()) != []
+        assert upload.size == len(data)
+        assert decode_text(upload) == data.decode("utf-8")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_spooled_leaves_callers_files_alone(tmp_path):
+    path = tmp_path / "contract.txt"
+    path.write_bytes(b"The Buyer shall pay.")
+    with uploads.spooled(path) as upload:
+        assert upload.path == str(path)
+        assert decode_text(upload) == "The Buyer shall pay."
+    assert path.exists()